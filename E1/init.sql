@@ -485,35 +485,64 @@ INSERT INTO A_KopfFreie VALUES
 ('2508303-J03', 1, 1, 'Info45', 'Val45', '1', '2025-07-03', '2026-01-05');
 
 -- Création des index pour optimiser les performances
-CREATE INDEX idx_aufstatus ON A_Kopf(AufStatus);
+-- Extraction des volets roulants (mysql_sync_service.py):
+-- - A_Kopf: index couvrant statut + numéro + extension (l'ID, clé primaire, y est
+--   inclus): le filtre sur AufStatus et les marqueurs de la synchronisation
+--   incrémentale parcourent l'index au lieu de la table
+-- - P_Zubeh: idx_zcode couvre l'agrégation des coffres (clé primaire incluse)
+-- - A_Logbuch / A_Vorgang: lecture par commande, et par date pour les filigranes
+--   de la synchronisation incrémentale
+-- Les clés primaires de A_Kopf, P_Zubeh et A_Vorgang servent déjà aux recherches
+-- par ID / ID_A_Kopf: pas d'index séparé
+CREATE INDEX idx_kopf_statut_commande ON A_Kopf(AufStatus, AuNummer, AuAlpha);
 CREATE INDEX idx_aunummer ON A_Kopf(AuNummer);
 CREATE INDEX idx_aualpha ON A_Kopf(AuAlpha);
 CREATE INDEX idx_zcode ON P_Zubeh(ZCode);
 CREATE INDEX idx_notiz ON A_Logbuch(Notiz(255));
 CREATE INDEX idx_vorgang_nummer ON A_Vorgang(Nummer);
-CREATE INDEX idx_logbuch_id_kopf ON A_Logbuch(ID_A_Kopf);
-CREATE INDEX idx_zubeh_id_kopf ON P_Zubeh(ID_A_Kopf);
-CREATE INDEX idx_vorgang_id_kopf ON A_Vorgang(ID_A_Kopf);
-CREATE INDEX idx_kopf_id ON A_Kopf(ID);
-
--- Vue pour faciliter les requêtes de volets roulants
-CREATE VIEW IF NOT EXISTS vue_commandes_volets AS
-SELECT 
-    Cde.AuNummer as numero_commande,
-    Cde.AuAlpha as extension, 
-    Cde.AufStatus as status,
-    DATE(Logb.Datum) as date_modification,
-    a.ZCode as coffre,
-    CASE WHEN Vorgang.Nummer LIKE '%VR%' THEN 1 ELSE 0 END AS gestion_en_stock,
-    Cde.Techniker as technicien,
-    Cde.A_VorMwSt as prix_ht
-FROM A_Kopf AS Cde
-LEFT JOIN A_KopfFreie AS cf ON Cde.ID = cf.ID_A_Kopf
-LEFT JOIN A_Logbuch AS Logb ON Cde.ID = Logb.ID_A_Kopf
-LEFT JOIN P_Zubeh AS a ON Cde.ID = a.ID_A_Kopf
-LEFT JOIN P_Artikel AS Paramgen ON Cde.ID = Paramgen.ID_A_Kopf
-LEFT JOIN A_Vorgang AS Vorgang ON Cde.ID = Vorgang.ID_A_Kopf
-WHERE 
-    Logb.Notiz LIKE '%cde Planifiee%'
-    AND (Cde.AufStatus LIKE '%Planifiee%' OR Cde.AufStatus LIKE '%lancer en prod%' OR Cde.AufStatus LIKE '%vitrage%')
-    AND (a.ZCode LIKE 'SOP%' OR a.ZCode LIKE 'S P %' OR a.ZCode LIKE 'S D %' OR a.ZCode LIKE 'S Q %' OR a.ZCode LIKE 'S T %' OR a.ZCode LIKE 'S TAB %' OR a.ZCode LIKE 'S TN %');
+CREATE INDEX idx_logbuch_id_kopf ON A_Logbuch(ID_A_Kopf, Datum);
+CREATE INDEX idx_logbuch_datum ON A_Logbuch(Datum);
+CREATE INDEX idx_vorgang_datum ON A_Vorgang(Datum);
+
+-- Vue pour faciliter les requêtes de volets roulants (une ligne par commande,
+-- mêmes règles que l'extraction de mysql_sync_service.py)
+CREATE OR REPLACE VIEW vue_commandes_volets AS
+SELECT numero_commande, extension, status, date_modification, coffre, gestion_en_stock, technicien, prix_ht
+FROM (
+    SELECT
+        Cde.AuNummer AS numero_commande,
+        Cde.AuAlpha AS extension,
+        Cde.AufStatus AS status,
+        DATE(Planification.derniere_planification) AS date_modification,
+        Coffre.coffre,
+        Cde.gestion_en_stock,
+        Cde.Techniker AS technicien,
+        Cde.A_VorMwSt AS prix_ht,
+        ROW_NUMBER() OVER (
+            PARTITION BY Cde.AuNummer, Cde.AuAlpha
+            ORDER BY Cde.gestion_en_stock DESC, Planification.derniere_planification DESC, Cde.ID
+        ) AS rang
+    FROM (
+        SELECT
+            Kopf.ID, Kopf.AuNummer, Kopf.AuAlpha, Kopf.AufStatus, Kopf.Techniker, Kopf.A_VorMwSt,
+            EXISTS (
+                SELECT 1 FROM A_Vorgang AS Vorgang
+                WHERE Vorgang.ID_A_Kopf = Kopf.ID AND Vorgang.Nummer LIKE '%VR%'
+            ) AS gestion_en_stock
+        FROM A_Kopf AS Kopf
+        WHERE (Kopf.AufStatus LIKE '%Planifiee%' OR Kopf.AufStatus LIKE '%lancer en prod%' OR Kopf.AufStatus LIKE '%vitrage%')
+    ) AS Cde
+    JOIN (
+        SELECT Logb.ID_A_Kopf, MAX(Logb.Datum) AS derniere_planification
+        FROM A_Logbuch AS Logb
+        WHERE Logb.Notiz LIKE '%cde Planifiee%'
+        GROUP BY Logb.ID_A_Kopf
+    ) AS Planification ON Planification.ID_A_Kopf = Cde.ID
+    JOIN (
+        SELECT a.ID_A_Kopf, MIN(a.ZCode) AS coffre
+        FROM P_Zubeh AS a
+        WHERE (a.ZCode LIKE 'SOP%' OR a.ZCode LIKE 'S P %' OR a.ZCode LIKE 'S D %' OR a.ZCode LIKE 'S Q %' OR a.ZCode LIKE 'S T %' OR a.ZCode LIKE 'S TAB %' OR a.ZCode LIKE 'S TN %')
+        GROUP BY a.ID_A_Kopf
+    ) AS Coffre ON Coffre.ID_A_Kopf = Cde.ID
+) AS commandes
+WHERE rang = 1;
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmark de bout en bout de l'ingestion des logs machines (LogService).
+
+Des logs synthétiques réalistes (log_generator.py) sont générés pour chaque
+machine, puis les trois étapes de l'ingestion sont chronométrées séparément:
+- parsing: lecture en streaming et découpage des lignes (lignes/s)
+- analyse: calcul des indicateurs sur les événements parsés (événements/s)
+- sauvegarde: écriture en base PostgreSQL, première insertion puis
+  retraitement à l'identique (lignes de détail/s)
+
+Les résultats peuvent être enregistrés comme référence puis comparés aux
+passages suivants: le script se termine en erreur si une étape est plus lente
+que la référence au-delà de la tolérance (détection des régressions).
+
+La sauvegarde utilise la base configurée (POSTGRES_*) avec des centres
+d'usinage dédiés (BENCH_<machine>), supprimés à la fin du benchmark.
+
+Utilisation:
+- python benchmark_ingestion.py                                # 1 jour, 1 événement/s, 3 machines
+- python benchmark_ingestion.py --days 7 --rate 3 --malformed 0.01
+- python benchmark_ingestion.py --no-db                        # Sans l'étape de sauvegarde
+- python benchmark_ingestion.py --save-baseline reference.json
+- python benchmark_ingestion.py --baseline reference.json --tolerance 0.2 --repeat 3
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from ftp_log_service import LogService, PipelineStageStats, count_detail_rows
+from log_generator import MACHINE_PROFILES, generate_logs, parse_mix
+
+# Les benchmarks ne doivent pas être ralentis par les logs du service
+logging.getLogger('ftp_log_service').setLevel(logging.WARNING)
+
+# Préfixe des centres d'usinage créés par le benchmark
+BENCHMARK_PREFIX = "BENCH_"
+
+# Étapes mesurées: nom -> unité du débit
+STAGES = {
+    "parsing": "lignes",
+    "analyse": "événements",
+    "sauvegarde": "lignes",
+    "retraitement": "lignes",
+}
+
+
+def delete_benchmark_rows(service):
+    """Supprime les centres d'usinage du benchmark et toutes leurs données."""
+    # Préfixe comparé tel quel: avec LIKE, '_' accepterait n'importe quel caractère
+    prefix = (len(BENCHMARK_PREFIX), BENCHMARK_PREFIX)
+    service.cur.execute("""
+        SELECT s.id FROM session_production s
+        JOIN centre_usinage c ON c.id = s.centre_usinage_id
+        WHERE left(c.nom, %s) = %s
+    """, prefix)
+    session_ids = [row[0] for row in service.cur.fetchall()]
+
+    if session_ids:
+        for table in ("job_profil", "periode_attente", "periode_arret", "piece_production"):
+            service.cur.execute(f"DELETE FROM {table} WHERE session_id = ANY(%s)", (session_ids,))
+        service.cur.execute("DELETE FROM session_production WHERE id = ANY(%s)", (session_ids,))
+    service.cur.execute("DELETE FROM centre_usinage WHERE left(nom, %s) = %s", prefix)
+    service.conn.commit()
+
+
+def run_suite(generated, use_db=True):
+    """
+    Chronomètre le parsing, l'analyse et la sauvegarde de chaque fichier généré.
+
+    Args:
+        generated: Fichiers générés (couples chemin, compteurs) de generate_logs
+        use_db: Si False, l'étape de sauvegarde n'est pas mesurée
+
+    Returns:
+        dict: Compteurs par étape (PipelineStageStats)
+    """
+    stages = {name: PipelineStageStats(name) for name in STAGES}
+    service = LogService()
+
+    if use_db and not (service.connect_db() and service.create_tables()):
+        print("Base de données indisponible: étapes de sauvegarde ignorées")
+        use_db = False
+
+    try:
+        if use_db:
+            delete_benchmark_rows(service)
+
+        for path, _ in generated:
+            machine = os.path.basename(os.path.dirname(path))
+            filename = os.path.basename(path)
+
+            # Parsing seul: événements matérialisés pour isoler l'analyse
+            stats = {}
+            started = time.perf_counter()
+            events = list(service.iter_log_events(path, stats))
+            stages["parsing"].add(time.perf_counter() - started, stats["lines"])
+
+            started = time.perf_counter()
+            results = service.analyze_machine_performance(iter(events), filename, machine, machine)
+            stages["analyse"].add(time.perf_counter() - started, len(events))
+            del events
+
+            if not use_db or not results:
+                continue
+
+            # Première insertion puis retraitement du même fichier (réconciliation)
+            rows = count_detail_rows(results)
+            for stage in ("sauvegarde", "retraitement"):
+                started = time.perf_counter()
+                if not service.save_to_database(results, machine, filename, BENCHMARK_PREFIX + machine):
+                    raise RuntimeError(f"Échec de la sauvegarde de {filename}")
+                stages[stage].add(time.perf_counter() - started, rows)
+    finally:
+        if use_db:
+            service.conn.rollback()
+            delete_benchmark_rows(service)
+        service.close_connections()
+
+    return {name: stage for name, stage in stages.items() if stage.items}
+
+
+def compare_to_baseline(rates, baseline, tolerance):
+    """
+    Compare les débits mesurés à une référence.
+
+    Args:
+        rates: Débits mesurés {étape: unités/s}
+        baseline: Débits de référence {étape: unités/s}
+        tolerance: Baisse relative admise (0.2 = 20 % plus lent)
+
+    Returns:
+        bool: True si aucune étape n'a régressé
+    """
+    ok = True
+    for name, rate in rates.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        ratio = rate / reference
+        status = "OK"
+        if ratio < 1 - tolerance:
+            status = "RÉGRESSION"
+            ok = False
+        print(f"{status:<11} {name:<13} {rate:14,.0f}/s   référence {reference:14,.0f}/s   x{ratio:.2f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'ingestion des logs machines")
+    parser.add_argument('--machines', nargs='+', default=list(MACHINE_PROFILES),
+                        choices=list(MACHINE_PROFILES), help="Machines simulées")
+    parser.add_argument('--days', type=int, default=1, help="Jours de production par machine")
+    parser.add_argument('--rate', type=float, default=1.0, help="Événements par seconde")
+    parser.add_argument('--mix', type=parse_mix, help="Proportions des événements (voir log_generator.py)")
+    parser.add_argument('--malformed', type=float, default=0.0, help="Part des lignes mal formées")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument('--no-db', action='store_true', help="Ne pas mesurer la sauvegarde en base")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Nombre de passages (meilleur débit retenu, moins sensible au bruit)")
+    parser.add_argument('--baseline', help="Fichier JSON de référence à comparer")
+    parser.add_argument('--save-baseline', help="Enregistrer les débits mesurés comme référence")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Baisse de débit admise par rapport à la référence (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='benchmark_logs_')
+    try:
+        started = time.perf_counter()
+        generated = generate_logs(directory, args.machines, args.days, rate=args.rate,
+                                  mix=args.mix, malformed=args.malformed, seed=args.seed)
+        lines = sum(sum(counts.values()) for _, counts in generated)
+        size = sum(os.path.getsize(path) for path, _ in generated)
+        print(f"{len(generated)} fichiers générés: {lines:,} lignes, {size / 1e6:.1f} Mo "
+              f"({time.perf_counter() - started:.1f} s)\n")
+
+        # Meilleur passage de chaque étape
+        best = {}
+        for _ in range(args.repeat):
+            for name, stage in run_suite(generated, use_db=not args.no_db).items():
+                if name not in best or stage.busy < best[name].busy:
+                    best[name] = stage
+    finally:
+        shutil.rmtree(directory)
+
+    rates = {}
+    for name, stage in best.items():
+        rates[name] = stage.volume / stage.busy if stage.busy else 0
+        print(f"{name:<13} {stage.busy:8.2f} s   {stage.volume:12,} {STAGES[name]:<11} "
+              f"{rates[name]:14,.0f} {STAGES[name]}/s")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(rates, file, indent=2)
+        print(f"\nRéférence enregistrée: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print()
+        if not compare_to_baseline(rates, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks du service de traitement des logs (ftp_log_service.py).
+
+Ce script génère un fichier LOG synthétique au format des machines
+(YYYYMMDD HH:MM:SS|@EventType: Details) puis mesure le débit (lignes/seconde)
+des différentes étapes du traitement.
+
+Utilisation:
+- python benchmark_log_service.py                    # 2 millions de lignes DEM12
+- python benchmark_log_service.py --lines 5000000    # Taille personnalisée
+- python benchmark_log_service.py --compare a.LOG    # Équivalence avec l'analyse historique
+- python benchmark_log_service.py --write            # + écriture en base (INSERT vs COPY)
+"""
+
+import argparse
+import logging
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from ftp_log_service import LogService, extract_job_profile, extract_wait_duration
+from log_event_store import ColumnarEventStore
+
+# Les benchmarks ne doivent pas être ralentis par les logs du service
+logging.getLogger('ftp_log_service').setLevel(logging.WARNING)
+
+
+def generate_synthetic_log(path, lines, machine='DEM12', seed=42):
+    """
+    Génère un fichier LOG synthétique réaliste.
+
+    Args:
+        path: Chemin du fichier à créer
+        lines: Nombre de lignes à générer
+        machine: Nom de la machine (utilisé dans les détails des pièces)
+        seed: Graine du générateur aléatoire (résultats reproductibles)
+    """
+    rng = random.Random(seed)
+    timestamp = datetime(2024, 6, 3, 6, 0, 0)
+
+    with open(path, 'wb') as file:
+        for i in range(lines):
+            timestamp += timedelta(seconds=rng.choice((0, 0, 1, 2, 5)))
+            draw = rng.random()
+
+            if draw < 0.45:
+                event = f"StukUitgevoerd: {machine} piece {i}"
+            elif draw < 0.65:
+                event = f"MachineWait: Attente {rng.randint(1, 120)} sec"
+            elif draw < 0.85:
+                event = f"JobProfiel: R:REF{rng.randint(1, 500)} L:{rng.uniform(300, 6500):.2f} C:C{rng.randint(1, 30)}"
+            elif draw < 0.90:
+                event = "MachineStop"
+            elif draw < 0.95:
+                event = "MachineStart"
+            else:
+                event = "Info: message machine"
+
+            line = f"{timestamp:%Y%m%d %H:%M:%S}|@{event}\r\n"
+            file.write(line.encode('latin-1'))
+
+
+def run_benchmark(name, func, count, unit='lignes/s'):
+    """
+    Exécute une fonction, mesure sa durée et affiche le débit obtenu.
+
+    Returns:
+        float: Débit en éléments par seconde
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else float('inf')
+    print(f"{name:<45} {elapsed:8.2f} s   {rate:14,.0f} {unit}")
+    return rate
+
+
+def legacy_decode_timestamps(raw_timestamps):
+    """Décodage historique: filtre ASCII caractère par caractère + strptime."""
+    for raw in raw_timestamps:
+        timestamp_str = raw.strip()
+        timestamp_str = ''.join(c for c in timestamp_str if ord(c) < 128)
+        datetime.strptime(timestamp_str, '%Y%m%d %H:%M:%S')
+
+
+def fast_decode_timestamps(service, raw_timestamps):
+    """Décodage à largeur fixe de LogService.decode_log_timestamp."""
+    decode = service.decode_log_timestamp
+    for raw in raw_timestamps:
+        decode(raw)
+
+
+def legacy_analyze_machine_performance(data, directory):
+    """
+    Analyse historique (une passe par type d'événement), conservée comme
+    référence pour vérifier l'équivalence de l'analyseur à passe unique.
+    """
+    if not data:
+        return None
+
+    log_date = data[0]["Timestamp"].date()
+
+    stuk_events = [event for event in data if event["Event"] == "StukUitgevoerd"]
+    first_piece_time = stuk_events[0]["Timestamp"] if stuk_events else None
+    last_piece_time = stuk_events[-1]["Timestamp"] if stuk_events else None
+    total_pieces = len(stuk_events)
+
+    production_duration = None
+    if first_piece_time and last_piece_time:
+        production_duration = (last_piece_time - first_piece_time).total_seconds() / 3600
+
+    wait_events = [event for event in data if event["Event"] == "MachineWait"]
+    total_wait_time = 0
+    wait_periods = []
+    for event in wait_events:
+        wait_matches = re.findall(r"(\d+) sec", str(event["Details"]))
+        wait_duration = 0
+        if wait_matches:
+            wait_duration = float(wait_matches[0])
+        else:
+            decimal_matches = re.findall(r"(\d+\.\d+)", str(event["Details"]))
+            if decimal_matches:
+                wait_duration = float(decimal_matches[0])
+        if wait_duration > 0:
+            wait_start = event["Timestamp"]
+            wait_periods.append({
+                "Start": wait_start,
+                "End": wait_start + timedelta(seconds=wait_duration),
+                "Duration": wait_duration
+            })
+            total_wait_time += wait_duration
+    total_wait_hours = total_wait_time / 3600
+
+    stop_events = [event for event in data if event["Event"] in ["MachineStop", "MachineStart"]]
+    machine_stop_events = [event for event in data if event["Event"] == "MachineStop"]
+    last_machine_stop = machine_stop_events[-1]["Timestamp"] if machine_stop_events else None
+    machine_start_events = [event for event in data if event["Event"] == "MachineStart"]
+    first_machine_start = machine_start_events[0]["Timestamp"] if machine_start_events else None
+
+    total_stop_time = 0
+    stop_periods = []
+    for i in range(len(stop_events) - 1):
+        if stop_events[i]["Event"] == "MachineStop" and stop_events[i + 1]["Event"] == "MachineStart":
+            stop_start = stop_events[i]["Timestamp"]
+            stop_end = stop_events[i + 1]["Timestamp"]
+            stop_duration = (stop_end - stop_start).total_seconds()
+            stop_periods.append({"Start": stop_start, "End": stop_end, "Duration": stop_duration})
+            total_stop_time += stop_duration
+    total_stop_hours = total_stop_time / 3600
+
+    job_events = [event for event in data if event["Event"] == "JobProfiel"]
+    job_details = []
+    for event in job_events:
+        job = event["Details"]
+        ref_match = re.search(r"R:(\w+)", job)
+        length_match = re.search(r"L:(\d+\.\d+)", job)
+        color_match = re.search(r"C:(\w+)", job)
+        if ref_match and length_match:
+            job_details.append({
+                "Reference": ref_match.group(1),
+                "Length": float(length_match.group(1)),
+                "Color": color_match.group(1) if color_match else "N/A",
+                "Timestamp": event["Timestamp"]
+            })
+
+    piece_events = [{"Timestamp": event["Timestamp"], "Piece": event["Details"]} for event in stuk_events]
+
+    if production_duration and production_duration > 0:
+        effective_production_time = production_duration - total_wait_hours - total_stop_hours
+        occupation_rate = (effective_production_time / production_duration) * 100
+        wait_rate = (total_wait_hours / production_duration) * 100
+        stop_rate = (total_stop_hours / production_duration) * 100
+    else:
+        effective_production_time = occupation_rate = wait_rate = stop_rate = 0
+
+    return {
+        "CU_ID": directory,
+        "Date": log_date,
+        "PremierePiece": first_piece_time,
+        "DernierePiece": last_piece_time,
+        "PremierMachineStart": first_machine_start,
+        "DernierMachineStop": last_machine_stop,
+        "TotalPieces": total_pieces,
+        "DureeProduction": production_duration,
+        "TempsAttente": total_wait_hours,
+        "TempsArretVolontaire": total_stop_hours,
+        "TempsProductionEffectif": effective_production_time,
+        "TauxOccupation": occupation_rate,
+        "TauxAttente": wait_rate,
+        "TauxArretVolontaire": stop_rate,
+        "JobDetails": job_details,
+        "WaitPeriods": wait_periods,
+        "StopPeriods": stop_periods,
+        "PieceEvents": piece_events
+    }
+
+
+def legacy_extract_details(events):
+    """Extraction historique: re.search/re.findall séparés dans des try/except."""
+    for event_type, details in events:
+        if event_type == "JobProfiel":
+            try:
+                ref_match = re.search(r"R:(\w+)", details)
+                length_match = re.search(r"L:(\d+\.\d+)", details)
+                color_match = re.search(r"C:(\w+)", details)
+                if ref_match and length_match:
+                    (ref_match.group(1), float(length_match.group(1)),
+                     color_match.group(1) if color_match else "N/A")
+            except:
+                continue
+        else:
+            try:
+                wait_matches = re.findall(r"(\d+) sec", details)
+                if wait_matches:
+                    float(wait_matches[0])
+                else:
+                    decimal_matches = re.findall(r"(\d+\.\d+)", details)
+                    if decimal_matches:
+                        float(decimal_matches[0])
+            except Exception:
+                continue
+
+
+def compiled_extract_details(events):
+    """Extraction par expressions compilées (une par type d'événement)."""
+    for event_type, details in events:
+        if event_type == "JobProfiel":
+            extract_job_profile(details)
+        else:
+            extract_wait_duration(details)
+
+
+def generate_detail_fixture(count, seed=42):
+    """
+    Génère des détails JobProfiel/MachineWait, dont une part mal formée.
+
+    Returns:
+        list: Couples (type d'événement, détails)
+    """
+    rng = random.Random(seed)
+    events = []
+    for _ in range(count):
+        draw = rng.random()
+        if draw < 0.5:
+            events.append(("JobProfiel", f"R:REF{rng.randint(1, 500)} L:{rng.uniform(300, 6500):.2f} C:C{rng.randint(1, 30)}"))
+        elif draw < 0.55:
+            events.append(("JobProfiel", f"R:REF{rng.randint(1, 500)} L:inconnue"))
+        elif draw < 0.85:
+            events.append(("MachineWait", f"Attente {rng.randint(1, 120)} sec"))
+        elif draw < 0.97:
+            events.append(("MachineWait", f"{rng.uniform(0, 50):.2f}"))
+        else:
+            events.append(("MachineWait", "Attente opérateur"))
+    return events
+
+
+# Indicateurs dont le calcul a changé depuis l'analyse historique: le temps
+# effectif ne compte plus qu'une fois les chevauchements d'attentes et d'arrêts
+REDEFINED_KEYS = ("TempsProductionEffectif", "TauxOccupation")
+
+
+def interval_union_hours(periods, start, end):
+    """
+    Durée (heures) de la réunion de périodes {"Start", "End"}, limitée à
+    [start, end]: les périodes sont triées puis fusionnées quand elles se
+    chevauchent. Calcul volontairement naïf, indépendant de interval_engine.
+    """
+    clipped = sorted(
+        (max(period["Start"], start), min(period["End"], end))
+        for period in periods
+        if period["End"] > start and period["Start"] < end
+    )
+    total = 0.0
+    current_start = current_end = None
+    for period_start, period_end in clipped:
+        if current_end is None or period_start > current_end:
+            if current_end is not None:
+                total += (current_end - current_start).total_seconds()
+            current_start, current_end = period_start, period_end
+        else:
+            current_end = max(current_end, period_end)
+    if current_end is not None:
+        total += (current_end - current_start).total_seconds()
+    return total / 3600
+
+
+def expected_redefined_indicators(legacy):
+    """
+    Valeurs attendues des REDEFINED_KEYS à partir des périodes de l'analyse
+    historique: la réunion des attentes et des arrêts entre la première et la
+    dernière pièce est retirée de la durée de production.
+
+    Args:
+        legacy: Résultat de legacy_analyze_machine_performance
+
+    Returns:
+        dict: TempsProductionEffectif et TauxOccupation attendus
+    """
+    production_hours = legacy["DureeProduction"]
+    if not production_hours or production_hours <= 0:
+        return {"TempsProductionEffectif": 0, "TauxOccupation": 0}
+    unavailable_hours = interval_union_hours(
+        legacy["WaitPeriods"] + legacy["StopPeriods"],
+        legacy["PremierePiece"],
+        legacy["DernierePiece"],
+    )
+    effective_hours = production_hours - unavailable_hours
+    return {
+        "TempsProductionEffectif": effective_hours,
+        "TauxOccupation": effective_hours / production_hours * 100,
+    }
+
+
+def compare_analyses(paths, machine):
+    """
+    Vérifie que l'analyseur à passe unique et l'analyse en colonnes produisent
+    exactement les mêmes résultats que l'analyse historique sur des fichiers
+    LOG enregistrés d'une seule journée. Les REDEFINED_KEYS sont comparées à
+    la réunion des intervalles (expected_redefined_indicators).
+
+    Returns:
+        bool: True si tous les fichiers sont équivalents
+    """
+    all_equal = True
+    for path in paths:
+        service = LogService()
+        data = list(service.iter_log_events(path))
+        expected = legacy_analyze_machine_performance(data, machine)
+        candidates = {
+            'passe unique': service.analyze_machine_performance(
+                iter(data), os.path.basename(path), machine, machine),
+            'colonnes': service.analyze_event_store(
+                ColumnarEventStore.from_events(data), os.path.basename(path), machine, machine),
+        }
+
+        redefined = None
+        if expected is not None:
+            redefined = expected_redefined_indicators(expected)
+            expected = {key: value for key, value in expected.items() if key not in REDEFINED_KEYS}
+
+        for name, actual in candidates.items():
+            differences = []
+            if actual is not None:
+                if len(actual) > 1:
+                    # L'analyse historique regroupe toutes les journées en une session
+                    print(f"SKIP  {path} [{name}]: {len(actual)} journées de production")
+                    continue
+                differences = [key for key in REDEFINED_KEYS
+                               if not math.isclose(actual[0][key], redefined[key], rel_tol=1e-9, abs_tol=1e-9)]
+                # Les compteurs de rejets n'existent pas dans l'analyse historique
+                actual = {key: actual[0][key] for key in expected}
+            if expected == actual and not differences:
+                print(f"OK    {path} [{name}] ({len(data):,} événements)")
+                continue
+
+            all_equal = False
+            if expected is None or actual is None:
+                print(f"DIFF  {path} [{name}]: {expected is None=} {actual is None=}")
+                continue
+            differences += [key for key in expected if expected[key] != actual.get(key)]
+            for key in differences:
+                print(f"DIFF  {path} [{name}]: clé {key}")
+    return all_equal
+
+
+def benchmark_detail_writes(results, machine):
+    """
+    Compare l'écriture des tables de détail des sessions: un INSERT par ligne
+    contre COPY FROM STDIN. Chaque mesure est faite dans une transaction annulée
+    ensuite, la base n'est pas modifiée.
+
+    Args:
+        results: Résultats d'analyse par journée (JobDetails, WaitPeriods, StopPeriods, PieceEvents)
+        machine: Nom du centre d'usinage simulé
+    """
+    service = LogService()
+    if not service.connect_db() or not service.create_tables():
+        print("Base de données indisponible: benchmark d'écriture ignoré")
+        return
+
+    try:
+        row_count = sum(len(rows) for day_results in results
+                        for _, _, rows in service.build_detail_rows(0, day_results))
+        rates = {}
+
+        for mode, write_rows in (("insert", service.insert_rows), ("copy", service.copy_rows)):
+            service.cur.execute("""
+                INSERT INTO centre_usinage (nom, type_cu) VALUES (%s, %s) RETURNING id
+            """, (f"benchmark-{machine}", machine))
+            centre_id = service.cur.fetchone()[0]
+            detail_rows = []
+            for day_results in results:
+                service.cur.execute("""
+                    INSERT INTO session_production (centre_usinage_id, date_production)
+                    VALUES (%s, %s) RETURNING id
+                """, (centre_id, day_results["Date"]))
+                session_id = service.cur.fetchone()[0]
+                detail_rows.extend(service.build_detail_rows(session_id, day_results))
+
+            def write():
+                for table, columns, rows in detail_rows:
+                    write_rows(table, columns, rows)
+
+            label = "un INSERT par ligne (avant)" if mode == "insert" else "COPY FROM STDIN (après)"
+            rates[mode] = run_benchmark(f"Écriture: {label}", write, row_count)
+            service.conn.rollback()
+
+        print(f"{'Gain écriture':<45} x{rates['copy'] / rates['insert']:.1f}")
+    finally:
+        service.conn.rollback()
+        service.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks du parsing des logs machines")
+    parser.add_argument('--lines', type=int, default=2_000_000, help="Nombre de lignes du log synthétique")
+    parser.add_argument('--machine', default='DEM12', help="Machine simulée")
+    parser.add_argument('--extraction-events', type=int, default=1_000_000,
+                        help="Nombre d'événements JobProfiel/MachineWait pour le benchmark d'extraction")
+    parser.add_argument('--keep', action='store_true', help="Conserver le fichier généré")
+    parser.add_argument('--write', action='store_true',
+                        help="Mesurer aussi l'écriture des détails en base (PostgreSQL requis)")
+    parser.add_argument('--compare', nargs='+', metavar='LOG',
+                        help="Vérifier l'équivalence de l'analyse sur des fichiers enregistrés")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(0 if compare_analyses(args.compare, args.machine) else 1)
+
+    service = LogService()
+    fd, path = tempfile.mkstemp(suffix='.LOG')
+    os.close(fd)
+
+    try:
+        print(f"Génération de {args.lines:,} lignes {args.machine} dans {path}...")
+        generate_synthetic_log(path, args.lines, args.machine)
+
+        # Extraire les timestamps bruts pour isoler le coût du décodage
+        with open(path, 'rb') as file:
+            raw_bytes = [line.split(b'|@', 1)[0] for line in file]
+        raw_strings = [raw.decode('latin-1') for raw in raw_bytes]
+
+        print()
+        legacy = run_benchmark("Timestamps: filtre ASCII + strptime (avant)",
+                               lambda: legacy_decode_timestamps(raw_strings), len(raw_strings))
+        fast = run_benchmark("Timestamps: décodage à largeur fixe (après)",
+                             lambda: fast_decode_timestamps(LogService(), raw_bytes), len(raw_bytes))
+        print(f"{'Gain timestamps':<45} x{fast / legacy:.1f}")
+
+        print()
+        fixture = generate_detail_fixture(args.extraction_events)
+        legacy = run_benchmark("Extraction: re.search/findall séparés (avant)",
+                               lambda: legacy_extract_details(fixture), len(fixture))
+        fast = run_benchmark("Extraction: une expression compilée (après)",
+                             lambda: compiled_extract_details(fixture), len(fixture))
+        print(f"{'Gain extraction':<45} x{fast / legacy:.1f}")
+        del fixture
+
+        print()
+        with open(path, 'rb') as file:
+            content = file.read().decode('latin-1')
+        run_benchmark("Parsing complet: parse_log_content",
+                      lambda: service.parse_log_content(content, path), args.lines)
+        del content
+        run_benchmark("Parsing complet: iter_log_events (mmap)",
+                      lambda: sum(1 for _ in LogService().iter_log_events(path)), args.lines)
+
+        print()
+        data = list(service.iter_log_events(path))
+        run_benchmark("Analyse: une passe par type (avant)",
+                      lambda: legacy_analyze_machine_performance(data, args.machine), len(data))
+        run_benchmark("Analyse: passe unique (après)",
+                      lambda: service.analyze_machine_performance(data, path, args.machine, args.machine),
+                      len(data))
+        store = ColumnarEventStore.from_events(data)
+        run_benchmark("Analyse: stockage en colonnes NumPy",
+                      lambda: service.analyze_event_store(store, path, args.machine, args.machine),
+                      len(data))
+        list_bytes = sum(sys.getsizeof(event) + sys.getsizeof(event["Timestamp"])
+                         + sys.getsizeof(event["Details"]) for event in data)
+        print(f"{'Mémoire: liste de dictionnaires':<45} {list_bytes / len(data):8.0f} octets/événement")
+        print(f"{'Mémoire: stockage en colonnes':<45} {store.nbytes / len(data):8.0f} octets/événement")
+        del data, store
+        run_benchmark("Parsing + analyse en streaming",
+                      lambda: service.analyze_machine_performance(
+                          LogService().iter_log_events(path), path, args.machine, args.machine),
+                      args.lines)
+
+        if args.write:
+            print()
+            results = service.analyze_machine_performance(
+                service.iter_log_events(path), path, args.machine, args.machine)
+            benchmark_detail_writes(results, args.machine)
+    finally:
+        if args.keep:
+            print(f"\nFichier conservé: {path}")
+        else:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Test de régression des plans d'exécution de l'extraction des volets roulants
+(COMMANDES_VOLETS_QUERY de mysql_sync_service.py).
+
+Une base MySQL dédiée est créée avec les tables et les index de init.sql, puis
+remplie d'un jeu de commandes synthétique (journal, accessoires, articles,
+événements et champs libres par commande, quelques commandes de même numéro et
+extension). Sur ce jeu de données:
+- les plans EXPLAIN FORMAT=JSON de l'ancienne requête (jointures directes) et de
+  la nouvelle, complète et limitée à une liste de commandes (synchronisation
+  incrémentale), sont affichés: accès par table, index, lignes estimées, coût
+- les règles attendues sont vérifiées: pas de P_Artikel ni de A_KopfFreie, pas
+  de parcours complet de A_Vorgang, coût estimé inférieur à celui de l'ancienne
+  requête, aucun parcours complet de table ni d'index en mode incrémental
+- les résultats sont comparés à ceux de l'ancienne requête (mêmes commandes,
+  même gestion en stock; statut, date et coffre parmi les valeurs possibles)
+- les durées d'exécution des deux requêtes sont mesurées
+
+Les plans sont comparés à la référence versionnée avec le script
+(benchmark_mysql_plans.json, relevée sur le MySQL 8.0 de docker-compose.yaml):
+le script se termine en erreur si une règle n'est pas respectée, si l'accès à
+une table se dégrade ou si un coût dépasse la référence au-delà de la
+tolérance. La référence est à relever de nouveau (--save-baseline) après une
+modification voulue de la requête, des index ou de la version de MySQL.
+
+La connexion utilise MYSQL_HOST, MYSQL_PORT, MYSQL_USER et MYSQL_PASSWORD;
+l'utilisateur doit pouvoir créer la base du benchmark (supprimée à la fin).
+
+Utilisation:
+- python benchmark_mysql_query.py                                # 20 000 commandes, comparé à la référence
+- python benchmark_mysql_query.py --orders 100000 --repeat 3 --baseline ''
+- python benchmark_mysql_query.py --save-baseline                # Remplace la référence versionnée
+- python benchmark_mysql_query.py --baseline plans.json --tolerance 0.5
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from mysql_sync_service import build_commandes_query
+
+# Les benchmarks ne doivent pas être ralentis par les logs du service
+logging.getLogger('mysql_sync_service').setLevel(logging.WARNING)
+
+# Schéma MySQL (tables et index) de référence
+INIT_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'init.sql')
+
+# Plans de référence versionnés (complète et incrémentale, avec les paramètres du relevé)
+BASELINE_PLANS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_mysql_plans.json')
+
+# Requête d'extraction d'origine: jointures directes sur l'ID de la commande,
+# regroupement puis dédoublonnage côté Python
+LEGACY_QUERY = """
+SELECT
+    Cde.AuNummer as numero_commande,
+    Cde.AuAlpha as extension,
+    Cde.AufStatus as status,
+    DATE(Logb.Datum) as date_modification,
+    a.ZCode as coffre,
+    CASE WHEN Vorgang.Nummer LIKE '%VR%' THEN 1 ELSE 0 END AS gestion_en_stock
+FROM A_Kopf AS Cde
+LEFT JOIN A_KopfFreie AS cf ON Cde.ID = cf.ID_A_Kopf
+LEFT JOIN A_Logbuch AS Logb ON Cde.ID = Logb.ID_A_Kopf
+LEFT JOIN P_Zubeh AS a ON Cde.ID = a.ID_A_Kopf
+LEFT JOIN P_Artikel AS Paramgen ON Cde.ID = Paramgen.ID_A_Kopf
+LEFT JOIN A_Vorgang AS Vorgang ON Cde.ID = Vorgang.ID_A_Kopf
+WHERE
+    Logb.Notiz LIKE '%cde Planifiee%'
+    AND (Cde.AufStatus LIKE '%Planifiee%' OR Cde.AufStatus LIKE '%lancer en prod%' OR Cde.AufStatus LIKE '%vitrage%')
+    AND (a.ZCode LIKE 'SOP%' OR a.ZCode LIKE 'S P %' OR a.ZCode LIKE 'S D %' OR a.ZCode LIKE 'S Q %' OR a.ZCode LIKE 'S T %' OR a.ZCode LIKE 'S TAB %' OR a.ZCode LIKE 'S TN %')
+GROUP BY Cde.AuNummer, Cde.AuAlpha, Cde.AufStatus, Logb.Datum, a.ZCode, Vorgang.Nummer
+ORDER BY Cde.AuNummer, Cde.AuAlpha
+"""
+
+# Valeurs du jeu de données synthétique
+STATUSES = ['Planifiee', 'cde lancer en prod', 'Attente vitrage', 'Devis', 'Livree', 'Facturee']
+NOTES = ['cde Planifiee', 'Modification client', 'Appel fournisseur', 'Relance paiement', 'Changement de statut']
+ZCODES = ['SOP 45', 'S P 60', 'S D 80', 'S Q 100', 'S T 120', 'S TAB 40', 'S TN 50',
+          'POIGNEE', 'JOINT EPDM', 'PAUMELLE', 'CREMONE', 'VIS INOX']
+EXTENSIONS = ['A01', 'B02', 'C03', 'D04', None]
+
+# Types d'accès d'EXPLAIN, du plus sélectif au parcours complet
+ACCESS_TYPES = ['system', 'const', 'eq_ref', 'ref', 'fulltext', 'ref_or_null', 'index_merge',
+                'unique_subquery', 'index_subquery', 'range', 'index', 'ALL']
+
+# Alias des tables que la nouvelle requête ne doit plus lire
+UNUSED_TABLES = {'cf', 'Paramgen', 'A_KopfFreie', 'P_Artikel'}
+
+
+def connect(database=None):
+    """Connexion MySQL avec la configuration du service de synchronisation."""
+    return mysql.connector.connect(
+        host=os.getenv('MYSQL_HOST', 'mysql_db'),
+        port=int(os.getenv('MYSQL_PORT', '3306')),
+        user=os.getenv('MYSQL_USER'),
+        password=os.getenv('MYSQL_PASSWORD'),
+        database=database,
+        charset='utf8mb4',
+        collation='utf8mb4_unicode_ci'
+    )
+
+
+def read_schema(path):
+    """
+    Extrait les CREATE TABLE et CREATE INDEX d'un script SQL (sans les données,
+    l'utilisateur ni la vue).
+
+    Args:
+        path: Chemin du script (init.sql)
+
+    Returns:
+        list: Instructions SQL
+    """
+    with open(path, encoding='utf-8') as file:
+        script = file.read()
+
+    statements = []
+    for statement in script.split(';'):
+        statement = "\n".join(line for line in statement.splitlines()
+                              if not line.strip().startswith('--')).strip()
+        if re.match(r'CREATE\s+(TABLE|INDEX)\b', statement, re.IGNORECASE):
+            statements.append(statement)
+    return statements
+
+
+def generate_orders(orders, seed=42):
+    """
+    Génère un jeu de commandes synthétique: pour chaque commande, plusieurs lignes
+    de journal, d'accessoires, d'articles, d'événements et de champs libres (le
+    produit de ces lignes est la démultiplication de l'ancienne requête).
+
+    Args:
+        orders: Nombre de commandes
+        seed: Graine du générateur aléatoire
+
+    Returns:
+        dict: Lignes à insérer par table
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    rows = defaultdict(list)
+
+    for index in range(orders):
+        order_id = '%032X' % rng.getrandbits(128)
+        # Environ 5 % des commandes reprennent le numéro et l'extension de la précédente
+        if index and order_type == 1 and rng.random() < 0.05:
+            order_type, number, extension = 2, number, extension
+        else:
+            order_type, number, extension = 1, 2500000 + index, rng.choice(EXTENSIONS)
+        rows['A_Kopf'].append((order_id, order_type, number, extension, rng.choice(STATUSES),
+                               f'TECH{rng.randint(1, 20)}', round(rng.uniform(500, 20000), 2)))
+
+        for _ in range(rng.randint(1, 8)):
+            moment = start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            rows['A_Logbuch'].append((order_id, 'LOG', 'Journal', moment, moment,
+                                      'bench', rng.choice(NOTES)))
+        for number_index in range(rng.randint(0, 4)):
+            prefix = 'VR' if rng.random() < 0.3 else 'AB'
+            moment = start + timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+            rows['A_Vorgang'].append((order_id, f'{prefix}{number_index}', 'Evénement', moment, moment, 'bench'))
+        for position in range(rng.randint(0, 10)):
+            rows['P_Zubeh'].append((order_id, position, 1, 1, rng.choice(ZCODES), 'Accessoire', 1.0))
+        for position in range(rng.randint(0, 8)):
+            rows['P_Artikel'].append(('%036X' % rng.getrandbits(144), order_id, position, 'ART',
+                                      rng.randint(400, 2400), rng.randint(400, 2400), 0))
+        for field in range(rng.randint(0, 3)):
+            rows['A_KopfFreie'].append((order_id, field, 1, 'Info', 'Val', '1'))
+    return rows
+
+
+# Colonnes renseignées par table du jeu de données
+INSERT_COLUMNS = {
+    'A_Kopf': ('ID', 'AuftragsTyp', 'AuNummer', 'AuAlpha', 'AufStatus', 'Techniker', 'A_VorMwSt'),
+    'A_Logbuch': ('ID_A_Kopf', 'Code', 'Bezeichnung', 'Datum', 'Zeit', 'Benutzer', 'Notiz'),
+    'A_Vorgang': ('ID_A_Kopf', 'Nummer', 'Bezeichnung', 'Datum', 'Zeit', 'Benutzer'),
+    'P_Zubeh': ('ID_A_Kopf', 'Position', 'Kennung', 'ZNr', 'ZCode', 'Text', 'Stueck'),
+    'P_Artikel': ('ID', 'ID_A_Kopf', 'Position', 'ArtikelID', 'Dim1', 'Dim2', 'Dim3'),
+    'A_KopfFreie': ('ID_A_Kopf', 'Nummer', 'FeldTyp', 'FeldInhalt', 'Feld1', 'Feld2'),
+}
+
+
+def create_database(database, schema, rows, chunk_size=5000):
+    """
+    Crée la base du benchmark avec le schéma de init.sql et y charge le jeu de
+    données, puis met à jour les statistiques des tables.
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+    cursor.execute(f"USE `{database}`")
+    for statement in schema:
+        cursor.execute(statement)
+
+    for table, columns in INSERT_COLUMNS.items():
+        query = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))})")
+        table_rows = rows[table]
+        for start in range(0, len(table_rows), chunk_size):
+            cursor.executemany(query, table_rows[start:start + chunk_size])
+        conn.commit()
+
+    cursor.execute(f"ANALYZE TABLE {', '.join(INSERT_COLUMNS)}")
+    cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+
+def drop_database(database):
+    """Supprime la base du benchmark."""
+    conn = connect()
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE IF EXISTS `{database}`")
+    cursor.close()
+    conn.close()
+
+
+def plan_tables(node, tables=None):
+    """
+    Parcourt un plan EXPLAIN FORMAT=JSON et relève l'accès à chaque table
+    (tables dérivées et sous-requêtes comprises). table_name est l'alias de la
+    table dans la requête, y compris pour une table dérivée, reconnue à son
+    materialized_from_subquery.
+
+    Returns:
+        list: Dictionnaires {table, acces, index, lignes, derivee}
+    """
+    if tables is None:
+        tables = []
+    if isinstance(node, dict):
+        if 'table_name' in node and 'access_type' in node:
+            tables.append({
+                "table": node['table_name'],
+                "acces": node['access_type'],
+                "index": node.get('key'),
+                "lignes": node.get('rows_examined_per_scan'),
+                "derivee": 'materialized_from_subquery' in node,
+            })
+        for value in node.values():
+            plan_tables(value, tables)
+    elif isinstance(node, list):
+        for value in node:
+            plan_tables(value, tables)
+    return tables
+
+
+def plan_cost(node):
+    """
+    Coût estimé d'un plan EXPLAIN FORMAT=JSON: somme des query_cost de tous ses
+    blocs (le coût du bloc principal ne comprend pas la matérialisation des
+    tables dérivées, qui ont leur propre bloc).
+    """
+    cost = 0.0
+    if isinstance(node, dict):
+        if isinstance(node.get('query_block'), dict):
+            cost += float(node['query_block'].get('cost_info', {}).get('query_cost', 0))
+        for value in node.values():
+            cost += plan_cost(value)
+    elif isinstance(node, list):
+        for value in node:
+            cost += plan_cost(value)
+    return cost
+
+
+def explain(cursor, query, params=None):
+    """
+    Plan d'exécution d'une requête.
+
+    Returns:
+        dict: {"cout": coût estimé, "tables": accès par table}
+    """
+    cursor.execute("EXPLAIN FORMAT=JSON " + query, params)
+    plan = json.loads(cursor.fetchone()[0])
+    return {
+        "cout": plan_cost(plan),
+        "tables": plan_tables(plan),
+    }
+
+
+def timed_fetch(cursor, query, params=None, repeat=1):
+    """Exécute une requête repeat fois; retourne (lignes, meilleure durée en secondes)."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def compare_results(legacy_rows, rows):
+    """
+    Compare les commandes extraites aux lignes de l'ancienne requête. L'ancienne
+    requête retenait un statut, une date et un coffre quelconques parmi ses lignes
+    regroupées: la nouvelle doit en retenir un parmi ceux-là.
+
+    Returns:
+        list: Écarts constatés (vide si les résultats concordent)
+    """
+    expected = defaultdict(lambda: {"status": set(), "date_modification": set(), "coffre": set(),
+                                    "gestion_en_stock": 0})
+    for row in legacy_rows:
+        values = expected[(str(row['numero_commande']), row['extension'])]
+        for column in ("status", "date_modification", "coffre"):
+            values[column].add(row[column])
+        values["gestion_en_stock"] = max(values["gestion_en_stock"], int(row['gestion_en_stock']))
+
+    errors = []
+    keys = [(str(row['numero_commande']), row['extension']) for row in rows]
+    if len(keys) != len(set(keys)):
+        errors.append("plusieurs lignes pour une même commande")
+    missing = set(expected) - set(keys)
+    extra = set(keys) - set(expected)
+    if missing or extra:
+        errors.append(f"{len(missing)} commandes manquantes, {len(extra)} en trop")
+
+    for key, row in zip(keys, rows):
+        if key not in expected:
+            continue
+        values = expected[key]
+        if int(row['gestion_en_stock']) != values["gestion_en_stock"]:
+            errors.append(f"{key}: gestion_en_stock {row['gestion_en_stock']} au lieu de {values['gestion_en_stock']}")
+        for column in ("status", "date_modification", "coffre"):
+            if row[column] not in values[column]:
+                errors.append(f"{key}: {column} {row[column]!r} absent de l'ancienne requête")
+    return errors
+
+
+def check_plans(plans):
+    """
+    Vérifie les règles attendues des plans de la nouvelle requête.
+
+    Args:
+        plans: Plans par requête {"ancienne", "complete", "incrementale"}
+
+    Returns:
+        bool: True si toutes les règles sont respectées
+    """
+    checks = [
+        ("sans P_Artikel ni A_KopfFreie",
+         not any(table["table"] in UNUSED_TABLES
+                 for name in ("complete", "incrementale") for table in plans[name]["tables"])),
+        ("A_Vorgang lu par index",
+         all(table["acces"] != 'ALL' for table in plans["complete"]["tables"] if table["table"] == 'Vorgang')),
+        ("coût inférieur à l'ancienne requête",
+         plans["complete"]["cout"] <= plans["ancienne"]["cout"]),
+        # Les tables dérivées sont les résultats matérialisés (et déjà filtrés) des sous-requêtes
+        ("incrémental sans parcours complet",
+         all(table["acces"] not in ('ALL', 'index') for table in plans["incrementale"]["tables"]
+             if not table["derivee"])),
+    ]
+    for label, passed in checks:
+        print(f"{'OK' if passed else 'RÉGRESSION':<11} {label}")
+    return all(passed for _, passed in checks)
+
+
+def compare_to_baseline(plans, baseline, tolerance):
+    """
+    Compare les plans de la nouvelle requête à une référence.
+
+    Args:
+        plans: Plans mesurés {requête: {"cout", "tables"}}
+        baseline: Plans de référence (même format)
+        tolerance: Hausse relative du coût admise (0.5 = 50 % plus cher)
+
+    Returns:
+        bool: True si aucun accès ne s'est dégradé et aucun coût n'a trop augmenté
+    """
+    ok = True
+    for name in ("complete", "incrementale"):
+        plan, reference = plans[name], baseline.get(name)
+        if not reference:
+            continue
+        ratio = plan["cout"] / reference["cout"] if reference["cout"] else 1
+        status = "OK"
+        if ratio > 1 + tolerance:
+            status = "RÉGRESSION"
+            ok = False
+        print(f"{status:<11} {name:<13} coût {plan['cout']:14,.1f}   référence {reference['cout']:14,.1f}   x{ratio:.2f}")
+
+        accesses = {table["table"]: table["acces"] for table in plan["tables"]}
+        for table in reference["tables"]:
+            access = accesses.get(table["table"])
+            if access and ACCESS_TYPES.index(access) > ACCESS_TYPES.index(table["acces"]):
+                ok = False
+                print(f"RÉGRESSION  {name:<13} {table['table']}: {access} au lieu de {table['acces']}")
+    return ok
+
+
+def print_plan(name, plan):
+    """Affiche l'accès à chaque table d'un plan."""
+    print(f"{name} (coût estimé {plan['cout']:,.1f})")
+    for table in plan["tables"]:
+        print(f"    {table['table']:<16} {table['acces']:<8} {str(table['index']):<28} "
+              f"{table['lignes'] or 0:>10,} lignes{'   (dérivée)' if table['derivee'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plans d'exécution de l'extraction des volets roulants")
+    parser.add_argument('--orders', type=int, default=20000, help="Commandes générées")
+    parser.add_argument('--incremental-orders', type=int, default=100,
+                        help="Commandes de la requête limitée (synchronisation incrémentale)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire")
+    parser.add_argument('--database', default='benchmark_volets', help="Base MySQL du benchmark")
+    parser.add_argument('--schema', default=INIT_SQL, help="Script des tables et index (init.sql)")
+    parser.add_argument('--keep', action='store_true', help="Conserver la base du benchmark")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Nombre d'exécutions (meilleure durée retenue)")
+    parser.add_argument('--baseline', default=BASELINE_PLANS,
+                        help="Fichier JSON de référence à comparer ('' pour ne pas comparer)")
+    parser.add_argument('--save-baseline', nargs='?', const=BASELINE_PLANS,
+                        help="Enregistrer les plans mesurés comme référence (par défaut, la référence versionnée)")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Hausse de coût admise par rapport à la référence (0.5 = 50 %%)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = generate_orders(args.orders, seed=args.seed)
+    create_database(args.database, read_schema(args.schema), rows)
+    print(", ".join(f"{table}: {len(table_rows):,}" for table, table_rows in rows.items())
+          + f" lignes chargées ({time.perf_counter() - started:.1f} s)\n")
+
+    rng = random.Random(args.seed)
+    sample = [row[0] for row in rng.sample(rows['A_Kopf'], min(args.incremental_orders, len(rows['A_Kopf'])))]
+    queries = {
+        "ancienne": (LEGACY_QUERY, None),
+        "complete": (build_commandes_query(), None),
+        "incrementale": (build_commandes_query(len(sample)), sample * 3),
+    }
+
+    try:
+        conn = connect(args.database)
+        parameters = {"mysql": conn.get_server_info(), "commandes": args.orders,
+                      "commandes_incrementales": len(sample)}
+        cursor = conn.cursor()
+        plans = {name: explain(cursor, query, params) for name, (query, params) in queries.items()}
+        cursor.close()
+
+        cursor = conn.cursor(dictionary=True)
+        results = {}
+        for name, (query, params) in queries.items():
+            results[name], elapsed = timed_fetch(cursor, query, params, repeat=args.repeat)
+            print(f"{name:<13} {elapsed:8.2f} s   {len(results[name]):10,} lignes")
+        cursor.close()
+        conn.close()
+    finally:
+        if not args.keep:
+            drop_database(args.database)
+
+    print()
+    for name, plan in plans.items():
+        print_plan(name, plan)
+    print()
+
+    ok = check_plans(plans)
+    errors = compare_results(results["ancienne"], results["complete"])
+    print(f"{'OK' if not errors else 'RÉGRESSION':<11} résultats identiques à l'ancienne requête")
+    for error in errors[:20]:
+        print(f"    {error}")
+    ok = ok and not errors
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({"parametres": parameters, **{name: plans[name] for name in ("complete", "incrementale")}},
+                      file, indent=2)
+            file.write("\n")
+        print(f"\nRéférence enregistrée: {args.save_baseline}")
+    elif args.baseline and args.baseline == BASELINE_PLANS and not os.path.exists(args.baseline):
+        print(f"\nRéférence absente ({args.baseline}): à relever avec --save-baseline")
+    elif args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        print()
+        reference_parameters = baseline.get("parametres", {})
+        if reference_parameters and reference_parameters != parameters:
+            # Coûts et lignes estimées dépendent du volume et de la version de MySQL
+            print(f"ATTENTION   référence relevée avec {reference_parameters}, passage avec {parameters}")
+        ok = compare_to_baseline(plans, baseline, args.tolerance) and ok
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
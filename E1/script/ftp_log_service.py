@@ -8,7 +8,7 @@ Ce service fait les choses suivantes:
 2. Lit les fichiers LOG depuis le dossier logs partagé (SFTP accessible)
 3. Analyse le contenu des fichiers LOG
 4. Sauvegarde les données dans PostgreSQL
-5. Supprime les fichiers traités du dossier (optionnel)
+5. Supprime ou archive (compressés, par mois) les fichiers traités (optionnel)
 
 Structure de dossiers attendue:
 /app/logs/
@@ -17,19 +17,64 @@ Structure de dossiers attendue:
 └── SU12/      # Machines SU12
 
 Utilisation:
-- python ftp_log_service.py        # Traitement normal
-- python ftp_log_service.py init   # Initialisation structure seulement
+- python ftp_log_service.py          # Traitement normal (fichiers nouveaux ou modifiés)
+- python ftp_log_service.py --force  # Retraitement de tous les fichiers
+- python ftp_log_service.py init     # Initialisation structure seulement
+- python ftp_log_service.py daemon   # Ingestion continue (surveillance des dossiers)
+- python ftp_log_service.py reprocess-archives [YYYY-MM]  # Retraitement des archives
+- python ftp_log_service.py recompute [début [fin]] [--machines DEM12,SU12]  # Recalcul SQL des indicateurs
+- python ftp_log_service.py dry-run <fichiers ou dossiers> [--workers N]  # Lecture et analyse seules (rapport JSON)
 """
 
 import os
 import re
 import glob
-from datetime import datetime, timedelta
+import gzip
+import hashlib
+import io
+import json
+import mmap
+import shutil
+from array import array
+from datetime import date, datetime, timedelta
 import psycopg2
-from decimal import Decimal
+from psycopg2.extras import Json, execute_batch
+from decimal import Decimal, ROUND_HALF_UP
 import logging
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+from ingestion_metrics import IngestionMetrics
+from interval_engine import IntervalSet
+from log_event_store import (
+    ColumnarEventStore, EVENT_JOB, EVENT_PIECE, EVENT_START, EVENT_STOP, EVENT_WAIT,
+    to_epoch_seconds
+)
+
+# inotify est optionnel: sans lui, le mode démon surveille les dossiers par scrutation
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# resource n'existe que sous Unix: sans lui, le mode dry-run ne mesure pas la mémoire
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# zstandard est optionnel: sans lui, seuls les fichiers .LOG et .LOG.gz sont lus
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Charger les variables d'environnement
 load_dotenv()
 
@@ -50,6 +95,848 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _format_datetime(value):
+    """Convertit un datetime (ou None) en texte ISO pour la sauvegarde JSON."""
+    return value.isoformat() if value else None
+
+
+def _parse_datetime(value):
+    """Convertit un texte ISO (ou None) en datetime."""
+    return datetime.fromisoformat(value) if value else None
+
+
+# Colonnes des tables de détail modifiables sur place lors d'une réconciliation;
+# les autres colonnes (hors session_id) forment la clé naturelle de la ligne
+DETAIL_UPDATABLE_COLUMNS = {
+    "piece_production": ("details",),
+}
+
+# Tables de détail partitionnées par mois: table -> colonne de partitionnement
+PARTITIONED_TABLES = {
+    "periode_attente": "timestamp_debut",
+    "periode_arret": "timestamp_debut",
+    "piece_production": "timestamp_production",
+}
+
+# Colonne de temps de chaque table de détail: une session (journée) pouvant être
+# alimentée par plusieurs fichiers, chaque fichier ne réconcilie que ses lignes
+DETAIL_TIME_COLUMNS = {"job_profil": "timestamp_debut", **PARTITIONED_TABLES}
+
+# Espaces des verrous consultatifs PostgreSQL (première clé de pg_try_advisory_lock(int, int),
+# la seconde étant hashtext du nom du dossier ou du chemin du fichier)
+LOCK_NAMESPACE_DIRECTORY = 0x4C4F4744  # 'LOGD'
+LOCK_NAMESPACE_FILE = 0x4C4F4746       # 'LOGF'
+
+# Nombre de mois à venir dont les partitions sont créées à l'avance
+PARTITION_MONTHS_AHEAD = 2
+
+# Fichiers LOG pris en charge: bruts ou compressés (gzip, zstd)
+LOG_EXTENSIONS = ('.LOG', '.LOG.gz', '.LOG.zst')
+COMPRESSED_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Sous-dossier de chaque dossier machine où sont archivés les fichiers traités
+# (un sous-dossier par mois: archives/YYYY-MM/<fichier>.LOG.gz)
+ARCHIVE_DIRECTORY = 'archives'
+
+
+def is_log_file(filename):
+    """Indique si un nom de fichier est celui d'un fichier LOG (brut ou compressé)."""
+    return filename.endswith(LOG_EXTENSIONS)
+
+
+def is_compressed_log(filename):
+    """Indique si un fichier LOG est compressé (pas de lecture incrémentale possible)."""
+    return filename.endswith(tuple(COMPRESSED_EXTENSIONS.values()))
+
+
+def open_log_stream(file, filename):
+    """
+    Flux binaire décompressé d'un fichier LOG ouvert en 'rb' (ou d'un BytesIO).
+    
+    Le flux ne ferme pas le fichier sous-jacent; un fichier non compressé est
+    retourné tel quel.
+    
+    Args:
+        file: Fichier binaire source
+        filename: Nom du fichier (l'extension détermine la décompression)
+        
+    Returns:
+        Flux binaire disposant de readline()
+        
+    Raises:
+        RuntimeError: Si le fichier est en zstd et que zstandard n'est pas installé
+    """
+    if filename.endswith('.gz'):
+        return gzip.GzipFile(fileobj=file, mode='rb')
+    if filename.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("module zstandard non installé, lecture des fichiers .zst impossible")
+        reader = zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True, closefd=False)
+        # Le lecteur zstd ne fournit pas readline(): le tampon s'en charge
+        return io.BufferedReader(reader)
+    return file
+
+
+def prefetch_log_file(file_path, offset=0):
+    """
+    Demande au noyau de charger un fichier LOG en cache (posix_fadvise
+    WILLNEED, lecture anticipée asynchrone) sans en garder le contenu: la
+    lecture qui suit, par un autre processus, trouve les pages en mémoire.
+    
+    Args:
+        file_path: Chemin complet du fichier
+        offset: Position à partir de laquelle le fichier sera lu
+        
+    Returns:
+        int: Nombre d'octets à précharger (0 si posix_fadvise est indisponible)
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return 0
+    # Un fichier compressé est toujours relu depuis le début
+    if is_compressed_log(file_path):
+        offset = 0
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size > offset:
+            os.posix_fadvise(fd, offset, size - offset, os.POSIX_FADV_WILLNEED)
+        return max(size - offset, 0)
+    finally:
+        os.close(fd)
+
+
+def month_start(value):
+    """Premier jour du mois d'une date ou d'un datetime."""
+    return date(value.year, value.month, 1)
+
+
+def upcoming_months(count=PARTITION_MONTHS_AHEAD):
+    """Premiers jours du mois courant et des count mois suivants."""
+    months = [month_start(date.today())]
+    for _ in range(count):
+        months.append(month_start(months[-1] + timedelta(days=32)))
+    return months
+
+
+def count_detail_rows(results):
+    """Nombre de lignes de détail (jobs, périodes, pièces) des résultats d'analyse, toutes journées confondues."""
+    return sum(len(day_results["JobDetails"]) + len(day_results["WaitPeriods"])
+               + len(day_results["StopPeriods"]) + len(day_results["PieceEvents"])
+               for day_results in results)
+
+
+def count_event_types(events, counts):
+    """
+    Relaie un flux d'événements en comptant les événements par type.
+    
+    Args:
+        events: Itérable d'événements parsés
+        counts: Counter mis à jour (type d'événement -> nombre)
+        
+    Yields:
+        dict: Événements inchangés
+    """
+    for event in events:
+        counts[event["Event"]] += 1
+        yield event
+
+
+def peak_rss_mb(who=None):
+    """
+    Pic de mémoire résidente (Mo) du processus, ou de ses processus enfants
+    terminés avec who=resource.RUSAGE_CHILDREN; None si non mesurable.
+    """
+    if resource is None:
+        return None
+    if who is None:
+        who = resource.RUSAGE_SELF
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+    return round(resource.getrusage(who).ru_maxrss / divisor, 1)
+
+
+# Caractères à échapper dans le format texte de COPY
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value):
+    """Convertit une valeur Python en champ du format texte de COPY (None = NULL)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    return str(value)
+
+
+# === EXTRACTION DES DÉTAILS ===
+# Une seule expression compilée par type d'événement. Les lookaheads reproduisent
+# exactement les recherches indépendantes historiques (première occurrence de
+# chaque champ, dans n'importe quel ordre) en un seul appel.
+
+# JobProfiel: "R:<référence> L:<longueur> C:<couleur>" (couleur optionnelle)
+JOB_PROFILE_PATTERN = re.compile(
+    r"(?=.*?R:(?P<reference>\w+))"
+    r"(?=.*?L:(?P<length>\d+\.\d+))"
+    r"(?:(?=.*?C:(?P<color>\w+)))?",
+    re.DOTALL
+)
+
+# MachineWait: durée "X sec" en priorité, sinon premier nombre décimal "X.X"
+WAIT_DURATION_PATTERN = re.compile(
+    r"(?:(?=.*?(?P<seconds>\d+) sec)|(?=.*?(?P<decimal>\d+\.\d+)))",
+    re.DOTALL
+)
+
+
+def extract_job_profile(details):
+    """
+    Extrait les champs d'un événement JobProfiel.
+    
+    Args:
+        details: Détails de l'événement
+        
+    Returns:
+        tuple: (référence, longueur, couleur) ou None si la référence ou la longueur manque
+    """
+    match = JOB_PROFILE_PATTERN.match(details)
+    if match is None:
+        return None
+    reference, length, color = match.group('reference', 'length', 'color')
+    return reference, float(length), color or "N/A"
+
+
+def extract_wait_duration(details):
+    """
+    Extrait la durée (en secondes) d'un événement MachineWait.
+    
+    Args:
+        details: Détails de l'événement
+        
+    Returns:
+        float: Durée en secondes ou None si aucune durée n'est trouvée
+    """
+    match = WAIT_DURATION_PATTERN.match(details)
+    if match is None:
+        return None
+    seconds, decimal = match.group('seconds', 'decimal')
+    return float(seconds or decimal)
+
+
+class MachinePerformanceAnalyzer:
+    """
+    Analyseur à passe unique des événements d'une machine.
+    
+    Chaque événement est aiguillé vers un accumulateur selon son type: la liste
+    des événements n'est parcourue qu'une seule fois, ce qui permet d'analyser
+    directement le flux produit par le parser en streaming.
+    """
+    
+    def __init__(self, log_date=None):
+        """
+        Initialise les accumulateurs de l'analyse.
+        
+        Args:
+            log_date: Journée de production de la session (par défaut, la date
+                      du premier événement)
+        """
+        self.event_count = 0
+        self.log_date = log_date
+        self.first_event_time = None
+        self.last_event_time = None
+        
+        # Pièces produites
+        self.first_piece_time = None
+        self.last_piece_time = None
+        self.total_pieces = 0
+        self.piece_events = []
+        
+        # Attentes
+        self.total_wait_time = 0  # en secondes
+        self.wait_periods = []
+        
+        # Arrêts volontaires (machine à états MachineStop -> MachineStart)
+        self.previous_stop_event = None
+        self.first_machine_start = None
+        self.last_machine_stop = None
+        self.total_stop_time = 0  # en secondes
+        self.stop_periods = []
+        
+        # Intervalles d'attente et d'arrêt (secondes depuis l'epoch), pour calculer
+        # le temps d'indisponibilité sans compter deux fois leurs chevauchements
+        self.wait_starts = array('d')
+        self.wait_ends = array('d')
+        self.stop_starts = array('d')
+        self.stop_ends = array('d')
+        
+        # Reprise d'une analyse: indisponibilité déjà comptée dans la fenêtre de
+        # production (secondes) et intervalles qui peuvent encore la prolonger
+        self.busy_seconds = 0.0
+        self.carried_busy = IntervalSet()
+        
+        # Profils de jobs
+        self.job_details = []
+        
+        # Événements dont les détails n'ont pas pu être extraits
+        self.rejected = {"MachineWait": 0, "JobProfiel": 0}
+        
+        # True si l'analyse reprend un état sauvegardé (ingestion incrémentale)
+        self.resumed = False
+        
+        # Aiguillage des événements vers leur accumulateur
+        self.handlers = {
+            "StukUitgevoerd": self.on_piece,
+            "MachineWait": self.on_wait,
+            "MachineStop": self.on_machine_stop,
+            "MachineStart": self.on_machine_start,
+            "JobProfiel": self.on_job_profile,
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """
+        Recrée un analyseur à partir d'un état sauvegardé par get_state().
+        
+        Seuls les agrégats sont restaurés: les listes de détails (pièces, jobs,
+        périodes) ne contiendront que les nouveaux événements.
+        
+        Args:
+            state: Dictionnaire JSON produit par get_state()
+            
+        Returns:
+            MachinePerformanceAnalyzer: Analyseur prêt à consommer la suite du fichier
+        """
+        analyzer = cls()
+        analyzer.resumed = True
+        analyzer.event_count = state["event_count"]
+        analyzer.log_date = date.fromisoformat(state["log_date"]) if state["log_date"] else None
+        analyzer.first_event_time = _parse_datetime(state.get("first_event_time"))
+        analyzer.last_event_time = _parse_datetime(state["last_event_time"])
+        analyzer.first_piece_time = _parse_datetime(state["first_piece_time"])
+        analyzer.last_piece_time = _parse_datetime(state["last_piece_time"])
+        analyzer.total_pieces = state["total_pieces"]
+        analyzer.total_wait_time = state["total_wait_time"]
+        analyzer.first_machine_start = _parse_datetime(state["first_machine_start"])
+        analyzer.last_machine_stop = _parse_datetime(state["last_machine_stop"])
+        analyzer.total_stop_time = state["total_stop_time"]
+        analyzer.rejected = dict(state["rejected"])
+        
+        # États antérieurs au calcul par union d'intervalles: somme des durées
+        analyzer.busy_seconds = state.get("busy_seconds", state["total_wait_time"] + state["total_stop_time"])
+        analyzer.carried_busy = IntervalSet.from_pairs(state.get("busy_intervals", []))
+        
+        # Dernier MachineStop/MachineStart vu: une période d'arrêt peut être à cheval
+        if state["previous_stop_event"]:
+            analyzer.previous_stop_event = {
+                "Event": state["previous_stop_event"]["Event"],
+                "Timestamp": _parse_datetime(state["previous_stop_event"]["Timestamp"]),
+            }
+        return analyzer
+    
+    def get_state(self):
+        """
+        Sauvegarde les agrégats de l'analyse sous une forme sérialisable en JSON.
+        
+        Returns:
+            dict: État permettant de reprendre l'analyse avec from_state()
+        """
+        previous_stop_event = None
+        if self.previous_stop_event is not None:
+            previous_stop_event = {
+                "Event": self.previous_stop_event["Event"],
+                "Timestamp": _format_datetime(self.previous_stop_event["Timestamp"]),
+            }
+        
+        busy_seconds, carried_busy = self.settle_busy_intervals()
+        
+        return {
+            "event_count": self.event_count,
+            "log_date": self.log_date.isoformat() if self.log_date else None,
+            "first_event_time": _format_datetime(self.first_event_time),
+            "last_event_time": _format_datetime(self.last_event_time),
+            "first_piece_time": _format_datetime(self.first_piece_time),
+            "last_piece_time": _format_datetime(self.last_piece_time),
+            "total_pieces": self.total_pieces,
+            "total_wait_time": self.total_wait_time,
+            "first_machine_start": _format_datetime(self.first_machine_start),
+            "last_machine_stop": _format_datetime(self.last_machine_stop),
+            "total_stop_time": self.total_stop_time,
+            "previous_stop_event": previous_stop_event,
+            "rejected": dict(self.rejected),
+            "busy_seconds": busy_seconds,
+            "busy_intervals": carried_busy.to_pairs(),
+        }
+    
+    def busy_intervals(self):
+        """
+        Réunion des attentes et des arrêts (et des intervalles reportés d'une
+        analyse précédente).
+        
+        Returns:
+            IntervalSet: Intervalles pendant lesquels la machine ne produit pas
+        """
+        return self.carried_busy.union(
+            IntervalSet(self.wait_starts, self.wait_ends),
+            IntervalSet(self.stop_starts, self.stop_ends),
+        )
+    
+    def settle_busy_intervals(self):
+        """
+        Résume les intervalles d'indisponibilité pour la reprise de l'analyse.
+        
+        Les événements arrivant dans l'ordre chronologique, les prochains
+        intervalles commenceront après le dernier événement (ou après le
+        MachineStop encore ouvert). La part des intervalles antérieure à cette
+        limite et à la dernière pièce est donc définitivement comprise dans la
+        fenêtre de production: seule sa durée est conservée, le reste des
+        intervalles est reporté tel quel.
+        
+        Returns:
+            tuple: (secondes d'indisponibilité acquises, IntervalSet reporté)
+        """
+        busy = self.busy_intervals()
+        if self.last_event_time is None:
+            return self.busy_seconds, busy
+        
+        settled = to_epoch_seconds(self.last_event_time)
+        if self.previous_stop_event is not None and self.previous_stop_event["Event"] == "MachineStop":
+            settled = min(settled, to_epoch_seconds(self.previous_stop_event["Timestamp"]))
+        
+        busy_seconds = self.busy_seconds
+        if self.first_piece_time is not None:
+            settled = min(settled, to_epoch_seconds(self.last_piece_time))
+            busy_seconds += busy.clip(self.first_piece_time, settled).duration()
+        
+        return busy_seconds, busy.clip(settled, None)
+    
+    def add_event(self, event):
+        """
+        Consomme un événement parsé.
+        
+        Args:
+            event: Dictionnaire {"Timestamp", "Event", "Details"}
+        """
+        if self.log_date is None:
+            # La date de la session est celle du premier événement
+            self.log_date = event["Timestamp"].date()
+        if self.first_event_time is None:
+            self.first_event_time = event["Timestamp"]
+        self.event_count += 1
+        self.last_event_time = event["Timestamp"]
+        
+        handler = self.handlers.get(event["Event"])
+        if handler is not None:
+            handler(event)
+    
+    def on_piece(self, event):
+        """Pièce terminée (StukUitgevoerd)."""
+        if self.first_piece_time is None:
+            self.first_piece_time = event["Timestamp"]
+        self.last_piece_time = event["Timestamp"]
+        self.total_pieces += 1
+        self.piece_events.append({
+            "Timestamp": event["Timestamp"],
+            "Piece": event["Details"]
+        })
+    
+    def on_wait(self, event):
+        """Période d'attente (MachineWait)."""
+        wait_duration = extract_wait_duration(str(event["Details"]))
+        
+        if wait_duration is None:
+            self.rejected["MachineWait"] += 1
+            return
+        
+        if wait_duration > 0:
+            wait_start = event["Timestamp"]
+            wait_end = wait_start + timedelta(seconds=wait_duration)
+            self.wait_periods.append({
+                "Start": wait_start,
+                "End": wait_end,
+                "Duration": wait_duration
+            })
+            self.total_wait_time += wait_duration
+            
+            start_seconds = to_epoch_seconds(wait_start)
+            self.wait_starts.append(start_seconds)
+            self.wait_ends.append(start_seconds + wait_duration)
+    
+    def on_machine_stop(self, event):
+        """Arrêt de la machine: ouvre une période d'arrêt potentielle."""
+        self.last_machine_stop = event["Timestamp"]
+        self.previous_stop_event = event
+    
+    def on_machine_start(self, event):
+        """Démarrage de la machine: ferme la période d'arrêt ouverte s'il y en a une."""
+        if self.first_machine_start is None:
+            self.first_machine_start = event["Timestamp"]
+        
+        # Une période d'arrêt est un MachineStop immédiatement suivi d'un MachineStart
+        if self.previous_stop_event is not None and self.previous_stop_event["Event"] == "MachineStop":
+            self.add_stop_period(self.previous_stop_event["Timestamp"], event["Timestamp"])
+        
+        self.previous_stop_event = event
+    
+    def add_stop_period(self, stop_start, stop_end):
+        """Enregistre une période d'arrêt."""
+        stop_duration = (stop_end - stop_start).total_seconds()
+        
+        self.stop_periods.append({
+            "Start": stop_start,
+            "End": stop_end,
+            "Duration": stop_duration
+        })
+        self.total_stop_time += stop_duration
+        self.stop_starts.append(to_epoch_seconds(stop_start))
+        self.stop_ends.append(to_epoch_seconds(stop_end))
+    
+    def close_day(self, day_end):
+        """
+        Termine la journée de production: un arrêt encore ouvert est compté
+        jusqu'à la fin de la journée.
+        
+        Args:
+            day_end: Début de la journée de production suivante
+            
+        Returns:
+            bool: True si un arrêt était en cours (il se poursuit le jour suivant)
+        """
+        if self.previous_stop_event is None or self.previous_stop_event["Event"] != "MachineStop":
+            return False
+        if self.previous_stop_event["Timestamp"] < day_end:
+            self.add_stop_period(self.previous_stop_event["Timestamp"], day_end)
+        return True
+    
+    def on_job_profile(self, event):
+        """Profil de job (JobProfiel)."""
+        job = extract_job_profile(str(event["Details"]))
+        
+        if job is None:
+            self.rejected["JobProfiel"] += 1
+            return
+        
+        reference, length, color = job
+        self.job_details.append({
+            "Reference": reference,
+            "Length": length,
+            "Color": color,
+            "Timestamp": event["Timestamp"]
+        })
+    
+    def build_results(self, cu_id):
+        """
+        Calcule les indicateurs finaux à partir des accumulateurs.
+        
+        Args:
+            cu_id: Identifiant du centre d'usinage (nom du dossier)
+            
+        Returns:
+            dict: Dictionnaire contenant toutes les métriques calculées
+        """
+        total_pieces = self.total_pieces
+        
+        # Calculer la durée totale de production
+        production_duration = None
+        if self.first_piece_time and self.last_piece_time:
+            production_duration = (self.last_piece_time - self.first_piece_time).total_seconds() / 3600  # en heures
+        
+        total_wait_hours = self.total_wait_time / 3600  # convertir en heures
+        total_stop_hours = self.total_stop_time / 3600  # convertir en heures
+        
+        # === CALCUL DES INDICATEURS DE PERFORMANCE ===
+        if production_duration and production_duration > 0:
+            # Temps de production effectif = temps total - réunion des attentes et des
+            # arrêts comprise entre la première et la dernière pièce (les chevauchements
+            # ne sont comptés qu'une fois)
+            busy = self.busy_intervals().clip(self.first_piece_time, self.last_piece_time)
+            unavailable_hours = (self.busy_seconds + busy.duration()) / 3600
+            effective_production_time = production_duration - unavailable_hours
+            total_available_time = production_duration
+            
+            # Calculer les pourcentages
+            occupation_rate = (effective_production_time / total_available_time) * 100
+            wait_rate = (total_wait_hours / total_available_time) * 100
+            stop_rate = (total_stop_hours / total_available_time) * 100
+        else:
+            effective_production_time = 0
+            occupation_rate = 0
+            wait_rate = 0
+            stop_rate = 0
+        
+        return {
+            "CU_ID": cu_id,
+            "Date": self.log_date,
+            # Plage couverte par le fichier dans cette journée (autres fichiers possibles)
+            "PremierEvenement": self.first_event_time,
+            "DernierEvenement": self.last_event_time,
+            "PremierePiece": self.first_piece_time,
+            "DernierePiece": self.last_piece_time,
+            "PremierMachineStart": self.first_machine_start,
+            "DernierMachineStop": self.last_machine_stop,
+            "TotalPieces": total_pieces,
+            "DureeProduction": production_duration,
+            "TempsAttente": total_wait_hours,
+            "TempsArretVolontaire": total_stop_hours,
+            "TempsProductionEffectif": effective_production_time,
+            "TauxOccupation": occupation_rate,
+            "TauxAttente": wait_rate,
+            "TauxArretVolontaire": stop_rate,
+            "JobDetails": self.job_details,
+            "WaitPeriods": self.wait_periods,
+            "StopPeriods": self.stop_periods,
+            "PieceEvents": self.piece_events,
+            "Rejets": dict(self.rejected),
+            # Ingestion incrémentale: les détails ne contiennent que les nouveaux événements
+            "Incremental": self.resumed,
+            "PremierNumeroPiece": total_pieces - len(self.piece_events) + 1,
+            "Etat": self.get_state()
+        }
+
+
+class DailySessionAnalyzer:
+    """
+    Découpe à la volée le flux d'événements d'un fichier LOG par journée de
+    production: chaque journée est confiée à son MachinePerformanceAnalyzer et
+    donne une session de production distincte.
+    
+    Une journée commence à day_start_hour (0 = minuit; avec 6, une équipe de
+    nuit reste rattachée à la journée où elle a commencé). Un arrêt en cours
+    au changement de journée est coupé à la frontière: chaque journée n'en
+    compte que sa part.
+    """
+    
+    def __init__(self, day_start_hour=0, state=None):
+        """
+        Args:
+            day_start_hour: Heure de début des journées de production (0 à 23)
+            state: État de la dernière journée d'une analyse précédente à
+                   reprendre (ingestion incrémentale)
+        """
+        self.day_offset = timedelta(hours=day_start_hour)
+        self.analyzers = []
+        self.current = None
+        self.day_end = None
+        
+        if state:
+            self.current = MachinePerformanceAnalyzer.from_state(state)
+            self.analyzers.append(self.current)
+            if self.current.log_date is not None:
+                self.day_end = self.day_start(self.current.log_date + timedelta(days=1))
+    
+    @property
+    def event_count(self):
+        """Nombre d'événements analysés, toutes journées confondues."""
+        return sum(analyzer.event_count for analyzer in self.analyzers)
+    
+    def production_day(self, timestamp):
+        """Journée de production d'un horodatage."""
+        return (timestamp - self.day_offset).date()
+    
+    def day_start(self, day):
+        """Début d'une journée de production."""
+        return datetime(day.year, day.month, day.day) + self.day_offset
+    
+    def add_event(self, event):
+        """
+        Consomme un événement parsé, en ouvrant une nouvelle journée si besoin.
+        
+        Args:
+            event: Dictionnaire {"Timestamp", "Event", "Details"}
+        """
+        if self.day_end is None or event["Timestamp"] >= self.day_end:
+            self.start_day(self.production_day(event["Timestamp"]))
+        self.current.add_event(event)
+    
+    def start_day(self, day):
+        """
+        Ouvre la journée de production day et termine la précédente.
+        
+        Args:
+            day: Journée de production (date)
+        """
+        analyzer = MachinePerformanceAnalyzer(log_date=day)
+        open_stop_at = self.close_current_day(day)
+        if open_stop_at is not None:
+            analyzer.previous_stop_event = {"Event": "MachineStop", "Timestamp": open_stop_at}
+            analyzer.first_event_time = open_stop_at
+        self.append_day(analyzer)
+    
+    def close_current_day(self, day):
+        """
+        Termine la journée en cours avant l'ouverture de la journée day.
+        
+        Args:
+            day: Journée de production suivante
+            
+        Returns:
+            datetime: Début de la journée day si un arrêt s'y poursuit, sinon None
+        """
+        if self.current is not None and self.current.close_day(self.day_end):
+            return self.day_start(day)
+        return None
+    
+    def append_day(self, analyzer):
+        """
+        Ajoute l'analyseur d'une nouvelle journée, qui devient la journée en cours.
+        
+        Args:
+            analyzer: MachinePerformanceAnalyzer dont log_date est la journée
+        """
+        self.current = analyzer
+        self.analyzers.append(analyzer)
+        self.day_end = self.day_start(analyzer.log_date + timedelta(days=1))
+    
+    def build_results(self, cu_id):
+        """
+        Calcule les indicateurs de chaque journée.
+        
+        Args:
+            cu_id: Identifiant du centre d'usinage (nom du dossier)
+            
+        Returns:
+            list: Résultats (MachinePerformanceAnalyzer.build_results) par
+                  journée, dans l'ordre chronologique; l'état de la dernière
+                  journée permet de reprendre l'analyse
+        """
+        return [analyzer.build_results(cu_id) for analyzer in self.analyzers]
+
+
+class LogDirectoryWatcher:
+    """
+    Surveille les dossiers des centres d'usinage et signale les fichiers LOG
+    créés ou modifiés.
+    
+    Utilise inotify quand il est disponible (Linux, module inotify_simple),
+    sinon compare périodiquement la taille et la date de modification des
+    fichiers (volumes partagés sans notifications, Docker Desktop...).
+    """
+    
+    def __init__(self, logs_directory, directories, use_inotify=True, poll_seconds=2):
+        """
+        Args:
+            logs_directory: Dossier racine des logs
+            directories: Noms des dossiers de centres d'usinage à surveiller
+            use_inotify: Si False, force la surveillance par scrutation
+            poll_seconds: Intervalle de scrutation (secondes)
+        """
+        self.logs_directory = logs_directory
+        self.poll_seconds = poll_seconds
+        self.inotify = None
+        self.watches = {}    # descripteur inotify -> dossier
+        self.snapshot = {}   # (dossier, fichier) -> (taille, mtime) en scrutation
+        self.directories = []
+        
+        if use_inotify and INotify is not None:
+            try:
+                self.inotify = INotify()
+            except OSError as e:
+                logger.warning(f"⚠️ inotify indisponible, surveillance par scrutation: {e}")
+        
+        self.add_directories(directories)
+    
+    @property
+    def mode(self):
+        """Mode de surveillance effectif ('inotify' ou 'polling')."""
+        return 'inotify' if self.inotify is not None else 'polling'
+    
+    def add_directories(self, directories):
+        """
+        Ajoute des dossiers à la surveillance (les dossiers déjà surveillés sont ignorés).
+        
+        Args:
+            directories: Noms des dossiers de centres d'usinage
+        """
+        for directory in directories:
+            if directory in self.directories:
+                continue
+            self.directories.append(directory)
+            
+            if self.inotify is not None:
+                watch_flags = (inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                               | inotify_flags.MODIFY | inotify_flags.CREATE)
+                wd = self.inotify.add_watch(os.path.join(self.logs_directory, directory), watch_flags)
+                self.watches[wd] = directory
+            else:
+                # Les fichiers déjà présents sont traités par le passage initial
+                self.snapshot.update(self.scan_directory(directory))
+    
+    def scan_directory(self, directory):
+        """
+        Relève la taille et la date de modification des fichiers LOG d'un dossier.
+        
+        Returns:
+            dict: {(dossier, fichier): (taille, mtime)}
+        """
+        entries = {}
+        try:
+            with os.scandir(os.path.join(self.logs_directory, directory)) as iterator:
+                for entry in iterator:
+                    if is_log_file(entry.name) and entry.is_file():
+                        file_stat = entry.stat()
+                        entries[(directory, entry.name)] = (file_stat.st_size, file_stat.st_mtime)
+        except OSError as e:
+            logger.warning(f"⚠️ Dossier {directory} illisible: {e}")
+        return entries
+    
+    def wait(self, timeout):
+        """
+        Attend des modifications de fichiers LOG pendant au plus timeout secondes.
+        
+        Args:
+            timeout: Durée maximale d'attente (secondes)
+            
+        Returns:
+            set: Fichiers modifiés {(dossier, fichier)}
+        """
+        changed = set()
+        
+        if self.inotify is not None:
+            for event in self.inotify.read(timeout=int(timeout * 1000)):
+                directory = self.watches.get(event.wd)
+                if directory and is_log_file(event.name):
+                    changed.add((directory, event.name))
+            return changed
+        
+        time.sleep(min(timeout, self.poll_seconds))
+        snapshot = {}
+        for directory in self.directories:
+            snapshot.update(self.scan_directory(directory))
+        for key, signature in snapshot.items():
+            if self.snapshot.get(key) != signature:
+                changed.add(key)
+        self.snapshot = snapshot
+        return changed
+    
+    def close(self):
+        """Libère le descripteur inotify."""
+        if self.inotify is not None:
+            self.inotify.close()
+
+
+class PipelineStageStats:
+    """
+    Compteurs de débit d'un étage du pipeline de traitement des fichiers.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.items = 0       # Fichiers passés par l'étage
+        self.volume = 0      # Octets lus, lignes analysées ou lignes écrites
+        self.busy = 0.0      # Temps passé à travailler (hors attente des files)
+        self.lock = threading.Lock()
+    
+    def add(self, seconds, volume):
+        """Enregistre le traitement d'un fichier par l'étage."""
+        with self.lock:
+            self.items += 1
+            self.volume += volume
+            self.busy += seconds
+    
+    def summary(self, unit):
+        """Résumé lisible: volume, débit pendant le temps actif, nombre de fichiers."""
+        rate = self.volume / self.busy if self.busy else 0
+        return f"{self.name} {self.items} fichiers, {self.volume:,} {unit} ({rate:,.0f} {unit}/s)"
+
+
 class LogService:
     """
     Classe principale qui gère tout le processus de traitement des logs locaux.
@@ -84,6 +971,85 @@ class LogService:
         # Variables pour stocker les connexions (initialisées à None)
         self.conn = None  # Connexion à la base de données
         self.cur = None   # Curseur pour exécuter les requêtes SQL
+        
+        # Nombre de processus pour traiter les dossiers en parallèle (1 = séquentiel)
+        self.workers = int(os.getenv('LOG_WORKERS') or os.cpu_count() or 1)
+        
+        # Ingestion incrémentale: ne relire que les octets ajoutés depuis le dernier passage
+        self.incremental = (os.getenv('INCREMENTAL_INGESTION') or 'true').lower() == 'true'
+        
+        # Délai (secondes) sans modification après lequel un fichier est considéré
+        # comme complet: avant, une dernière ligne sans retour à la ligne est ignorée
+        self.settle_seconds = int(os.getenv('LOG_SETTLE_SECONDS') or 60)
+        
+        # Représentation des événements pour l'analyse:
+        # 'stream' = analyse en passe unique, 'columnar' = stockage NumPy en colonnes
+        self.event_store_mode = (os.getenv('LOG_EVENT_STORE') or 'stream').lower()
+        
+        # Heure de début des journées de production: un fichier couvrant plusieurs
+        # journées donne une session par journée (0 = minuit)
+        self.production_day_start_hour = int(os.getenv('PRODUCTION_DAY_START_HOUR') or 0)
+        if not 0 <= self.production_day_start_hour <= 23:
+            logger.warning(f"⚠️ PRODUCTION_DAY_START_HOUR invalide ({self.production_day_start_hour}), minuit utilisé")
+            self.production_day_start_hour = 0
+        
+        # Écriture des tables de détail: 'copy' = COPY FROM STDIN, 'insert' = un INSERT par ligne
+        self.detail_write_mode = (os.getenv('DETAIL_WRITE_MODE') or 'copy').lower()
+        
+        # Retraitement d'un fichier: 'reconcile' = n'écrire que les lignes de détail qui
+        # ont changé, 'replace' = supprimer puis réinsérer tous les détails de la session
+        self.detail_sync_mode = (os.getenv('DETAIL_SYNC_MODE') or 'reconcile').lower()
+        
+        # Mode démon: surveillance ('inotify' ou 'polling'), délai sans modification avant
+        # ingestion d'un fichier, délai maximal d'un fichier modifié en continu et
+        # intervalle des passages complets de rattrapage (secondes)
+        self.watch_mode = (os.getenv('LOG_WATCH_MODE') or 'inotify').lower()
+        self.debounce_seconds = float(os.getenv('DAEMON_DEBOUNCE_SECONDS') or 5)
+        self.max_delay_seconds = float(os.getenv('DAEMON_MAX_DELAY_SECONDS') or 60)
+        self.rescan_seconds = float(os.getenv('DAEMON_RESCAN_SECONDS') or 300)
+        self.poll_seconds = float(os.getenv('DAEMON_POLL_SECONDS') or 2)
+        self._stop_requested = False
+        
+        # Redémarrage du démon après un échec (base de données ou dossier de logs
+        # inaccessibles, erreur fatale): délai initial, doublé à chaque échec
+        # consécutif jusqu'au délai maximal (secondes)
+        self.restart_min_seconds = float(os.getenv('DAEMON_RESTART_MIN_SECONDS') or 5)
+        self.restart_max_seconds = float(os.getenv('DAEMON_RESTART_MAX_SECONDS') or 300)
+        
+        # Pipeline préchargement → analyse → écriture des fichiers d'un même dossier
+        # (profondeur = nombre de fichiers en attente entre deux étages).
+        # Activé par défaut s'il y a plusieurs CPU: sur un seul cœur, les étages
+        # ne peuvent pas se recouvrir et le pipeline n'ajoute que son coût
+        default_pipeline = 'true' if (os.cpu_count() or 1) > 1 else 'false'
+        self.pipeline = (os.getenv('LOG_PIPELINE') or default_pipeline).lower() == 'true'
+        self.pipeline_depth = int(os.getenv('LOG_PIPELINE_DEPTH') or 2)
+        self._parse_executor = None
+        
+        # Archivage des fichiers traités (compressés, un dossier par mois) au lieu
+        # de les laisser en place ou de les supprimer: 'gzip' ou 'zstd'
+        self.archive_after_processing = (os.getenv('ARCHIVE_AFTER_SYNC') or 'false').lower() == 'true'
+        self.archive_compression = (os.getenv('ARCHIVE_COMPRESSION') or 'gzip').lower()
+        if self.archive_compression not in COMPRESSED_EXTENSIONS or (
+                self.archive_compression == 'zstd' and zstandard is None):
+            logger.warning(f"⚠️ Compression d'archive {self.archive_compression} indisponible, gzip utilisé")
+            self.archive_compression = 'gzip'
+        
+        # Métriques de l'ingestion au format Prometheus: fichier pour le collecteur
+        # textfile de node-exporter et/ou point d'accès HTTP /metrics (mode démon)
+        self.metrics = IngestionMetrics()
+        self.metrics_textfile = os.getenv('METRICS_TEXTFILE')
+        self.metrics_port = int(os.getenv('METRICS_PORT') or 0)
+        
+        # Partitions mensuelles déjà vérifiées pendant ce passage (premiers jours de mois)
+        self._partitions = set()
+        
+        # Cache des IDs de centres d'usinage déjà enregistrés pendant ce passage
+        # ((nom, type) -> id), alimenté uniquement après un commit réussi
+        self._centre_ids = {}
+        
+        # Cache du décodage des timestamps (partie date par jour + dernier timestamp vu)
+        self._date_cache = {}
+        self._last_timestamp = (None, None)
 
     def connect_db(self):
         """
@@ -131,6 +1097,10 @@ class LogService:
         try:
             logger.info("Création des tables de la base de données...")
             
+            # Sérialiser la création du schéma entre instances démarrées en même temps
+            # (CREATE TABLE IF NOT EXISTS n'est pas protégé contre les accès concurrents)
+            self.cur.execute("SELECT pg_advisory_xact_lock(hashtext('log_schema'))")
+            
             # Table pour stocker les informations sur chaque centre d'usinage (machine)
             self.cur.execute("""
                 CREATE TABLE IF NOT EXISTS centre_usinage (
@@ -180,51 +1150,164 @@ class LogService:
                 );
             """)
             
-            # Table pour stocker les périodes d'attente
-            self.cur.execute("""
-                CREATE TABLE IF NOT EXISTS periode_attente (
-                    id SERIAL PRIMARY KEY,
-                    session_id INTEGER REFERENCES session_production(id),
-                    timestamp_debut TIMESTAMP NOT NULL,
-                    timestamp_fin TIMESTAMP NOT NULL,
-                    duree_secondes INTEGER NOT NULL,
-                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                );
+            # Table pour stocker les périodes d'attente (partitionnée par mois)
+            self.create_partitioned_table("periode_attente", """
+                session_id INTEGER REFERENCES session_production(id),
+                timestamp_debut TIMESTAMP NOT NULL,
+                timestamp_fin TIMESTAMP NOT NULL,
+                duree_secondes INTEGER NOT NULL,
+                date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+            
+            # Table pour stocker les périodes d'arrêt (partitionnée par mois)
+            self.create_partitioned_table("periode_arret", """
+                session_id INTEGER REFERENCES session_production(id),
+                timestamp_debut TIMESTAMP NOT NULL,
+                timestamp_fin TIMESTAMP NOT NULL,
+                duree_secondes INTEGER NOT NULL,
+                date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            """)
+            
+            # Table pour stocker chaque pièce produite (partitionnée par mois)
+            self.create_partitioned_table("piece_production", """
+                session_id INTEGER REFERENCES session_production(id),
+                numero_piece INTEGER NOT NULL,
+                timestamp_production TIMESTAMP NOT NULL,
+                details TEXT,
+                date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             """)
             
-            # Table pour stocker les périodes d'arrêt
+            # Index sur la session des tables de détail (suppressions, réconciliation, API)
+            for table in ("job_profil", "periode_attente", "periode_arret", "piece_production"):
+                self.cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_session ON {table} (session_id)")
+            
+            # Table des points de reprise de l'ingestion incrémentale (un par fichier LOG)
             self.cur.execute("""
-                CREATE TABLE IF NOT EXISTS periode_arret (
+                CREATE TABLE IF NOT EXISTS log_checkpoint (
                     id SERIAL PRIMARY KEY,
+                    chemin_fichier VARCHAR(255) UNIQUE NOT NULL,
+                    inode BIGINT,
+                    taille BIGINT,
+                    dernier_offset BIGINT NOT NULL DEFAULT 0,
+                    dernier_timestamp TIMESTAMP,
                     session_id INTEGER REFERENCES session_production(id),
-                    timestamp_debut TIMESTAMP NOT NULL,
-                    timestamp_fin TIMESTAMP NOT NULL,
-                    duree_secondes INTEGER NOT NULL,
-                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    etat_analyse JSONB,
+                    date_maj TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
             """)
             
-            # Table pour stocker chaque pièce produite
+            # Table du manifeste des fichiers déjà traités (pour ignorer les fichiers inchangés)
             self.cur.execute("""
-                CREATE TABLE IF NOT EXISTS piece_production (
+                CREATE TABLE IF NOT EXISTS log_manifest (
                     id SERIAL PRIMARY KEY,
-                    session_id INTEGER REFERENCES session_production(id),
-                    numero_piece INTEGER NOT NULL,
-                    timestamp_production TIMESTAMP NOT NULL,
-                    details TEXT,
-                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    chemin_fichier VARCHAR(255) UNIQUE NOT NULL,
+                    taille BIGINT NOT NULL,
+                    mtime DOUBLE PRECISION NOT NULL,
+                    empreinte VARCHAR(64) NOT NULL,
+                    date_traitement TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
             """)
             
             # Sauvegarder toutes les modifications
             self.conn.commit()
+            
+            # Partitions du mois courant et des mois à venir
+            self.ensure_partitions(upcoming_months())
+            
             logger.info("✅ Toutes les tables ont été créées avec succès")
             return True
             
         except Exception as e:
             logger.error(f"❌ Erreur lors de la création des tables: {e}")
+            self.conn.rollback()
             return False
 
+    def create_partitioned_table(self, table, columns):
+        """
+        Crée une table de détail partitionnée par mois sur sa colonne de temps
+        (voir PARTITIONED_TABLES).
+        
+        Une table existante non partitionnée (créée par une version précédente
+        ou par l'API) est migrée: renommée, recréée partitionnée, ses lignes
+        recopiées avec leurs IDs puis supprimée. La séquence des IDs est conservée.
+        
+        Args:
+            table: Nom de la table
+            columns: Définition SQL des colonnes, hors id
+        """
+        partition_column = PARTITIONED_TABLES[table]
+        
+        self.cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+        existing = self.cur.fetchone()
+        if existing and existing[0] == 'p':
+            return
+        
+        legacy_table = f"{table}_legacy"
+        if existing:
+            logger.info(f"🔄 Migration de {table} vers une table partitionnée par mois...")
+            self.cur.execute(f"ALTER TABLE {table} RENAME TO {legacy_table}")
+            # Libérer les noms des index (dont la clé primaire) pour la nouvelle table
+            self.cur.execute("SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass",
+                             (legacy_table,))
+            for (index_name,) in self.cur.fetchall():
+                self.cur.execute(f"ALTER INDEX {index_name} RENAME TO {index_name}_legacy")
+        
+        self.cur.execute(f"CREATE SEQUENCE IF NOT EXISTS {table}_id_seq")
+        self.cur.execute(f"""
+            CREATE TABLE {table} (
+                id INTEGER NOT NULL DEFAULT nextval('{table}_id_seq'),
+                {columns},
+                PRIMARY KEY (id, {partition_column})
+            ) PARTITION BY RANGE ({partition_column});
+        """)
+        self.cur.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        
+        if existing:
+            self.cur.execute(f"SELECT DISTINCT date_trunc('month', {partition_column})::date FROM {legacy_table}")
+            for (month,) in self.cur.fetchall():
+                self.create_month_partition(table, month)
+            
+            self.cur.execute(f"SELECT * FROM {table} LIMIT 0")
+            column_names = ', '.join(column.name for column in self.cur.description)
+            self.cur.execute(f"INSERT INTO {table} ({column_names}) SELECT {column_names} FROM {legacy_table}")
+            logger.info(f"✅ {self.cur.rowcount} lignes migrées dans {table}")
+            self.cur.execute(f"DROP TABLE {legacy_table}")
+
+    def create_month_partition(self, table, month):
+        """
+        Crée (si besoin) la partition mensuelle d'une table de détail.
+        
+        Args:
+            table: Nom de la table partitionnée
+            month: Premier jour du mois (date)
+        """
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        self.cur.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table}_{month:%Y_%m}
+            PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)
+        """, (month, next_month))
+
+    def ensure_partitions(self, months):
+        """
+        Crée les partitions mensuelles manquantes des tables de détail, dans une
+        transaction courte sérialisée par un verrou consultatif (plusieurs
+        processus peuvent ingérer le même mois en parallèle).
+        
+        Args:
+            months: Ensemble des premiers jours de mois (date) à couvrir
+        """
+        missing = sorted(set(months) - self._partitions)
+        if not missing:
+            return
+        
+        self.cur.execute("SELECT pg_advisory_xact_lock(hashtext('log_partitions'))")
+        for month in missing:
+            for table in PARTITIONED_TABLES:
+                self.create_month_partition(table, month)
+        self.conn.commit()
+        
+        self._partitions.update(missing)
+
     def create_logs_structure(self):
         """
         Crée la structure de dossiers nécessaire pour le traitement des logs.
@@ -314,42 +1397,154 @@ class LogService:
             
             return cu_dirs
             
-        except Exception as e:
-            logger.error(f"❌ Erreur lors de la récupération des dossiers: {e}")
-            return []
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la récupération des dossiers: {e}")
+            return []
+
+    def get_log_files_from_directory(self, directory, force=False):
+        """
+        Récupère la liste des fichiers LOG nouveaux ou modifiés dans un dossier spécifique.
+        
+        Les fichiers déjà traités et inchangés depuis (d'après le manifeste
+        log_manifest) sont ignorés: en régime établi, un passage ne coûte qu'un
+        stat par fichier.
+        
+        Args:
+            directory: Nom du dossier à explorer
+            force: Si True, retourne tous les fichiers sans consulter le manifeste
+            
+        Returns:
+            list: Liste des noms de fichiers LOG à traiter
+        """
+        try:
+            logger.info(f"Recherche des fichiers LOG dans le dossier: {directory}")
+            
+            # Construire le chemin complet du dossier
+            directory_path = os.path.join(self.logs_directory, directory)
+            
+            if not os.path.exists(directory_path):
+                logger.warning(f"⚠️ Dossier non trouvé: {directory_path}")
+                return []
+            
+            # Récupérer tous les fichiers LOG (.LOG, .LOG.gz, .LOG.zst)
+            log_files = []
+            for file in os.listdir(directory_path):
+                if is_log_file(file) and os.path.isfile(os.path.join(directory_path, file)):
+                    log_files.append(file)
+            
+            logger.info(f"✅ Trouvé {len(log_files)} fichiers LOG dans {directory}")
+            
+            if force or self.cur is None:
+                return log_files
+            
+            # Ne garder que les fichiers nouveaux ou modifiés
+            changed_files = self.filter_changed_files(directory, log_files)
+            skipped = len(log_files) - len(changed_files)
+            if skipped:
+                logger.info(f"⏭️ {skipped} fichiers inchangés ignorés dans {directory}")
+            return changed_files
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la récupération des fichiers de {directory}: {e}")
+            return []
+
+    def compute_file_fingerprint(self, file_path, size):
+        """
+        Calcule une empreinte rapide d'un fichier: taille + premiers et derniers
+        64 Ko (jusqu'à la taille donnée), sans relire tout le fichier.
+        
+        Args:
+            file_path: Chemin complet du fichier
+            size: Taille à prendre en compte (octets)
+            
+        Returns:
+            str: Empreinte hexadécimale
+        """
+        block_size = 64 * 1024
+        digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+        
+        with open(file_path, 'rb') as file:
+            digest.update(file.read(min(block_size, size)))
+            if size > block_size:
+                file.seek(max(block_size, size - block_size))
+                digest.update(file.read(size - file.tell()))
+        
+        return digest.hexdigest()
+
+    def filter_changed_files(self, directory, log_files):
+        """
+        Compare les fichiers d'un dossier au manifeste des fichiers déjà traités.
+        
+        Un fichier est inchangé si sa taille et sa date de modification sont
+        identiques au manifeste. Si seule la date a changé (fichier réécrit à
+        l'identique par le client SFTP), l'empreinte rapide tranche.
+        
+        Args:
+            directory: Nom du dossier
+            log_files: Noms des fichiers présents dans le dossier
+            
+        Returns:
+            list: Noms des fichiers nouveaux ou modifiés
+        """
+        self.cur.execute("""
+            SELECT chemin_fichier, taille, mtime, empreinte
+            FROM log_manifest WHERE chemin_fichier LIKE %s
+        """, (f"{directory}/%",))
+        manifest = {row[0]: row[1:] for row in self.cur.fetchall()}
+        
+        changed_files = []
+        touched = []
+        for filename in log_files:
+            file_path = os.path.join(self.logs_directory, directory, filename)
+            relative_path = f"{directory}/{filename}"
+            entry = manifest.get(relative_path)
+            
+            if entry is None:
+                changed_files.append(filename)
+                continue
+            
+            size, mtime, fingerprint = entry
+            file_stat = os.stat(file_path)
+            if file_stat.st_size != size:
+                changed_files.append(filename)
+            elif file_stat.st_mtime != mtime:
+                if self.compute_file_fingerprint(file_path, size) == fingerprint:
+                    touched.append((file_stat.st_mtime, relative_path))
+                else:
+                    changed_files.append(filename)
+        
+        # Mettre à jour la date des fichiers réécrits à l'identique
+        if touched:
+            self.cur.executemany("UPDATE log_manifest SET mtime = %s WHERE chemin_fichier = %s", touched)
+        self.conn.commit()
+        
+        return changed_files
 
-    def get_log_files_from_directory(self, directory):
+    def record_processed_file(self, directory, filename, file_stat):
         """
-        Récupère la liste des fichiers LOG dans un dossier spécifique.
+        Enregistre un fichier traité dans le manifeste.
         
         Args:
-            directory: Nom du dossier à explorer
-            
-        Returns:
-            list: Liste des noms de fichiers LOG trouvés
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier LOG
+            file_stat: Résultat de os.stat pris avant la lecture du fichier
         """
+        file_path = os.path.join(self.logs_directory, directory, filename)
         try:
-            logger.info(f"Recherche des fichiers LOG dans le dossier: {directory}")
-            
-            # Construire le chemin complet du dossier
-            directory_path = os.path.join(self.logs_directory, directory)
-            
-            if not os.path.exists(directory_path):
-                logger.warning(f"⚠️ Dossier non trouvé: {directory_path}")
-                return []
-            
-            # Récupérer tous les fichiers qui se terminent par .LOG
-            log_files = []
-            for file in os.listdir(directory_path):
-                if file.endswith('.LOG') and os.path.isfile(os.path.join(directory_path, file)):
-                    log_files.append(file)
-            
-            logger.info(f"✅ Trouvé {len(log_files)} fichiers LOG dans {directory}")
-            return log_files
-            
+            fingerprint = self.compute_file_fingerprint(file_path, file_stat.st_size)
+            self.cur.execute("""
+                INSERT INTO log_manifest (chemin_fichier, taille, mtime, empreinte, date_traitement)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (chemin_fichier) DO UPDATE SET
+                    taille = EXCLUDED.taille,
+                    mtime = EXCLUDED.mtime,
+                    empreinte = EXCLUDED.empreinte,
+                    date_traitement = CURRENT_TIMESTAMP
+            """, (f"{directory}/{filename}", file_stat.st_size, file_stat.st_mtime, fingerprint))
+            self.conn.commit()
         except Exception as e:
-            logger.error(f"❌ Erreur lors de la récupération des fichiers de {directory}: {e}")
-            return []
+            logger.warning(f"⚠️ Manifeste non mis à jour pour {directory}/{filename}: {e}")
+            self.conn.rollback()
 
     def read_log_file_from_directory(self, directory, filename):
         """
@@ -372,9 +1567,9 @@ class LogService:
                 logger.error(f"❌ Fichier non trouvé: {file_path}")
                 return None
             
-            # Lire le fichier en mode binaire puis décoder
-            with open(file_path, 'rb') as file:
-                log_content_bytes = file.read()
+            # Lire le fichier en mode binaire (décompressé si besoin) puis décoder
+            with open(file_path, 'rb') as file, open_log_stream(file, filename) as stream:
+                log_content_bytes = stream.read()
             
             # Convertir les bytes en texte (utiliser latin-1 qui accepte tous les caractères)
             log_content = log_content_bytes.decode('latin-1')
@@ -417,6 +1612,351 @@ class LogService:
             logger.error(f"❌ Erreur lors de la suppression de {directory}/{filename}: {e}")
             return False
 
+    def archive_log_file(self, directory, filename):
+        """
+        Déplace un fichier LOG traité dans l'archive compressée de son mois:
+        <dossier>/archives/YYYY-MM/<fichier>.LOG.gz (ou .zst selon ARCHIVE_COMPRESSION).
+        
+        Le mois est celui du premier événement du fichier (date de modification
+        à défaut). L'archive est écrite sous un nom temporaire puis renommée:
+        le fichier d'origine n'est supprimé qu'une fois l'archive complète.
+        
+        Args:
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier à archiver
+            
+        Returns:
+            bool: True si l'archivage réussit, False sinon
+        """
+        file_path = os.path.join(self.logs_directory, directory, filename)
+        temp_path = None
+        try:
+            first_event = next(self.iter_log_events(file_path), None)
+            if first_event is not None:
+                month = first_event["Timestamp"].strftime('%Y-%m')
+            else:
+                month = datetime.fromtimestamp(os.stat(file_path).st_mtime).strftime('%Y-%m')
+            
+            archive_directory = os.path.join(self.logs_directory, directory, ARCHIVE_DIRECTORY, month)
+            os.makedirs(archive_directory, exist_ok=True)
+            
+            if is_compressed_log(filename):
+                # Déjà compressé: simple copie
+                archive_name = filename
+                temp_path = os.path.join(archive_directory, archive_name + '.partial')
+                shutil.copyfile(file_path, temp_path)
+            else:
+                archive_name = filename + COMPRESSED_EXTENSIONS[self.archive_compression]
+                temp_path = os.path.join(archive_directory, archive_name + '.partial')
+                with open(file_path, 'rb') as source, open(temp_path, 'wb') as target:
+                    if self.archive_compression == 'zstd':
+                        writer = zstandard.ZstdCompressor(level=10).stream_writer(target, closefd=False)
+                    else:
+                        writer = gzip.GzipFile(fileobj=target, mode='wb', compresslevel=6)
+                    with writer:
+                        shutil.copyfileobj(source, writer, 1024 * 1024)
+            
+            os.replace(temp_path, os.path.join(archive_directory, archive_name))
+            os.remove(file_path)
+            
+            logger.info(f"📦 {directory}/{filename} archivé dans {ARCHIVE_DIRECTORY}/{month}/{archive_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'archivage de {directory}/{filename}: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def archive_processed_files(self, directory):
+        """
+        Archive les fichiers d'un dossier déjà traités en entier et dont la
+        journée est terminée (dernière modification avant aujourd'hui): les
+        fichiers du jour, encore alimentés par la machine, restent en place.
+        
+        Args:
+            directory: Nom du dossier (machine)
+            
+        Returns:
+            int: Nombre de fichiers archivés
+        """
+        try:
+            self.cur.execute("""
+                SELECT chemin_fichier, taille, mtime
+                FROM log_manifest WHERE chemin_fichier LIKE %s
+            """, (f"{directory}/%",))
+            manifest = {row[0]: row[1:] for row in self.cur.fetchall()}
+            self.conn.rollback()
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la lecture du manifeste de {directory}: {e}")
+            self.conn.rollback()
+            return 0
+        
+        archived_count = 0
+        today = date.today()
+        directory_path = os.path.join(self.logs_directory, directory)
+        
+        for filename in sorted(os.listdir(directory_path)):
+            file_path = os.path.join(directory_path, filename)
+            if not is_log_file(filename) or not os.path.isfile(file_path):
+                continue
+            
+            # Fichier traité et inchangé depuis (même taille et même date de modification)
+            file_stat = os.stat(file_path)
+            if manifest.get(f"{directory}/{filename}") != (file_stat.st_size, file_stat.st_mtime):
+                continue
+            if date.fromtimestamp(file_stat.st_mtime) >= today:
+                continue
+            
+            started = time.perf_counter()
+            archived = self.archive_log_file(directory, filename)
+            self.metrics.inc("log_ingestion_stage_seconds_total", time.perf_counter() - started,
+                             directory=directory, stage="archive")
+            if archived:
+                self.forget_log_file(directory, filename)
+                archived_count += 1
+        
+        if archived_count:
+            logger.info(f"📦 {archived_count} fichiers archivés dans {directory}/{ARCHIVE_DIRECTORY}")
+        return archived_count
+
+    def get_archived_log_files(self, directory, month='*'):
+        """
+        Liste les fichiers archivés d'un dossier, pour les retraiter.
+        
+        Args:
+            directory: Nom du dossier (machine)
+            month: Mois à lister ('YYYY-MM', motif glob accepté, '*' = tous)
+            
+        Returns:
+            list: Chemins des archives relatifs au dossier (archives/YYYY-MM/fichier)
+        """
+        pattern = os.path.join(self.logs_directory, directory, ARCHIVE_DIRECTORY, month, '*')
+        return sorted(
+            os.path.relpath(path, os.path.join(self.logs_directory, directory))
+            for path in glob.glob(pattern)
+            if is_log_file(path) and os.path.isfile(path)
+        )
+
+    def iter_log_events(self, file_path, stats=None, start_offset=0, complete_lines_only=False):
+        """
+        Parcourt un fichier LOG en streaming et produit les événements un par un.
+        
+        Le fichier est projeté en mémoire (mmap) et découpé ligne par ligne
+        directement sur les bytes: seul le champ détails est décodé. La mémoire
+        utilisée reste donc bornée quelle que soit la taille du fichier.
+        Un fichier compressé (.gz, .zst) est décompressé à la volée, depuis le début.
+        
+        Args:
+            file_path: Chemin complet du fichier LOG
+            stats: Dictionnaire optionnel mis à jour avec les compteurs de lecture
+                   (dont 'offset', la position qui suit la dernière ligne consommée)
+            start_offset: Position (en octets) à partir de laquelle lire
+            complete_lines_only: Si True, une dernière ligne sans retour à la
+                                 ligne (en cours d'écriture) n'est pas consommée
+            
+        Yields:
+            dict: Événement parsé {"Timestamp", "Event", "Details"}
+        """
+        if stats is not None:
+            stats.setdefault('offset', start_offset)
+        
+        if is_compressed_log(file_path):
+            # Fichier compressé: lecture séquentielle décompressée (toujours complète)
+            with open(file_path, 'rb') as file, open_log_stream(file, file_path) as stream:
+                yield from self.iter_log_stream(stream, stats)
+            return
+        
+        with open(file_path, 'rb') as file:
+            # mmap refuse les fichiers vides
+            if os.fstat(file.fileno()).st_size <= start_offset:
+                return
+            
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                buffer.seek(start_offset)
+                yield from self.iter_log_stream(buffer, stats, start_offset, complete_lines_only)
+
+    def iter_log_stream(self, stream, stats=None, start_offset=0, complete_lines_only=False):
+        """
+        Découpe un flux binaire (mmap, fichier ouvert en 'rb', BytesIO...) en
+        événements, ligne par ligne.
+        
+        Args:
+            stream: Flux binaire disposant d'une méthode readline()
+            stats: Dictionnaire optionnel mis à jour avec les compteurs de lecture
+                   (dont 'parse_seconds', le temps passé à lire et découper les
+                   lignes, hors traitement des événements par l'appelant)
+            start_offset: Position de départ du flux dans le fichier
+            complete_lines_only: Si True, ne consomme pas une dernière ligne incomplète
+            
+        Yields:
+            dict: Événement parsé {"Timestamp", "Event", "Details"}
+        """
+        if stats is None:
+            stats = {}
+        for key in ('bytes', 'lines', 'events', 'rejected', 'parse_seconds'):
+            stats.setdefault(key, 0)
+        
+        parse_line = self.parse_log_line
+        read_bytes = lines = events = rejected = 0
+        clock = time.perf_counter
+        parse_seconds = 0.0
+        resumed = clock()
+        
+        try:
+            # readline est implémenté en C pour mmap et les fichiers: pas de copie globale
+            for line in iter(stream.readline, b''):
+                if complete_lines_only and not line.endswith(b'\n'):
+                    # Ligne en cours d'écriture: elle sera lue au prochain passage
+                    break
+                
+                read_bytes += len(line)
+                
+                try:
+                    event = parse_line(line)
+                except Exception:
+                    # Ligne non conforme: on la compte puis on l'ignore
+                    lines += 1
+                    rejected += 1
+                    continue
+                
+                if event is None:
+                    continue
+                
+                lines += 1
+                events += 1
+                parse_seconds += clock() - resumed
+                yield event
+                resumed = clock()
+            
+            parse_seconds += clock() - resumed
+        finally:
+            # Compteurs mis à jour même si le consommateur s'arrête en cours de route
+            stats['bytes'] += read_bytes
+            stats['lines'] += lines
+            stats['events'] += events
+            stats['rejected'] += rejected
+            stats['parse_seconds'] += parse_seconds
+            stats['offset'] = start_offset + read_bytes
+
+    def parse_log_line(self, line):
+        """
+        Analyse une ligne brute (bytes) du fichier LOG.
+        
+        Format attendu: YYYYMMDD HH:MM:SS|@EventType: Details
+        
+        Args:
+            line: Ligne du fichier en bytes
+            
+        Returns:
+            dict: Événement parsé, ou None si la ligne est vide
+            
+        Raises:
+            ValueError: Si la ligne n'est pas au format attendu
+        """
+        # Supprimer les caractères null puis les espaces de bord
+        if b'\x00' in line:
+            line = line.replace(b'\x00', b'')
+        line = line.strip()
+        
+        if not line:
+            return None
+        
+        timestamp_part, separator, event_part = line.partition(b'|@')
+        if not separator:
+            raise ValueError("Séparateur '|@' absent")
+        
+        timestamp = self.decode_log_timestamp(timestamp_part.strip())
+        
+        # Séparer le type d'événement des détails (seuls les détails sont décodés en latin-1)
+        event_type, separator, details = event_part.partition(b':')
+        event_type = event_type.decode('latin-1').strip()
+        details = details.decode('latin-1').strip() if separator else ""
+        
+        return {
+            "Timestamp": timestamp,
+            "Event": event_type,
+            "Details": details
+        }
+
+    def decode_log_timestamp(self, raw):
+        """
+        Décode un timestamp au format fixe YYYYMMDD HH:MM:SS.
+        
+        Le format étant à largeur fixe, on découpe directement les champs et on
+        convertit en entiers. La partie date est mise en cache par jour et le
+        dernier timestamp décodé est réutilisé (plusieurs événements par seconde).
+        strptime n'est utilisé qu'en secours pour les lignes mal formées.
+        
+        Args:
+            raw: Timestamp en bytes, sans espaces de bord
+            
+        Returns:
+            datetime: Timestamp décodé
+            
+        Raises:
+            ValueError: Si le timestamp n'est pas valide
+        """
+        last_raw, last_timestamp = self._last_timestamp
+        if raw == last_raw:
+            return last_timestamp
+        
+        if (len(raw) == 17 and raw[8] == 32 and raw[11] == 58 and raw[14] == 58
+                and raw[9:11].isdigit() and raw[12:14].isdigit() and raw[15:17].isdigit()):
+            date_key = raw[:8]
+            day = self._date_cache.get(date_key)
+            
+            if day is None and date_key.isdigit():
+                # Valider la date une seule fois par jour
+                day = (int(date_key[:4]), int(date_key[4:6]), int(date_key[6:8]))
+                datetime(*day)
+                self._date_cache[date_key] = day
+            
+            if day is not None:
+                timestamp = datetime(day[0], day[1], day[2],
+                                     int(raw[9:11]), int(raw[12:14]), int(raw[15:17]))
+                self._last_timestamp = (raw, timestamp)
+                return timestamp
+        
+        # Chemin de secours: garder seulement les caractères ASCII puis strptime
+        timestamp_str = raw.decode('ascii', 'ignore')
+        return datetime.strptime(timestamp_str, '%Y%m%d %H:%M:%S')
+
+    def parse_log_file(self, directory, filename, stats=None):
+        """
+        Lit et analyse un fichier LOG en streaming depuis un dossier spécifique.
+        
+        Args:
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier à analyser
+            stats: Dictionnaire optionnel mis à jour avec les compteurs de lecture
+            
+        Returns:
+            list: Liste des événements parsés (vide si erreur)
+        """
+        try:
+            logger.info(f"Lecture en streaming du fichier: {directory}/{filename}")
+            
+            # Construire le chemin complet du fichier
+            file_path = os.path.join(self.logs_directory, directory, filename)
+            
+            if not os.path.exists(file_path):
+                logger.error(f"❌ Fichier non trouvé: {file_path}")
+                return []
+            
+            data = list(self.iter_log_events(file_path, stats))
+            
+            if not data:
+                logger.warning(f"⚠️ Aucune donnée trouvée dans {filename}")
+                return []
+            
+            logger.info(f"✅ Fichier {filename} analysé: {len(data)} événements trouvés")
+            return data
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'analyse de {directory}/{filename}: {e}")
+            return []
+
     def parse_log_content(self, log_content, filename):
         """
         Analyse le contenu d'un fichier LOG et extrait les événements.
@@ -456,13 +1996,8 @@ class LogService:
                     # Diviser la ligne en timestamp et événement
                     timestamp_str, event_part = line.split('|@', 1)
                     
-                    # Nettoyer le timestamp
-                    timestamp_str = timestamp_str.strip()
-                    # Garder seulement les caractères ASCII pour le timestamp
-                    timestamp_str = ''.join(c for c in timestamp_str if ord(c) < 128)
-                    
-                    # Convertir le timestamp en objet datetime
-                    timestamp = datetime.strptime(timestamp_str, '%Y%m%d %H:%M:%S')
+                    # Convertir le timestamp en objet datetime (décodage à largeur fixe)
+                    timestamp = self.decode_log_timestamp(timestamp_str.strip().encode('latin-1'))
                     
                     # Analyser la partie événement
                     if ':' in event_part:
@@ -495,7 +2030,7 @@ class LogService:
             logger.error(f"❌ Erreur lors de l'analyse de {filename}: {e}")
             return []
 
-    def analyze_machine_performance(self, data, log_file_name, cu_type, directory):
+    def analyze_machine_performance(self, data, log_file_name, cu_type, directory, state=None):
         """
         Analyse les performances d'une machine à partir des événements du log.
         
@@ -505,204 +2040,535 @@ class LogService:
         - Les taux d'occupation
         - Les détails des jobs et périodes
         
+        Les événements sont consommés en une seule passe par un
+        DailySessionAnalyzer: data peut donc être une liste ou directement
+        le générateur renvoyé par iter_log_events. Un log qui couvre plusieurs
+        journées de production (passage de minuit, arriéré de plusieurs jours)
+        donne une session par journée.
+        
         Args:
-            data: Liste des événements parsés
+            data: Événements parsés (liste ou itérable)
             log_file_name: Nom du fichier LOG
             cu_type: Type de centre d'usinage (PVC, ALU, HYBRIDE)
             directory: Nom du dossier (machine) contenant le fichier
+            state: État d'une analyse précédente à reprendre (ingestion incrémentale)
             
         Returns:
-            dict: Dictionnaire contenant toutes les métriques calculées
+            list: Résultats (métriques calculées) par journée de production,
+                  ou None si aucun événement
         """
-        if not data:
+        logger.info(f"Analyse des performances pour {log_file_name} (Type: {cu_type})")
+        
+        analyzer = DailySessionAnalyzer(self.production_day_start_hour, state)
+        add_event = analyzer.add_event
+        for event in data:
+            add_event(event)
+        
+        if not analyzer.event_count:
             logger.warning("Aucune donnée à analyser")
             return None
         
-        logger.info(f"Analyse des performances pour {log_file_name} (Type: {cu_type})")
+        # L'identifiant du centre d'usinage est le dossier (machine)
+        results = analyzer.build_results(directory)
+        
+        self.log_analysis_results(results)
+        return results
+
+    def log_analysis_results(self, results):
+        """
+        Journalise le résumé de l'analyse de chaque journée.
+        
+        Args:
+            results: Résultats d'analyse par journée de production
+        """
+        for day_results in results:
+            self.log_rejected_details(day_results)
+            logger.info(f"✅ Analyse terminée ({day_results['Date']}): {day_results['TotalPieces']} pièces, "
+                        f"{day_results['TauxOccupation']:.1f}% d'occupation")
+
+    def log_rejected_details(self, results):
+        """
+        Signale les événements dont les détails n'ont pas pu être extraits.
+        
+        Args:
+            results: Résultats d'analyse contenant le compteur "Rejets"
+        """
+        for event_type, count in results["Rejets"].items():
+            if count:
+                logger.warning(f"⚠️ {count} événements {event_type} ignorés (détails non reconnus)")
+
+    def analyze_event_store(self, store, log_file_name, cu_type, directory):
+        """
+        Analyse les performances d'une machine à partir d'un stockage en colonnes.
         
-        # Extraire la date du premier événement
-        log_date = data[0]["Timestamp"].date()
+        Les comptages, la première/dernière pièce, les premiers démarrages,
+        derniers arrêts et périodes d'arrêt sont calculés par opérations
+        vectorisées NumPy, journée de production par journée. Seuls les détails
+        des attentes et des jobs, qui demandent une extraction de texte, sont
+        relus événement par événement.
+        
+        Args:
+            store: ColumnarEventStore contenant les événements du fichier
+            log_file_name: Nom du fichier LOG
+            cu_type: Type de centre d'usinage
+            directory: Nom du dossier (machine) contenant le fichier
+            
+        Returns:
+            list: Mêmes résultats que analyze_machine_performance
+        """
+        if not len(store):
+            logger.warning("Aucune donnée à analyser")
+            return None
         
-        # Créer un identifiant unique pour ce centre d'usinage basé sur le dossier (machine)
-        cu_id = directory
+        logger.info(f"Analyse des performances pour {log_file_name} (Type: {cu_type}, stockage en colonnes)")
         
-        # === ANALYSE DES PIÈCES PRODUITES ===
-        # Chercher tous les événements "StukUitgevoerd" (pièce terminée)
-        stuk_events = [event for event in data if event["Event"] == "StukUitgevoerd"]
+        days = DailySessionAnalyzer(self.production_day_start_hour)
+        for day, day_store in store.split_days(self.production_day_start_hour):
+            open_stop_at = days.close_current_day(day)
+            days.append_day(self.analyze_store_day(day_store, day, open_stop_at))
         
-        # Calculer les temps de première et dernière pièce
-        first_piece_time = stuk_events[0]["Timestamp"] if stuk_events else None
-        last_piece_time = stuk_events[-1]["Timestamp"] if stuk_events else None
-        total_pieces = len(stuk_events)
+        results = days.build_results(directory)
         
-        # Calculer la durée totale de production
-        production_duration = None
-        if first_piece_time and last_piece_time:
-            production_duration = (last_piece_time - first_piece_time).total_seconds() / 3600  # en heures
+        self.log_analysis_results(results)
+        return results
+
+    def analyze_store_day(self, store, day, open_stop_at=None):
+        """
+        Calcule les accumulateurs d'une journée de production à partir de ses
+        événements en colonnes.
+        
+        Args:
+            store: ColumnarEventStore des événements de la journée
+            day: Journée de production
+            open_stop_at: Début de la journée si un arrêt de la veille est en cours
+            
+        Returns:
+            MachinePerformanceAnalyzer: Analyseur prêt pour build_results()
+        """
+        analyzer = MachinePerformanceAnalyzer(log_date=day)
+        analyzer.event_count = len(store)
+        analyzer.first_event_time = open_stop_at or store.timestamp(0)
+        analyzer.last_event_time = store.timestamp(len(store) - 1)
+        
+        # === PIÈCES PRODUITES ===
+        piece_indices = store.indices(EVENT_PIECE)
+        if len(piece_indices):
+            analyzer.first_piece_time = store.timestamp(piece_indices[0])
+            analyzer.last_piece_time = store.timestamp(piece_indices[-1])
+        analyzer.total_pieces = len(piece_indices)
+        analyzer.piece_events = [
+            {"Timestamp": event["Timestamp"], "Piece": event["Details"]}
+            for event in store.events(EVENT_PIECE)
+        ]
+        
+        # === DÉMARRAGES / ARRÊTS ===
+        start_indices = store.indices(EVENT_START)
+        if len(start_indices):
+            analyzer.first_machine_start = store.timestamp(start_indices[0])
+        stop_indices = store.indices(EVENT_STOP)
+        if len(stop_indices):
+            analyzer.last_machine_stop = store.timestamp(stop_indices[-1])
+        
+        # Dernier MachineStop/MachineStart: nécessaire pour reprendre l'analyse ensuite
+        last_indices = [indices[-1] for indices in (start_indices, stop_indices) if len(indices)]
+        if last_indices:
+            last_index = max(last_indices)
+            analyzer.previous_stop_event = {
+                "Event": "MachineStart" if len(start_indices) and start_indices[-1] == last_index else "MachineStop",
+                "Timestamp": store.timestamp(last_index)
+            }
+        elif open_stop_at is not None:
+            # Machine à l'arrêt toute la journée
+            analyzer.previous_stop_event = {"Event": "MachineStop", "Timestamp": open_stop_at}
+        
+        stop_starts, stop_ends = store.stop_periods(
+            None if open_stop_at is None else to_epoch_seconds(open_stop_at)
+        )
+        stop_durations = stop_ends - stop_starts
+        analyzer.stop_starts = array('d', stop_starts.tolist())
+        analyzer.stop_ends = array('d', stop_ends.tolist())
+        analyzer.stop_periods = [
+            {"Start": start, "End": end, "Duration": float(duration)}
+            for start, end, duration in zip(
+                stop_starts.astype('datetime64[s]').tolist(),
+                stop_ends.astype('datetime64[s]').tolist(),
+                stop_durations.tolist()
+            )
+        ]
+        if len(stop_durations):
+            analyzer.total_stop_time = float(stop_durations.sum())
+        
+        # === ATTENTES ET JOBS (extraction dans le texte des détails) ===
+        for event in store.events(EVENT_WAIT):
+            analyzer.on_wait(event)
+        for event in store.events(EVENT_JOB):
+            analyzer.on_job_profile(event)
+        
+        return analyzer
+
+    def analyze_log_file(self, directory, filename, cu_type, stats=None, checkpoint=None):
+        """
+        Lit et analyse un fichier LOG en une seule passe, sans matérialiser la
+        liste des événements: l'analyse démarre dès les premières lignes lues.
+        
+        Args:
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier à analyser
+            cu_type: Type de centre d'usinage
+            stats: Dictionnaire optionnel mis à jour avec les compteurs de lecture
+                   et la durée totale de lecture et d'analyse ('seconds')
+            checkpoint: Point de reprise (load_checkpoint) pour ne lire que les
+                        nouvelles lignes; son offset est avancé après l'analyse
+            
+        Returns:
+            list: Résultats de l'analyse par journée de production, ou None si erreur
+        """
+        started = time.perf_counter()
+        if stats is None:
+            stats = {}
+        
+        try:
+            # Construire le chemin complet du fichier
+            file_path = os.path.join(self.logs_directory, directory, filename)
+            
+            if not os.path.exists(file_path):
+                logger.error(f"❌ Fichier non trouvé: {file_path}")
+                return None
+            
+            start_offset = 0
+            state = None
+            complete_lines_only = False
+            if checkpoint is not None:
+                start_offset = checkpoint["offset"]
+                state = checkpoint["etat"]
+                complete_lines_only = checkpoint["complete_lines_only"]
+                if start_offset:
+                    logger.info(f"⏩ Reprise de {directory}/{filename} à l'octet {start_offset}")
+            
+            events = self.iter_log_events(file_path, stats, start_offset, complete_lines_only)
+            
+            results = self.analyze_events(events, filename, cu_type, directory, state)
+            
+            if checkpoint is not None:
+                checkpoint["offset"] = stats["offset"]
+            return results
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'analyse de {directory}/{filename}: {e}")
+            return None
+        finally:
+            stats['seconds'] = stats.get('seconds', 0) + time.perf_counter() - started
+
+    def load_checkpoint(self, directory, filename, force=False):
+        """
+        Prépare la lecture incrémentale d'un fichier LOG à partir de son point de reprise.
+        
+        Le point de reprise n'est utilisé que si le fichier est toujours le même
+        (même inode) et n'a pas été tronqué; sinon le fichier est relu en entier.
+        
+        Args:
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier LOG
+            force: Si True, ignore le point de reprise existant (relecture complète)
+            
+        Returns:
+            dict: Point de reprise {"chemin_fichier", "inode", "taille", "offset",
+                  "etat", "complete_lines_only", "stat"}
+        """
+        file_path = os.path.join(self.logs_directory, directory, filename)
+        file_stat = os.stat(file_path)
+        
+        checkpoint = {
+            "chemin_fichier": f"{directory}/{filename}",
+            "inode": file_stat.st_ino,
+            "taille": file_stat.st_size,
+            "offset": 0,
+            "etat": None,
+            # Fichier encore en cours d'écriture: ne pas lire une ligne incomplète
+            "complete_lines_only": time.time() - file_stat.st_mtime < self.settle_seconds,
+            "stat": file_stat,
+        }
+        
+        if force:
+            return checkpoint
+        
+        self.cur.execute("""
+            SELECT inode, dernier_offset, etat_analyse
+            FROM log_checkpoint WHERE chemin_fichier = %s
+        """, (checkpoint["chemin_fichier"],))
+        row = self.cur.fetchone()
+        
+        if row:
+            inode, last_offset, state = row
+            if inode == file_stat.st_ino and last_offset <= file_stat.st_size and state:
+                checkpoint["offset"] = last_offset
+                checkpoint["etat"] = state
+            else:
+                logger.info(f"🔄 {directory}/{filename} remplacé ou tronqué: retraitement complet")
+        
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint, session_id, results):
+        """
+        Enregistre le point de reprise d'un fichier (dans la transaction en cours).
+        
+        Args:
+            checkpoint: Point de reprise mis à jour par analyze_log_file
+            session_id: Session de production alimentée par le fichier
+            results: Résultats d'analyse contenant l'état à sauvegarder
+        """
+        state = results["Etat"]
+        self.cur.execute("""
+            INSERT INTO log_checkpoint (
+                chemin_fichier, inode, taille, dernier_offset, dernier_timestamp,
+                session_id, etat_analyse, date_maj
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (chemin_fichier) DO UPDATE SET
+                inode = EXCLUDED.inode,
+                taille = EXCLUDED.taille,
+                dernier_offset = EXCLUDED.dernier_offset,
+                dernier_timestamp = EXCLUDED.dernier_timestamp,
+                session_id = EXCLUDED.session_id,
+                etat_analyse = EXCLUDED.etat_analyse,
+                date_maj = CURRENT_TIMESTAMP
+        """, (
+            checkpoint["chemin_fichier"],
+            checkpoint["inode"],
+            checkpoint["taille"],
+            checkpoint["offset"],
+            _parse_datetime(state["last_event_time"]),
+            session_id,
+            Json(state)
+        ))
+
+    def forget_log_file(self, directory, filename):
+        """
+        Supprime le point de reprise et l'entrée du manifeste d'un fichier
+        (après suppression du fichier).
         
-        # === ANALYSE DES TEMPS D'ATTENTE ===
-        # Chercher tous les événements "MachineWait"
-        wait_events = [event for event in data if event["Event"] == "MachineWait"]
+        Args:
+            directory: Nom du dossier contenant le fichier
+            filename: Nom du fichier LOG
+        """
+        relative_path = f"{directory}/{filename}"
+        try:
+            self.cur.execute("DELETE FROM log_checkpoint WHERE chemin_fichier = %s", (relative_path,))
+            self.cur.execute("DELETE FROM log_manifest WHERE chemin_fichier = %s", (relative_path,))
+            self.conn.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Suivi de {relative_path} non supprimé: {e}")
+            self.conn.rollback()
+
+    def build_detail_rows(self, session_id, results):
+        """
+        Prépare les lignes des tables de détail d'une session.
         
-        total_wait_time = 0  # en secondes
-        wait_periods = []
+        Args:
+            session_id: ID de la session de production
+            results: Dictionnaire contenant tous les résultats d'analyse
+            
+        Returns:
+            list: [(table, colonnes, lignes), ...] dans l'ordre d'insertion
+        """
+        # Longueur arrondie comme la colonne DECIMAL(10,2), pour la comparer aux lignes stockées
+        jobs = [
+            (session_id, job["Reference"],
+             Decimal(str(job["Length"])).quantize(Decimal('0.01'), ROUND_HALF_UP),
+             job["Color"], job["Timestamp"])
+            for job in results["JobDetails"]
+        ]
+        waits = [
+            (session_id, wait["Start"], wait["End"], int(wait["Duration"]))
+            for wait in results["WaitPeriods"]
+        ]
+        stops = [
+            (session_id, stop["Start"], stop["End"], int(stop["Duration"]))
+            for stop in results["StopPeriods"]
+        ]
+        pieces = [
+            (session_id, i, piece["Timestamp"], piece["Piece"])
+            for i, piece in enumerate(results["PieceEvents"], results.get("PremierNumeroPiece", 1))
+        ]
         
-        # Analyser chaque période d'attente
-        for event in wait_events:
-            try:
-                # Chercher la durée dans les détails (format: "X sec" ou "X.X")
-                wait_matches = re.findall(r"(\d+) sec", str(event["Details"]))
-                wait_duration = 0
-                
-                if wait_matches:
-                    wait_duration = float(wait_matches[0])
-                else:
-                    # Chercher un nombre décimal
-                    decimal_matches = re.findall(r"(\d+\.\d+)", str(event["Details"]))
-                    if decimal_matches:
-                        wait_duration = float(decimal_matches[0])
-                
-                if wait_duration > 0:
-                    wait_start = event["Timestamp"]
-                    wait_end = wait_start + timedelta(seconds=wait_duration)
-                    wait_periods.append({
-                        "Start": wait_start,
-                        "End": wait_end,
-                        "Duration": wait_duration
-                    })
-                    total_wait_time += wait_duration
-                    
-            except Exception as e:
-                # Ignorer les événements qui ne peuvent pas être analysés
-                continue
+        return [
+            ("job_profil", ("session_id", "reference", "longueur", "couleur", "timestamp_debut"), jobs),
+            ("periode_attente", ("session_id", "timestamp_debut", "timestamp_fin", "duree_secondes"), waits),
+            ("periode_arret", ("session_id", "timestamp_debut", "timestamp_fin", "duree_secondes"), stops),
+            ("piece_production", ("session_id", "numero_piece", "timestamp_production", "details"), pieces),
+        ]
+
+    def copy_rows(self, table, columns, rows):
+        """
+        Insère des lignes en un seul aller-retour avec COPY FROM STDIN.
         
-        total_wait_hours = total_wait_time / 3600  # convertir en heures
+        Les colonnes absentes (date_creation) prennent leur valeur par défaut,
+        identique pour toute la transaction comme avec CURRENT_TIMESTAMP.
         
-        # === ANALYSE DES ARRÊTS VOLONTAIRES ===
-        # Chercher les événements de démarrage et d'arrêt de machine
-        stop_events = [event for event in data if event["Event"] in ["MachineStop", "MachineStart"]]
+        Args:
+            table: Nom de la table
+            columns: Noms des colonnes fournies
+            rows: Lignes à insérer (tuples dans l'ordre des colonnes)
+        """
+        if not rows:
+            return
         
-        # Trouver le dernier arrêt et le premier démarrage
-        machine_stop_events = [event for event in data if event["Event"] == "MachineStop"]
-        last_machine_stop = machine_stop_events[-1]["Timestamp"] if machine_stop_events else None
+        buffer = io.StringIO()
+        buffer.writelines(
+            "\t".join([_copy_value(value) for value in row]) + "\n"
+            for row in rows
+        )
+        buffer.seek(0)
+        self.cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+    def insert_rows(self, table, columns, rows):
+        """
+        Insère des lignes une par une (un INSERT par ligne).
         
-        machine_start_events = [event for event in data if event["Event"] == "MachineStart"]
-        first_machine_start = machine_start_events[0]["Timestamp"] if machine_start_events else None
+        Args:
+            table: Nom de la table
+            columns: Noms des colonnes fournies
+            rows: Lignes à insérer (tuples dans l'ordre des colonnes)
+        """
+        query = (f"INSERT INTO {table} ({', '.join(columns)}, date_creation) "
+                 f"VALUES ({', '.join(['%s'] * len(columns))}, CURRENT_TIMESTAMP)")
+        for row in rows:
+            self.cur.execute(query, row)
+
+    def write_session_details(self, session_id, results):
+        """
+        Sauvegarde les profils de jobs, périodes d'attente, périodes d'arrêt et
+        pièces produites d'une session (dans la transaction en cours).
         
-        total_stop_time = 0  # en secondes
-        stop_periods = []
+        Args:
+            session_id: ID de la session de production
+            results: Dictionnaire contenant tous les résultats d'analyse
+        """
+        write_rows = self.insert_rows if self.detail_write_mode == 'insert' else self.copy_rows
         
-        # Calculer les périodes d'arrêt (entre MachineStop et MachineStart)
-        if stop_events:
-            for i in range(len(stop_events) - 1):
-                if (stop_events[i]["Event"] == "MachineStop" and 
-                    stop_events[i + 1]["Event"] == "MachineStart"):
-                    
-                    stop_start = stop_events[i]["Timestamp"]
-                    stop_end = stop_events[i + 1]["Timestamp"]
-                    stop_duration = (stop_end - stop_start).total_seconds()
-                    
-                    stop_periods.append({
-                        "Start": stop_start,
-                        "End": stop_end,
-                        "Duration": stop_duration
-                    })
-                    total_stop_time += stop_duration
+        for table, columns, rows in self.build_detail_rows(session_id, results):
+            write_rows(table, columns, rows)
+
+    def detail_time_window(self, table, results):
+        """
+        Condition SQL limitant une table de détail à la plage couverte par le
+        fichier analysé dans la journée (PremierEvenement → DernierEvenement).
         
-        total_stop_hours = total_stop_time / 3600  # convertir en heures
+        Args:
+            table: Table de détail
+            results: Résultats d'analyse de la journée
+            
+        Returns:
+            tuple: (condition SQL à ajouter après "WHERE session_id = %s", paramètres)
+        """
+        first, last = results.get("PremierEvenement"), results.get("DernierEvenement")
+        if first is None or last is None:
+            return "", ()
+        return f" AND {DETAIL_TIME_COLUMNS[table]} BETWEEN %s AND %s", (first, last)
+
+    def session_has_other_rows(self, session_id, results):
+        """
+        Indique si la session contient des lignes de détail hors de la plage
+        couverte par le fichier, c'est-à-dire venant d'autres fichiers (journée
+        à cheval sur deux logs).
         
-        # === ANALYSE DES PROFILS DE JOBS ===
-        # Chercher tous les événements "JobProfiel"
-        job_events = [event for event in data if event["Event"] == "JobProfiel"]
+        Args:
+            session_id: ID de la session de production
+            results: Résultats d'analyse de la journée
+            
+        Returns:
+            bool: True si d'autres fichiers ont alimenté la session
+        """
+        first, last = results.get("PremierEvenement"), results.get("DernierEvenement")
+        if first is None or last is None:
+            return False
         
-        job_details = []
-        for event in job_events:
-            try:
-                job = event["Details"]
-                # Extraire les informations avec des expressions régulières
-                ref_match = re.search(r"R:(\w+)", job)      # Référence
-                length_match = re.search(r"L:(\d+\.\d+)", job)  # Longueur
-                color_match = re.search(r"C:(\w+)", job)    # Couleur
-                
-                if ref_match and length_match:
-                    ref = ref_match.group(1)
-                    length = float(length_match.group(1))
-                    color = color_match.group(1) if color_match else "N/A"
-                    timestamp = event["Timestamp"]
-                    
-                    job_details.append({
-                        "Reference": ref,
-                        "Length": length,
-                        "Color": color,
-                        "Timestamp": timestamp
-                    })
-            except:
-                # Ignorer les jobs qui ne peuvent pas être analysés
-                continue
+        queries = " UNION ALL ".join(
+            f"(SELECT 1 FROM {table} WHERE session_id = %s AND {column} NOT BETWEEN %s AND %s LIMIT 1)"
+            for table, column in DETAIL_TIME_COLUMNS.items()
+        )
+        self.cur.execute(f"SELECT EXISTS ({queries})", (session_id, first, last) * len(DETAIL_TIME_COLUMNS))
+        return self.cur.fetchone()[0]
+
+    def reconcile_session_details(self, session_id, results):
+        """
+        Réconcilie les tables de détail d'une session avec une nouvelle analyse
+        au lieu de tout supprimer puis réinsérer.
         
-        # === COLLECTE DES DÉTAILS DES PIÈCES ===
-        piece_events = []
-        for i, event in enumerate(stuk_events):
-            piece_events.append({
-                "Timestamp": event["Timestamp"],
-                "Piece": event["Details"]
-            })
+        Les lignes stockées et les nouvelles lignes sont appariées par clé
+        naturelle: (numero_piece, timestamp_production) pour les pièces (dont
+        les détails peuvent être mis à jour sur place), toutes les colonnes pour
+        les jobs et les périodes (une ligne modifiée est supprimée puis
+        réinsérée). Seules les lignes différentes sont écrites.
         
-        # === CALCUL DES INDICATEURS DE PERFORMANCE ===
-        if production_duration and production_duration > 0:
-            # Temps de production effectif = temps total - attentes - arrêts
-            effective_production_time = production_duration - total_wait_hours - total_stop_hours
-            total_available_time = production_duration
-            
-            # Calculer les pourcentages
-            occupation_rate = (effective_production_time / total_available_time) * 100
-            wait_rate = (total_wait_hours / total_available_time) * 100
-            stop_rate = (total_stop_hours / total_available_time) * 100
-        else:
-            effective_production_time = 0
-            occupation_rate = 0
-            wait_rate = 0
-            stop_rate = 0
+        Seules les lignes stockées de la plage couverte par le fichier
+        (detail_time_window) sont réconciliées: celles d'autres fichiers de la
+        même journée sont conservées.
         
-        # === RETOURNER TOUS LES RÉSULTATS ===
-        results = {
-            "CU_ID": cu_id,
-            "Date": log_date,
-            "PremierePiece": first_piece_time,
-            "DernierePiece": last_piece_time,
-            "PremierMachineStart": first_machine_start,
-            "DernierMachineStop": last_machine_stop,
-            "TotalPieces": total_pieces,
-            "DureeProduction": production_duration,
-            "TempsAttente": total_wait_hours,
-            "TempsArretVolontaire": total_stop_hours,
-            "TempsProductionEffectif": effective_production_time,
-            "TauxOccupation": occupation_rate,
-            "TauxAttente": wait_rate,
-            "TauxArretVolontaire": stop_rate,
-            "JobDetails": job_details,
-            "WaitPeriods": wait_periods,
-            "StopPeriods": stop_periods,
-            "PieceEvents": piece_events
-        }
+        Args:
+            session_id: ID de la session de production
+            results: Dictionnaire contenant tous les résultats d'analyse
+        """
+        write_rows = self.insert_rows if self.detail_write_mode == 'insert' else self.copy_rows
         
-        logger.info(f"✅ Analyse terminée: {total_pieces} pièces, {occupation_rate:.1f}% d'occupation")
-        return results
+        for table, columns, rows in self.build_detail_rows(session_id, results):
+            updatable = DETAIL_UPDATABLE_COLUMNS.get(table, ())
+            key_size = len(columns) - len(updatable)
+            window, window_params = self.detail_time_window(table, results)
+            
+            # Lignes stockées, regroupées par clé naturelle (hors session_id)
+            self.cur.execute(
+                f"SELECT id, {', '.join(columns[1:])} FROM {table} WHERE session_id = %s{window} ORDER BY id",
+                (session_id,) + window_params
+            )
+            stored = {}
+            for row in self.cur.fetchall():
+                stored.setdefault(row[1:key_size], []).append((row[0], row[key_size:]))
+            
+            to_insert = []
+            to_update = []
+            for row in rows:
+                matches = stored.get(row[1:key_size])
+                if not matches:
+                    to_insert.append(row)
+                    continue
+                row_id, stored_values = matches.pop(0)
+                if stored_values != row[key_size:]:
+                    to_update.append(row[key_size:] + (session_id, row_id))
+            
+            to_delete = [row_id for matches in stored.values() for row_id, _ in matches]
+            
+            # session_id dans les conditions: accès par l'index de chaque partition
+            if to_delete:
+                self.cur.execute(f"DELETE FROM {table} WHERE session_id = %s AND id = ANY(%s)",
+                                 (session_id, to_delete))
+            if to_update:
+                assignments = ', '.join(f"{column} = %s" for column in updatable)
+                execute_batch(self.cur, f"UPDATE {table} SET {assignments} WHERE session_id = %s AND id = %s",
+                              to_update)
+            write_rows(table, columns, to_insert)
+            
+            if to_insert or to_update or to_delete:
+                logger.info(f"🔄 {table}: {len(to_insert)} ajoutées, {len(to_update)} modifiées, "
+                            f"{len(to_delete)} supprimées")
 
-    def save_to_database(self, results, cu_type, log_file_name, directory):
+    def save_to_database(self, results, cu_type, log_file_name, directory, checkpoint=None):
         """
         Sauvegarde tous les résultats d'analyse dans la base de données.
         
         Cette fonction:
         1. Crée ou met à jour le centre d'usinage
-        2. Crée ou met à jour la session de production
+        2. Crée ou met à jour la session de production de chaque journée
         3. Sauvegarde tous les détails (jobs, périodes, pièces)
         
+        Toutes les journées d'un fichier sont écrites dans une seule transaction,
+        avec le point de reprise (rattaché à la session de la dernière journée).
+        
         Args:
-            results: Dictionnaire contenant tous les résultats d'analyse
+            results: Résultats d'analyse, un dictionnaire par journée de production
             cu_type: Type de centre d'usinage
             log_file_name: Nom du fichier LOG source
             directory: Nom du dossier FTP source
+            checkpoint: Point de reprise à enregistrer dans la même transaction
             
         Returns:
             bool: True si la sauvegarde réussit, False sinon
@@ -713,77 +2579,34 @@ class LogService:
             # Créer un nom unique pour ce centre d'usinage basé sur le dossier (machine)
             cu_name = directory  # Le nom du dossier correspond directement à la machine
             
-            # === ÉTAPE 1: CRÉER OU METTRE À JOUR LE CENTRE D'USINAGE ===
-            # Approche alternative : vérifier s'il existe déjà, sinon l'insérer
-            self.cur.execute("""
-                SELECT id FROM centre_usinage WHERE nom = %s
-            """, (cu_name,))
+            # === ÉTAPE 0: CRÉER LES PARTITIONS MENSUELLES NÉCESSAIRES ===
+            months = set(upcoming_months())
+            for day_results in results:
+                months.update(month_start(piece["Timestamp"]) for piece in day_results["PieceEvents"])
+                months.update(month_start(wait["Start"]) for wait in day_results["WaitPeriods"])
+                months.update(month_start(stop["Start"]) for stop in day_results["StopPeriods"])
+            self.ensure_partitions(months)
             
-            centre_result = self.cur.fetchone()
+            # === ÉTAPE 1: CRÉER OU METTRE À JOUR LE CENTRE D'USINAGE ===
+            # L'ID d'un centre déjà enregistré pendant ce passage est réutilisé
+            centre_key = (cu_name, cu_type)
+            centre_usinage_id = self._centre_ids.get(centre_key)
             
-            if centre_result:
-                # Mettre à jour le centre existant
-                centre_usinage_id = centre_result[0]
-                self.cur.execute("""
-                    UPDATE centre_usinage 
-                    SET type_cu = %s, description = %s
-                    WHERE id = %s
-                """, (cu_type, f'Centre d\'usinage {cu_type} - {directory}', centre_usinage_id))
-            else:
-                # Créer un nouveau centre
+            if centre_usinage_id is None:
+                # Upsert sur le nom (UNIQUE): une seule requête, sans course entre deux passages
                 self.cur.execute("""
                     INSERT INTO centre_usinage (nom, type_cu, description, actif, date_creation)
                     VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (nom) DO UPDATE SET
+                        type_cu = EXCLUDED.type_cu,
+                        description = EXCLUDED.description
                     RETURNING id;
                 """, (cu_name, cu_type, f'Centre d\'usinage {cu_type} - {directory}', True))
                 centre_usinage_id = self.cur.fetchone()[0]
             
-            # === ÉTAPE 2: CRÉER OU METTRE À JOUR LA SESSION DE PRODUCTION ===
-            # Approche alternative : vérifier s'il existe déjà, sinon l'insérer
-            self.cur.execute("""
-                SELECT id FROM session_production 
-                WHERE centre_usinage_id = %s AND date_production = %s
-            """, (centre_usinage_id, results["Date"]))
-            
-            session_result = self.cur.fetchone()
-            
-            if session_result:
-                # Mettre à jour la session existante
-                session_id = session_result[0]
-                self.cur.execute("""
-                    UPDATE session_production SET
-                        heure_premiere_piece = %s,
-                        heure_derniere_piece = %s,
-                        heure_premier_machine_start = %s,
-                        heure_dernier_machine_stop = %s,
-                        total_pieces = %s,
-                        duree_production_totale = %s,
-                        temps_attente = %s,
-                        temps_arret_volontaire = %s,
-                        temps_production_effectif = %s,
-                        taux_occupation = %s,
-                        taux_attente = %s,
-                        taux_arret_volontaire = %s,
-                        fichier_log_source = %s
-                    WHERE id = %s
-                """, (
-                    results["PremierePiece"], 
-                    results["DernierePiece"],
-                    results["PremierMachineStart"], 
-                    results["DernierMachineStop"], 
-                    results["TotalPieces"],
-                    Decimal(str(results["DureeProduction"] or 0)), 
-                    Decimal(str(results["TempsAttente"] or 0)),
-                    Decimal(str(results["TempsArretVolontaire"] or 0)), 
-                    Decimal(str(results["TempsProductionEffectif"] or 0)),
-                    Decimal(str(results["TauxOccupation"] or 0)), 
-                    Decimal(str(results["TauxAttente"] or 0)),
-                    Decimal(str(results["TauxArretVolontaire"] or 0)), 
-                    f"{directory}/{log_file_name}",
-                    session_id
-                ))
-            else:
-                # Créer une nouvelle session
+            # === ÉTAPE 2: CRÉER OU METTRE À JOUR LA SESSION DE PRODUCTION DE CHAQUE JOURNÉE ===
+            for day_results in results:
+                # Upsert sur (centre_usinage_id, date_production) (UNIQUE)
                 self.cur.execute("""
                     INSERT INTO session_production (
                         centre_usinage_id, date_production, heure_premiere_piece, heure_derniere_piece,
@@ -792,73 +2615,713 @@ class LogService:
                         temps_production_effectif, taux_occupation, taux_attente,
                         taux_arret_volontaire, fichier_log_source, date_creation
                     ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (centre_usinage_id, date_production) DO UPDATE SET
+                        heure_premiere_piece = EXCLUDED.heure_premiere_piece,
+                        heure_derniere_piece = EXCLUDED.heure_derniere_piece,
+                        heure_premier_machine_start = EXCLUDED.heure_premier_machine_start,
+                        heure_dernier_machine_stop = EXCLUDED.heure_dernier_machine_stop,
+                        total_pieces = EXCLUDED.total_pieces,
+                        duree_production_totale = EXCLUDED.duree_production_totale,
+                        temps_attente = EXCLUDED.temps_attente,
+                        temps_arret_volontaire = EXCLUDED.temps_arret_volontaire,
+                        temps_production_effectif = EXCLUDED.temps_production_effectif,
+                        taux_occupation = EXCLUDED.taux_occupation,
+                        taux_attente = EXCLUDED.taux_attente,
+                        taux_arret_volontaire = EXCLUDED.taux_arret_volontaire,
+                        fichier_log_source = EXCLUDED.fichier_log_source
                     RETURNING id;
                 """, (
                     centre_usinage_id, 
-                    results["Date"], 
-                    results["PremierePiece"], 
-                    results["DernierePiece"],
-                    results["PremierMachineStart"], 
-                    results["DernierMachineStop"], 
-                    results["TotalPieces"],
-                    Decimal(str(results["DureeProduction"] or 0)), 
-                    Decimal(str(results["TempsAttente"] or 0)),
-                    Decimal(str(results["TempsArretVolontaire"] or 0)), 
-                    Decimal(str(results["TempsProductionEffectif"] or 0)),
-                    Decimal(str(results["TauxOccupation"] or 0)), 
-                    Decimal(str(results["TauxAttente"] or 0)),
-                    Decimal(str(results["TauxArretVolontaire"] or 0)), 
+                    day_results["Date"], 
+                    day_results["PremierePiece"], 
+                    day_results["DernierePiece"],
+                    day_results["PremierMachineStart"], 
+                    day_results["DernierMachineStop"], 
+                    day_results["TotalPieces"],
+                    Decimal(str(day_results["DureeProduction"] or 0)), 
+                    Decimal(str(day_results["TempsAttente"] or 0)),
+                    Decimal(str(day_results["TempsArretVolontaire"] or 0)), 
+                    Decimal(str(day_results["TempsProductionEffectif"] or 0)),
+                    Decimal(str(day_results["TauxOccupation"] or 0)), 
+                    Decimal(str(day_results["TauxAttente"] or 0)),
+                    Decimal(str(day_results["TauxArretVolontaire"] or 0)), 
                     f"{directory}/{log_file_name}"
                 ))
                 session_id = self.cur.fetchone()[0]
+                
+                # === ÉTAPES 3 À 7: SAUVEGARDER JOBS, PÉRIODES ET PIÈCES ===
+                if day_results.get("Incremental"):
+                    # En ingestion incrémentale, les détails ne contiennent que les
+                    # nouvelles lignes: on les ajoute à la suite des lignes existantes
+                    self.write_session_details(session_id, day_results)
+                elif self.detail_sync_mode == 'reconcile':
+                    # Ne modifier que les lignes qui ont changé depuis le dernier traitement
+                    self.reconcile_session_details(session_id, day_results)
+                else:
+                    # Supprimer les anciennes données détaillées du fichier puis tout
+                    # réinsérer (pour éviter les doublons si on retraite le même fichier)
+                    for table in DETAIL_TIME_COLUMNS:
+                        window, window_params = self.detail_time_window(table, day_results)
+                        self.cur.execute(f"DELETE FROM {table} WHERE session_id = %s{window}",
+                                         (session_id,) + window_params)
+                    self.write_session_details(session_id, day_results)
+                
+                # Journée alimentée aussi par d'autres fichiers: les indicateurs du
+                # fichier sont partiels, ils sont recalculés à partir de toutes les lignes
+                if self.session_has_other_rows(session_id, day_results):
+                    self.update_session_kpis(session_ids=[session_id])
+                
+            # === ÉTAPE 8: ENREGISTRER LE POINT DE REPRISE DU FICHIER ===
+            if checkpoint is not None:
+                self.save_checkpoint(checkpoint, session_id, results[-1])
             
-            # === ÉTAPE 3: SUPPRIMER LES ANCIENNES DONNÉES DÉTAILLÉES ===
-            # (pour éviter les doublons si on retraite le même fichier)
-            self.cur.execute("DELETE FROM job_profil WHERE session_id = %s", (session_id,))
-            self.cur.execute("DELETE FROM periode_attente WHERE session_id = %s", (session_id,))
-            self.cur.execute("DELETE FROM periode_arret WHERE session_id = %s", (session_id,))
-            self.cur.execute("DELETE FROM piece_production WHERE session_id = %s", (session_id,))
+            # === ÉTAPE 9: CONFIRMER TOUTES LES MODIFICATIONS ===
+            self.conn.commit()
             
-            # === ÉTAPE 4: SAUVEGARDER LES PROFILS DE JOBS ===
-            for job in results["JobDetails"]:
-                self.cur.execute("""
-                    INSERT INTO job_profil (session_id, reference, longueur, couleur, timestamp_debut, date_creation)
-                    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-                """, (session_id, job["Reference"], Decimal(str(job["Length"])), job["Color"], job["Timestamp"]))
+            # Le centre existe désormais en base: mémoriser son ID pour les fichiers suivants
+            self._centre_ids[centre_key] = centre_usinage_id
+            logger.info(f"✅ Données sauvegardées avec succès pour {cu_name}")
+            return True
             
-            # === ÉTAPE 5: SAUVEGARDER LES PÉRIODES D'ATTENTE ===
-            for wait in results["WaitPeriods"]:
-                self.cur.execute("""
-                    INSERT INTO periode_attente (session_id, timestamp_debut, timestamp_fin, duree_secondes, date_creation)
-                    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                """, (session_id, wait["Start"], wait["End"], int(wait["Duration"])))
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la sauvegarde: {e}")
+            # En cas d'erreur, annuler toutes les modifications
+            # (et oublier les IDs mémorisés, qui seront relus au prochain fichier)
+            self.conn.rollback()
+            self._centre_ids.clear()
+            return False
+
+    def recompute_session_kpis(self, date_from=None, date_to=None, machines=None):
+        """
+        Recalcule les indicateurs des sessions de production à partir des lignes
+        de détail stockées (pièces, périodes d'attente et d'arrêt), sans relire
+        les fichiers LOG.
+        
+        Une seule requête ensembliste agrège les tables de détail par session:
+        nombre et horaires des pièces, durées d'attente et d'arrêt, et temps
+        d'indisponibilité = réunion des périodes d'attente et d'arrêt (range_agg,
+        multiranges PostgreSQL 14+) comprise entre la première et la dernière
+        pièce, comme à l'ingestion. Les horaires des premiers démarrages et
+        derniers arrêts, absents des tables de détail, ne sont pas modifiés.
+        
+        Args:
+            date_from: Première date de production à recalculer (None = sans limite)
+            date_to: Dernière date de production à recalculer (None = sans limite)
+            machines: Noms des centres d'usinage (dossiers) à recalculer (None = tous)
             
-            # === ÉTAPE 6: SAUVEGARDER LES PÉRIODES D'ARRÊT ===
-            for stop in results["StopPeriods"]:
-                self.cur.execute("""
-                    INSERT INTO periode_arret (session_id, timestamp_debut, timestamp_fin, duree_secondes, date_creation)
-                    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                """, (session_id, stop["Start"], stop["End"], int(stop["Duration"])))
+        Returns:
+            int: Nombre de sessions recalculées, ou None en cas d'erreur
+        """
+        try:
+            logger.info(f"🧮 Recalcul des indicateurs des sessions "
+                        f"({date_from or '...'} → {date_to or '...'}, {', '.join(machines) if machines else 'toutes machines'})")
             
-            # === ÉTAPE 7: SAUVEGARDER LES PIÈCES PRODUITES ===
-            for i, piece in enumerate(results["PieceEvents"], 1):
-                self.cur.execute("""
-                    INSERT INTO piece_production (session_id, numero_piece, timestamp_production, details, date_creation)
-                    VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
-                """, (session_id, i, piece["Timestamp"], piece["Piece"]))
+            updated = self.update_session_kpis(date_from, date_to, machines)
+            self.conn.commit()
+            logger.info(f"✅ {updated} sessions recalculées")
+            return updated
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur lors du recalcul des indicateurs: {e}")
+            self.conn.rollback()
+            return None
+
+    def update_session_kpis(self, date_from=None, date_to=None, machines=None, session_ids=None):
+        """
+        Requête ensembliste de recalcul des indicateurs des sessions (dans la
+        transaction en cours, voir recompute_session_kpis).
+        
+        Args:
+            date_from: Première date de production (None = sans limite)
+            date_to: Dernière date de production (None = sans limite)
+            machines: Noms des centres d'usinage (None = tous)
+            session_ids: IDs des sessions (None = toutes)
+            
+        Returns:
+            int: Nombre de sessions mises à jour
+        """
+        self.cur.execute("""
+            WITH sessions AS (
+                SELECT s.id
+                FROM session_production s
+                JOIN centre_usinage c ON c.id = s.centre_usinage_id
+                WHERE (%(date_from)s::date IS NULL OR s.date_production >= %(date_from)s::date)
+                  AND (%(date_to)s::date IS NULL OR s.date_production <= %(date_to)s::date)
+                  AND (%(machines)s::text[] IS NULL OR c.nom = ANY(%(machines)s::text[]))
+                  AND (%(session_ids)s::int[] IS NULL OR s.id = ANY(%(session_ids)s::int[]))
+            ),
+            pieces AS (
+                SELECT session_id,
+                       count(*) AS total_pieces,
+                       min(timestamp_production) AS premiere_piece,
+                       max(timestamp_production) AS derniere_piece
+                FROM piece_production
+                WHERE session_id IN (SELECT id FROM sessions)
+                GROUP BY session_id
+            ),
+            periodes AS (
+                SELECT session_id, TRUE AS attente, timestamp_debut, timestamp_fin
+                FROM periode_attente
+                WHERE session_id IN (SELECT id FROM sessions)
+                UNION ALL
+                SELECT session_id, FALSE, timestamp_debut, timestamp_fin
+                FROM periode_arret
+                WHERE session_id IN (SELECT id FROM sessions)
+            ),
+            indisponibilites AS (
+                SELECT session_id,
+                       sum(extract(epoch FROM timestamp_fin - timestamp_debut)) FILTER (WHERE attente) AS attente,
+                       sum(extract(epoch FROM timestamp_fin - timestamp_debut)) FILTER (WHERE NOT attente) AS arret,
+                       range_agg(tsrange(timestamp_debut, timestamp_fin)) AS periodes
+                FROM periodes
+                GROUP BY session_id
+            ),
+            indicateurs AS (
+                SELECT s.id,
+                       coalesce(p.total_pieces, 0) AS total_pieces,
+                       p.premiere_piece,
+                       p.derniere_piece,
+                       coalesce(extract(epoch FROM p.derniere_piece - p.premiere_piece), 0) / 3600 AS duree,
+                       coalesce(i.attente, 0) / 3600 AS attente,
+                       coalesce(i.arret, 0) / 3600 AS arret,
+                       coalesce((
+                           SELECT sum(extract(epoch FROM upper(periode) - lower(periode)))
+                           FROM unnest(i.periodes * tsmultirange(tsrange(p.premiere_piece, p.derniere_piece))) AS periode
+                       ), 0) / 3600 AS indisponible
+                FROM sessions s
+                LEFT JOIN pieces p ON p.session_id = s.id
+                LEFT JOIN indisponibilites i ON i.session_id = s.id
+            )
+            UPDATE session_production sp SET
+                heure_premiere_piece = k.premiere_piece,
+                heure_derniere_piece = k.derniere_piece,
+                total_pieces = k.total_pieces,
+                duree_production_totale = k.duree,
+                temps_attente = k.attente,
+                temps_arret_volontaire = k.arret,
+                temps_production_effectif = CASE WHEN k.duree > 0 THEN k.duree - k.indisponible ELSE 0 END,
+                taux_occupation = CASE WHEN k.duree > 0 THEN (k.duree - k.indisponible) / k.duree * 100 ELSE 0 END,
+                taux_attente = CASE WHEN k.duree > 0 THEN k.attente / k.duree * 100 ELSE 0 END,
+                taux_arret_volontaire = CASE WHEN k.duree > 0 THEN k.arret / k.duree * 100 ELSE 0 END
+            FROM indicateurs k
+            WHERE sp.id = k.id
+        """, {
+            "date_from": date_from,
+            "date_to": date_to,
+            "machines": list(machines) if machines else None,
+            "session_ids": list(session_ids) if session_ids else None,
+        })
+        
+        return self.cur.rowcount
+
+    def try_advisory_lock(self, namespace, name):
+        """
+        Tente de prendre un verrou consultatif PostgreSQL de session, sans attendre.
+        
+        Le verrou est libéré par release_advisory_lock, ou automatiquement par
+        PostgreSQL si la connexion est perdue (pas de verrou orphelin).
+        
+        Args:
+            namespace: Espace de verrous (LOCK_NAMESPACE_DIRECTORY ou LOCK_NAMESPACE_FILE)
+            name: Nom de la ressource verrouillée (dossier ou chemin de fichier)
             
-            # === ÉTAPE 8: CONFIRMER TOUTES LES MODIFICATIONS ===
+        Returns:
+            bool: True si le verrou est obtenu, False s'il est détenu par une autre instance
+        """
+        self.cur.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", (namespace, name))
+        acquired = self.cur.fetchone()[0]
+        # Ne pas laisser de transaction ouverte: le verrou de session survit au commit
+        self.conn.commit()
+        return acquired
+
+    def release_advisory_lock(self, namespace, name):
+        """
+        Libère un verrou consultatif pris par try_advisory_lock.
+        
+        Args:
+            namespace: Espace de verrous
+            name: Nom de la ressource verrouillée
+        """
+        try:
+            self.cur.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", (namespace, name))
             self.conn.commit()
-            logger.info(f"✅ Données sauvegardées avec succès pour {cu_name}")
-            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Verrou {name} non libéré: {e}")
+            self.conn.rollback()
+
+    def process_log_file(self, directory, filename, cu_type, delete_after_processing, force=False):
+        """
+        Traite un fichier LOG sous verrou consultatif: si une autre instance du
+        service traite déjà ce fichier, il est ignoré.
+        
+        Args:
+            directory: Nom du dossier (machine) contenant le fichier
+            filename: Nom du fichier LOG
+            cu_type: Type de centre d'usinage
+            delete_after_processing: Si True, supprime le fichier après traitement
+            force: Si True, relit le fichier en entier même s'il a un point de reprise
+            
+        Returns:
+            bool: True si le fichier a été traité avec succès (ou ignoré), False sinon
+        """
+        relative_path = f"{directory}/{filename}"
+        try:
+            if not self.try_advisory_lock(LOCK_NAMESPACE_FILE, relative_path):
+                logger.info(f"🔒 {relative_path} en cours de traitement par une autre instance, ignoré")
+                return True
+        except Exception as e:
+            logger.error(f"❌ Impossible de verrouiller {relative_path}: {e}")
+            self.conn.rollback()
+            return False
+        
+        try:
+            return self.process_locked_log_file(directory, filename, cu_type, delete_after_processing, force)
+        finally:
+            self.release_advisory_lock(LOCK_NAMESPACE_FILE, relative_path)
+
+    def process_locked_log_file(self, directory, filename, cu_type, delete_after_processing, force=False):
+        """
+        Traite un fichier LOG: analyse, sauvegarde puis suppression optionnelle.
+        (appelée par process_log_file, verrou du fichier détenu)
+        
+        Args:
+            directory: Nom du dossier (machine) contenant le fichier
+            filename: Nom du fichier LOG
+            cu_type: Type de centre d'usinage
+            delete_after_processing: Si True, supprime le fichier après traitement
+            force: Si True, relit le fichier en entier même s'il a un point de reprise
+            
+        Returns:
+            bool: True si le fichier a été traité avec succès, False sinon
+        """
+        try:
+            job = self.prepare_log_file(directory, filename, cu_type, force)
+            if job is None:
+                return True
+            
+            # Lire le fichier en streaming et calculer les performances en une passe
+            results = self.analyze_log_file(directory, filename, cu_type, job["stats"], job["checkpoint"])
+            
+            return self.finish_log_file(job, results, delete_after_processing)
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur inattendue lors du traitement de {directory}/{filename}: {e}")
+            return False
+
+    def prepare_log_file(self, directory, filename, cu_type, force=False):
+        """
+        Prépare le traitement d'un fichier LOG: état du fichier et point de reprise.
+        
+        Args:
+            directory: Nom du dossier (machine) contenant le fichier
+            filename: Nom du fichier LOG
+            cu_type: Type de centre d'usinage
+            force: Si True, ignore le point de reprise existant
+            
+        Returns:
+            dict: Tâche {"directory", "filename", "cu_type", "file_stat", "checkpoint",
+                  "started", "stats", "stage_seconds"}, ou None si le fichier n'a
+                  pas changé depuis le dernier passage
+        """
+        logger.info(f"📄 Traitement de {directory}/{filename}...")
+        started = time.perf_counter()
+        
+        # État du fichier avant lecture (pour le manifeste des fichiers traités)
+        file_stat = os.stat(os.path.join(self.logs_directory, directory, filename))
+        
+        # Ingestion incrémentale: reprendre là où le dernier passage s'est arrêté
+        # (un fichier compressé ne peut pas être repris au milieu: relu en entier)
+        checkpoint = None
+        if self.incremental and not is_compressed_log(filename):
+            checkpoint = self.load_checkpoint(directory, filename, force)
+            file_stat = checkpoint["stat"]
+            if checkpoint["etat"] and checkpoint["offset"] == checkpoint["taille"]:
+                logger.info(f"⏭️ {directory}/{filename} inchangé depuis le dernier passage")
+                self.conn.rollback()
+                self.metrics.record_file(directory, "unchanged")
+                return None
+        
+        # Ne pas garder de transaction ouverte pendant la lecture et l'analyse
+        self.conn.rollback()
+        
+        return {
+            "directory": directory,
+            "filename": filename,
+            "cu_type": cu_type,
+            "file_stat": file_stat,
+            "checkpoint": checkpoint,
+            # Mesures pour les métriques: début du traitement, compteurs de
+            # lecture et d'analyse, durées des autres étapes
+            "started": started,
+            "stats": {},
+            "stage_seconds": {},
+        }
+
+    def finish_log_file(self, job, results, delete_after_processing):
+        """
+        Termine le traitement d'un fichier LOG analysé: sauvegarde des résultats
+        (et du point de reprise), suppression optionnelle, manifeste.
+        
+        Args:
+            job: Tâche retournée par prepare_log_file
+            results: Résultats de l'analyse (None si l'analyse a échoué)
+            delete_after_processing: Si True, supprime le fichier après traitement
+            
+        Returns:
+            bool: True si le fichier a été traité avec succès, False sinon
+        """
+        directory = job["directory"]
+        filename = job["filename"]
+        checkpoint = job["checkpoint"]
+        stage_seconds = job["stage_seconds"]
+        
+        if not results:
+            logger.error(f"❌ Échec du calcul des performances pour {filename}")
+            self.conn.rollback()
+            self.metrics.record_file(directory, "error", job["stats"], stage_seconds)
+            return False
+        
+        # Sauvegarder les résultats (et le point de reprise) en base de données
+        started = time.perf_counter()
+        saved = self.save_to_database(results, job["cu_type"], filename, directory, checkpoint)
+        stage_seconds["save"] = time.perf_counter() - started
+        if not saved:
+            logger.error(f"❌ Échec de la sauvegarde pour {filename}")
+            self.metrics.record_file(directory, "error", job["stats"], stage_seconds)
+            return False
+        
+        logger.info(f"✅ {directory}/{filename} traité avec succès")
+        
+        # Supprimer le fichier local si demandé (en mode archivage, le fichier
+        # est déplacé dans l'archive une fois sa journée terminée)
+        deleted = False
+        if delete_after_processing and not self.archive_after_processing:
+            started = time.perf_counter()
+            deleted = self.delete_log_file_from_directory(directory, filename)
+            stage_seconds["delete"] = time.perf_counter() - started
+            if deleted:
+                logger.info(f"🗑️ Fichier supprimé")
+                self.forget_log_file(directory, filename)
+            else:
+                logger.warning(f"⚠️ Fichier traité mais non supprimé")
+        
+        # Marquer le fichier comme traité s'il a été lu jusqu'au bout
+        # (une dernière ligne incomplète doit être relue au prochain passage)
+        if not deleted and (checkpoint is None or checkpoint["offset"] >= job["file_stat"].st_size):
+            self.record_processed_file(directory, filename, job["file_stat"])
+        
+        self.metrics.record_file(directory, "success", job["stats"], stage_seconds, count_detail_rows(results),
+                                 time.perf_counter() - job["started"], time.time())
+        return True
+
+    def get_parse_executor(self):
+        """
+        Processus d'analyse du pipeline, créé au premier besoin et conservé
+        jusqu'à close_connections (l'analyse, liée au CPU, ne partage pas le GIL
+        avec l'écriture en base).
+        
+        Returns:
+            ProcessPoolExecutor: Exécuteur à un processus
+        """
+        if self._parse_executor is None:
+            self._parse_executor = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._parse_executor
+
+    def process_files_pipelined(self, directory, log_files, cu_type, delete_after_processing, force=False):
+        """
+        Traite les fichiers d'un dossier en pipeline: lecture → analyse → écriture.
+        
+        Trois étages reliés par des files bornées (LOG_PIPELINE_DEPTH): un thread
+        demande au noyau de précharger les fichiers suivants (posix_fadvise), un
+        thread les fait analyser par le processus dédié, et le thread principal
+        (seul à utiliser la connexion) écrit les résultats en base. Le fichier N+1
+        est ainsi lu et analysé pendant que le fichier N est écrit; les files
+        bornées bloquent les étages en avance (contre-pression).
+        
+        Les files ne transportent que les fichiers à traiter, jamais leur contenu:
+        le processus d'analyse lit lui-même chaque fichier en streaming (mmap), la
+        mémoire reste bornée quelle que soit la taille des fichiers.
+        
+        Args:
+            directory: Nom du dossier (machine)
+            log_files: Noms des fichiers LOG à traiter
+            cu_type: Type de centre d'usinage
+            delete_after_processing: Si True, supprime les fichiers après traitement
+            force: Si True, relit les fichiers en entier même avec un point de reprise
+            
+        Returns:
+            tuple: (nombre de fichiers traités, nombre d'erreurs)
+        """
+        processed_count = 0
+        error_count = 0
+        
+        # Verrous et points de reprise pris en amont par le thread principal
+        jobs = []
+        for filename in log_files:
+            relative_path = f"{directory}/{filename}"
+            try:
+                if not self.try_advisory_lock(LOCK_NAMESPACE_FILE, relative_path):
+                    logger.info(f"🔒 {relative_path} en cours de traitement par une autre instance, ignoré")
+                    processed_count += 1
+                    continue
+                job = self.prepare_log_file(directory, filename, cu_type, force)
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de la préparation de {relative_path}: {e}")
+                self.conn.rollback()
+                self.release_advisory_lock(LOCK_NAMESPACE_FILE, relative_path)
+                error_count += 1
+                continue
+            
+            if job is None:
+                self.release_advisory_lock(LOCK_NAMESPACE_FILE, relative_path)
+                processed_count += 1
+            else:
+                jobs.append(job)
+        
+        # Verrous détenus pour des fichiers pas encore écrits
+        locked = {f"{job['directory']}/{job['filename']}" for job in jobs}
+        
+        stages = {name: PipelineStageStats(name) for name in ("lecture", "analyse", "écriture")}
+        read_queue = queue.Queue(maxsize=self.pipeline_depth)
+        parsed_queue = queue.Queue(maxsize=self.pipeline_depth)
+        stop = threading.Event()
+        
+        # Attentes interruptibles: le thread principal peut abandonner le pipeline
+        # (et ne pas attendre indéfiniment des étages amont arrêtés sans sentinelle)
+        def put(target, item):
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def get(source, producers=()):
+            while not stop.is_set():
+                try:
+                    return source.get(timeout=0.5)
+                except queue.Empty:
+                    if producers and not any(thread.is_alive() for thread in producers):
+                        # Étages amont terminés: plus rien n'arrivera après les éléments restants
+                        try:
+                            return source.get_nowait()
+                        except queue.Empty:
+                            return None
+            return None
+        
+        def read_stage():
+            try:
+                for job in jobs:
+                    started = time.perf_counter()
+                    try:
+                        prefetched = prefetch_log_file(
+                            os.path.join(self.logs_directory, job["directory"], job["filename"]),
+                            job["checkpoint"]["offset"] if job["checkpoint"] else 0
+                        )
+                        job["stage_seconds"]["read"] = time.perf_counter() - started
+                        stages["lecture"].add(job["stage_seconds"]["read"], prefetched)
+                    except Exception as e:
+                        # Le préchargement n'est qu'une optimisation: l'analyse lit le fichier
+                        logger.warning(f"⚠️ Préchargement de {job['directory']}/{job['filename']} impossible: {e}")
+                    if not put(read_queue, job):
+                        return
+            finally:
+                put(read_queue, None)
+        
+        def analyze_stage():
+            try:
+                while True:
+                    job = get(read_queue, threads[:1])
+                    if job is None:
+                        break
+                    started = time.perf_counter()
+                    results = None
+                    stats = {}
+                    try:
+                        # Analyse dans le processus dédié (hors GIL du thread d'écriture),
+                        # qui lit le fichier lui-même: seuls le chemin et le point de
+                        # reprise lui sont transmis
+                        results, stats, offset = self.get_parse_executor().submit(
+                            analyze_file_worker, self.logs_directory, job["directory"],
+                            job["filename"], job["cu_type"], job["checkpoint"]
+                        ).result()
+                        if job["checkpoint"] is not None:
+                            job["checkpoint"]["offset"] = offset
+                        job["stats"] = stats
+                    except Exception as e:
+                        logger.error(f"❌ Erreur lors de l'analyse de {job['directory']}/{job['filename']}: {e}")
+                    stages["analyse"].add(time.perf_counter() - started, stats.get('lines', 0))
+                    if not put(parsed_queue, (job, results)):
+                        return
+            finally:
+                put(parsed_queue, None)
+        
+        threads = [
+            threading.Thread(target=read_stage, name=f"lecture-{directory}", daemon=True),
+            threading.Thread(target=analyze_stage, name=f"analyse-{directory}", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        
+        # Étage d'écriture (thread principal)
+        try:
+            while True:
+                item = get(parsed_queue, threads)
+                if item is None:
+                    break
+                job, results = item
+                relative_path = f"{job['directory']}/{job['filename']}"
+                locked.discard(relative_path)
+                started = time.perf_counter()
+                try:
+                    if self.finish_log_file(job, results, delete_after_processing):
+                        processed_count += 1
+                    else:
+                        error_count += 1
+                except Exception as e:
+                    logger.error(f"❌ Erreur inattendue lors du traitement de {relative_path}: {e}")
+                    self.conn.rollback()
+                    error_count += 1
+                finally:
+                    self.release_advisory_lock(LOCK_NAMESPACE_FILE, relative_path)
+                stages["écriture"].add(time.perf_counter() - started, count_detail_rows(results or []))
+            
+            if locked:
+                logger.error(f"❌ Pipeline {directory} interrompu: {len(locked)} fichiers non traités")
+                error_count += len(locked)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            # Fichiers non écrits (pipeline interrompu): libérer leurs verrous
+            for relative_path in locked:
+                self.release_advisory_lock(LOCK_NAMESPACE_FILE, relative_path)
+        
+        logger.info(f"📊 Pipeline {directory}: " + ", ".join(
+            stage.summary(unit) for stage, unit in zip(stages.values(), ("octets", "lignes", "lignes"))
+        ))
+        return processed_count, error_count
+
+    def process_directory(self, directory, delete_after_processing, force=False, archives=None):
+        """
+        Traite tous les fichiers LOG d'un dossier de centre d'usinage.
+        
+        Args:
+            directory: Nom du dossier (machine) à traiter
+            delete_after_processing: Si True, supprime les fichiers après traitement
+            force: Si True, retraite tous les fichiers, même inchangés
+            archives: Si renseigné, retraite les fichiers archivés de ce mois
+                      ('YYYY-MM', '*' = toutes les archives) au lieu des fichiers déposés
             
+        Returns:
+            tuple: (nombre de fichiers traités, nombre d'erreurs)
+        """
+        cu_type = self.cu_directories[directory]
+        logger.info(f"\n📁 === TRAITEMENT DU DOSSIER {directory} (Type: {cu_type}) ===")
+        
+        # Un dossier n'est traité que par une instance à la fois: les instances
+        # concurrentes (cron qui se chevauchent, plusieurs conteneurs) se
+        # répartissent ainsi les dossiers au lieu de dupliquer le travail
+        try:
+            if not self.try_advisory_lock(LOCK_NAMESPACE_DIRECTORY, directory):
+                logger.info(f"🔒 Dossier {directory} en cours de traitement par une autre instance, ignoré")
+                return 0, 0
         except Exception as e:
-            logger.error(f"❌ Erreur lors de la sauvegarde: {e}")
-            # En cas d'erreur, annuler toutes les modifications
+            logger.error(f"❌ Impossible de verrouiller le dossier {directory}: {e}")
             self.conn.rollback()
-            return False
+            return 0, 1
+        
+        try:
+            if archives is not None:
+                # Retraitement de l'historique: les archives sont relues en entier
+                # et restent en place
+                log_files = self.get_archived_log_files(directory, archives)
+                force = True
+                delete_after_processing = False
+            else:
+                # Récupérer tous les fichiers LOG de ce dossier
+                log_files = self.get_log_files_from_directory(directory, force)
+            
+            if not log_files:
+                logger.info(f"Aucun fichier LOG nouveau ou modifié dans {directory}")
+                processed_count = error_count = 0
+            elif self.pipeline and len(log_files) > 1:
+                # Lecture, analyse et écriture de fichiers successifs en parallèle
+                processed_count, error_count = self.process_files_pipelined(
+                    directory, log_files, cu_type, delete_after_processing, force
+                )
+            else:
+                # Compteurs pour ce dossier
+                processed_count = 0
+                error_count = 0
+                
+                # Traiter chaque fichier LOG
+                for filename in log_files:
+                    if self.process_log_file(directory, filename, cu_type, delete_after_processing, force):
+                        processed_count += 1
+                    else:
+                        error_count += 1
+            
+            # Archiver les fichiers traités dont la journée est terminée
+            if self.archive_after_processing and archives is None:
+                self.archive_processed_files(directory)
+        finally:
+            self.release_advisory_lock(LOCK_NAMESPACE_DIRECTORY, directory)
+        
+        # Résumé pour ce dossier
+        logger.info(f"📊 Dossier {directory} terminé: {processed_count} fichiers traités, {error_count} erreurs")
+        return processed_count, error_count
+
+    def process_directories_in_parallel(self, cu_directories, delete_after_processing, workers, force=False,
+                                        archives=None):
+        """
+        Traite les dossiers de centres d'usinage en parallèle, un processus par dossier.
+        
+        Chaque processus a sa propre connexion à la base de données. Les
+        processus sont démarrés en mode 'spawn' pour ne pas hériter de la
+        connexion du processus principal.
+        
+        Args:
+            cu_directories: Liste des dossiers à traiter
+            delete_after_processing: Si True, supprime les fichiers après traitement
+            workers: Nombre maximum de processus
+            force: Si True, retraite tous les fichiers, même inchangés
+            archives: Mois des archives à retraiter (voir process_directory)
+            
+        Returns:
+            tuple: (nombre de fichiers traités, nombre d'erreurs) cumulés
+        """
+        total_processed = 0
+        total_errors = 0
+        workers = min(workers, len(cu_directories))
+        logger.info(f"⚙️ Traitement parallèle de {len(cu_directories)} dossiers avec {workers} processus")
+        
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = {
+                executor.submit(process_directory_worker, directory, delete_after_processing, force,
+                                archives): directory
+                for directory in cu_directories
+            }
+            
+            for future in as_completed(futures):
+                directory = futures[future]
+                try:
+                    processed_count, error_count, metrics = future.result()
+                    self.metrics.merge(metrics)
+                except Exception as e:
+                    logger.error(f"❌ Erreur du processus de traitement de {directory}: {e}")
+                    processed_count, error_count = 0, 1
+                
+                total_processed += processed_count
+                total_errors += error_count
+        
+        return total_processed, total_errors
 
-    def process_all_logs(self, delete_after_processing=True):
+    def process_all_logs(self, delete_after_processing=True, workers=None, force=False, archives=None):
         """
         Fonction principale qui traite tous les fichiers LOG du dossier partagé.
         
@@ -867,15 +3330,21 @@ class LogService:
         2. Vérifie l'accès au dossier logs
         3. Crée les tables nécessaires
         4. Explore tous les dossiers de centres d'usinage
-        5. Traite chaque fichier LOG trouvé
+        5. Traite chaque fichier LOG trouvé (un processus par dossier si workers > 1)
         6. Supprime les fichiers traités (optionnel)
         
         Args:
             delete_after_processing: Si True, supprime les fichiers après traitement
+            workers: Nombre de processus parallèles (par défaut LOG_WORKERS ou nombre de CPU)
+            force: Si True, retraite tous les fichiers, même déjà traités et inchangés
+            archives: Si renseigné, retraite les fichiers archivés de ce mois
+                      ('YYYY-MM', '*' = toutes les archives)
             
         Returns:
             bool: True si tout s'est bien passé, False s'il y a eu des erreurs
         """
+        started = time.perf_counter()
+        success = False
         try:
             logger.info("🚀 DÉBUT DU TRAITEMENT DE TOUS LES LOGS")
             
@@ -901,76 +3370,25 @@ class LogService:
                 logger.error("❌ Aucun dossier de centre d'usinage trouvé")
                 return False
             
-            # Variables pour compter les résultats
-            total_processed = 0
-            total_errors = 0
-            
             # === ÉTAPE 5: TRAITER CHAQUE DOSSIER ===
-            for directory in cu_directories:
-                cu_type = self.cu_directories[directory]
-                logger.info(f"\n📁 === TRAITEMENT DU DOSSIER {directory} (Type: {cu_type}) ===")
-                
-                # Récupérer tous les fichiers LOG de ce dossier
-                log_files = self.get_log_files_from_directory(directory)
-                
-                if not log_files:
-                    logger.warning(f"⚠️ Aucun fichier LOG trouvé dans {directory}")
-                    continue
-                
-                # Compteurs pour ce dossier
-                processed_count = 0
-                error_count = 0
-                
-                # === ÉTAPE 6: TRAITER CHAQUE FICHIER LOG ===
-                for filename in log_files:
-                    try:
-                        logger.info(f"📄 Traitement de {directory}/{filename}...")
-                        
-                        # Lire le fichier depuis le dossier local
-                        log_content = self.read_log_file_from_directory(directory, filename)
-                        if not log_content:
-                            logger.error(f"❌ Échec de la lecture de {filename}")
-                            error_count += 1
-                            continue
-                        
-                        # Analyser le contenu du fichier
-                        data = self.parse_log_content(log_content, filename)
-                        if not data:
-                            logger.error(f"❌ Échec de l'analyse de {filename}")
-                            error_count += 1
-                            continue
-                        
-                        # Calculer les performances de la machine
-                        results = self.analyze_machine_performance(data, filename, cu_type, directory)
-                        if not results:
-                            logger.error(f"❌ Échec du calcul des performances pour {filename}")
-                            error_count += 1
-                            continue
-                        
-                        # Sauvegarder les résultats en base de données
-                        if self.save_to_database(results, cu_type, filename, directory):
-                            logger.info(f"✅ {directory}/{filename} traité avec succès")
-                            
-                            # Supprimer le fichier local si demandé
-                            if delete_after_processing:
-                                if self.delete_log_file_from_directory(directory, filename):
-                                    logger.info(f"🗑️ Fichier supprimé")
-                                else:
-                                    logger.warning(f"⚠️ Fichier traité mais non supprimé")
-                            
-                            processed_count += 1
-                        else:
-                            logger.error(f"❌ Échec de la sauvegarde pour {filename}")
-                            error_count += 1
-                            
-                    except Exception as e:
-                        logger.error(f"❌ Erreur inattendue lors du traitement de {directory}/{filename}: {e}")
-                        error_count += 1
+            if workers is None:
+                workers = self.workers
+            
+            if workers > 1 and len(cu_directories) > 1:
+                total_processed, total_errors = self.process_directories_in_parallel(
+                    cu_directories, delete_after_processing, workers, force, archives
+                )
+            else:
+                # Variables pour compter les résultats
+                total_processed = 0
+                total_errors = 0
                 
-                # Résumé pour ce dossier
-                logger.info(f"📊 Dossier {directory} terminé: {processed_count} fichiers traités, {error_count} erreurs")
-                total_processed += processed_count
-                total_errors += error_count
+                for directory in cu_directories:
+                    processed_count, error_count = self.process_directory(
+                        directory, delete_after_processing, force, archives
+                    )
+                    total_processed += processed_count
+                    total_errors += error_count
             
             # === RÉSUMÉ FINAL ===
             logger.info(f"\n🎯 === TRAITEMENT GLOBAL TERMINÉ ===")
@@ -978,7 +3396,8 @@ class LogService:
             logger.info(f"❌ Total: {total_errors} erreurs rencontrées")
             
             # Retourner True seulement s'il n'y a eu aucune erreur
-            return total_errors == 0
+            success = total_errors == 0
+            return success
             
         except Exception as e:
             logger.error(f"❌ Erreur générale lors du traitement: {e}")
@@ -986,6 +3405,242 @@ class LogService:
         finally:
             # Toujours fermer les connexions à la fin
             self.close_connections()
+            self.export_metrics(time.perf_counter() - started, success)
+
+    def export_metrics(self, run_seconds=None, success=None):
+        """
+        Met à jour les métriques du passage et écrit le fichier des métriques
+        pour le collecteur textfile de node-exporter (si METRICS_TEXTFILE est défini).
+        
+        Args:
+            run_seconds: Durée du passage complet (secondes), si terminé
+            success: Résultat du passage complet, si terminé
+        """
+        self.metrics.set("log_ingestion_last_run_timestamp_seconds", time.time())
+        if run_seconds is not None:
+            self.metrics.set("log_ingestion_run_duration_seconds", run_seconds)
+        if success is not None:
+            self.metrics.set("log_ingestion_last_run_success", int(success))
+        
+        if self.metrics_textfile:
+            try:
+                self.metrics.write_textfile(self.metrics_textfile)
+            except OSError as e:
+                logger.warning(f"⚠️ Métriques non écrites dans {self.metrics_textfile}: {e}")
+
+    def ensure_connection(self):
+        """
+        Vérifie que la connexion à la base de données est ouverte et la rétablit
+        si elle a été perdue (mode démon).
+        
+        Returns:
+            bool: True si la connexion est utilisable, False sinon
+        """
+        if self.conn is not None and not self.conn.closed:
+            return True
+        
+        logger.warning("⚠️ Connexion à la base de données perdue, reconnexion...")
+        self._centre_ids.clear()
+        return self.connect_db()
+
+    def request_stop(self, signum=None, frame=None):
+        """Demande l'arrêt du démon à la fin du fichier en cours (SIGTERM/SIGINT)."""
+        logger.info("🛑 Arrêt du démon demandé")
+        self._stop_requested = True
+
+    def ingest_file(self, directory, filename, delete_after_processing):
+        """
+        Ingère un fichier signalé par la surveillance s'il est nouveau ou modifié.
+        
+        Args:
+            directory: Nom du dossier (machine) contenant le fichier
+            filename: Nom du fichier LOG
+            delete_after_processing: Si True, supprime le fichier après traitement
+            
+        Returns:
+            bool: True si le fichier a été traité ou ignoré sans erreur, False sinon
+        """
+        if not os.path.isfile(os.path.join(self.logs_directory, directory, filename)):
+            return True
+        
+        if not self.ensure_connection():
+            return False
+        
+        try:
+            if not self.filter_changed_files(directory, [filename]):
+                return True
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de la lecture du manifeste pour {directory}/{filename}: {e}")
+            self.conn.rollback()
+            return False
+        
+        return self.process_log_file(directory, filename, self.cu_directories[directory],
+                                     delete_after_processing)
+
+    def run_daemon(self, delete_after_processing=False):
+        """
+        Mode démon: surveille les dossiers des centres d'usinage et ingère chaque
+        fichier LOG quelques secondes après sa dernière modification, avec une
+        connexion à la base de données ouverte en permanence.
+        
+        Le démon ne s'arrête que sur SIGTERM/SIGINT: si la base de données ou le
+        dossier de logs sont inaccessibles (au démarrage du conteneur, la base
+        peut ne pas être prête) ou après une erreur fatale, la surveillance
+        redémarre après un délai doublé à chaque échec consécutif, de
+        restart_min_seconds à restart_max_seconds.
+        
+        Args:
+            delete_after_processing: Si True, supprime les fichiers après traitement
+            
+        Returns:
+            bool: True quand le démon s'est arrêté proprement
+        """
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        
+        delay = self.restart_min_seconds
+        while not self._stop_requested:
+            started = time.monotonic()
+            if self.run_daemon_session(delete_after_processing) or self._stop_requested:
+                break
+            
+            # Un démon qui a tourné longtemps avant l'échec repart du délai initial
+            if time.monotonic() - started >= self.restart_max_seconds:
+                delay = self.restart_min_seconds
+            
+            self.metrics.inc("log_ingestion_daemon_restarts_total")
+            self.export_metrics(success=False)
+            logger.warning(f"🔁 Redémarrage du démon dans {delay:.0f} s")
+            
+            # Attente interrompue par une demande d'arrêt
+            deadline = time.monotonic() + delay
+            while not self._stop_requested and time.monotonic() < deadline:
+                time.sleep(min(1.0, deadline - time.monotonic()))
+            delay = min(delay * 2, self.restart_max_seconds)
+        
+        logger.info("✅ Démon arrêté")
+        return True
+
+    def run_daemon_session(self, delete_after_processing=False):
+        """
+        Session de surveillance du démon, jusqu'à une demande d'arrêt ou un échec.
+        
+        Cette fonction:
+        1. Se connecte, vérifie le dossier de logs et crée les tables
+        2. Traite les fichiers déjà présents (rattrapage)
+        3. Surveille les dossiers (inotify, sinon scrutation)
+        4. Ingère un fichier quand il n'a plus été modifié depuis debounce_seconds
+           (ou au plus tard après max_delay_seconds s'il est modifié en continu)
+        5. Refait un passage complet toutes les rescan_seconds (nouveaux dossiers,
+           événements manqués, dernières lignes incomplètes)
+        
+        Args:
+            delete_after_processing: Si True, supprime les fichiers après traitement
+            
+        Returns:
+            bool: True si l'arrêt a été demandé, False en cas d'échec
+        """
+        watcher = None
+        metrics_server = None
+        try:
+            logger.info("🚀 DÉMARRAGE DU DÉMON D'INGESTION DES LOGS")
+            
+            if not self.connect_db():
+                logger.error("❌ Impossible de se connecter à la base de données")
+                return False
+            
+            if not self.check_logs_directory():
+                logger.error("❌ Impossible d'accéder au dossier de logs")
+                return False
+            
+            if not self.create_tables():
+                logger.error("❌ Impossible de créer les tables")
+                return False
+            
+            if self.metrics_port:
+                metrics_server = self.metrics.start_http_server(self.metrics_port)
+                logger.info(f"📈 Métriques Prometheus sur le port {self.metrics_port} (/metrics)")
+            
+            cu_directories = self.get_cu_directories_from_logs()
+            watcher = LogDirectoryWatcher(self.logs_directory, cu_directories,
+                                          self.watch_mode == 'inotify', self.poll_seconds)
+            logger.info(f"👀 Surveillance de {len(cu_directories)} dossiers ({watcher.mode})")
+            
+            # Passage initial: fichiers déposés pendant que le démon était arrêté
+            self.rescan_directories(cu_directories, delete_after_processing)
+            
+            pending = {}  # (dossier, fichier) -> (première modification, dernière modification)
+            next_rescan = time.monotonic() + self.rescan_seconds
+            next_export = 0
+            
+            while not self._stop_requested:
+                # Métriques: cycle du démon (détection d'un démon bloqué) et fichiers en attente
+                if time.monotonic() >= next_export:
+                    self.metrics.set("log_ingestion_pending_files", len(pending))
+                    self.export_metrics()
+                    next_export = time.monotonic() + 15
+                
+                # Attendre au plus jusqu'au prochain fichier prêt ou au prochain passage complet
+                now = time.monotonic()
+                deadline = next_rescan
+                for first_seen, last_seen in pending.values():
+                    deadline = min(deadline, last_seen + self.debounce_seconds,
+                                   first_seen + self.max_delay_seconds)
+                timeout = min(max(deadline - now, 0.1), 1.0)
+                
+                for key in watcher.wait(timeout):
+                    now = time.monotonic()
+                    first_seen = pending[key][0] if key in pending else now
+                    pending[key] = (first_seen, now)
+                
+                # Ingérer les fichiers stables (ou modifiés depuis trop longtemps)
+                now = time.monotonic()
+                ready = [
+                    key for key, (first_seen, last_seen) in pending.items()
+                    if now - last_seen >= self.debounce_seconds or now - first_seen >= self.max_delay_seconds
+                ]
+                for directory, filename in sorted(ready):
+                    if self._stop_requested:
+                        break
+                    del pending[(directory, filename)]
+                    self.ingest_file(directory, filename, delete_after_processing)
+                
+                # Passage complet périodique de rattrapage
+                if now >= next_rescan and not self._stop_requested:
+                    if self.ensure_connection():
+                        cu_directories = self.get_cu_directories_from_logs()
+                        watcher.add_directories(cu_directories)
+                        self.rescan_directories(cu_directories, delete_after_processing)
+                    next_rescan = time.monotonic() + self.rescan_seconds
+            
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Erreur fatale du démon: {e}")
+            return False
+        finally:
+            if watcher is not None:
+                watcher.close()
+            if metrics_server is not None:
+                metrics_server.shutdown()
+            self.close_connections()
+
+    def rescan_directories(self, cu_directories, delete_after_processing):
+        """
+        Passage complet du démon sur tous les dossiers (rattrapage), avec mise
+        à jour des métriques de passage.
+        
+        Args:
+            cu_directories: Dossiers des centres d'usinage
+            delete_after_processing: Si True, supprime les fichiers après traitement
+        """
+        started = time.perf_counter()
+        total_errors = 0
+        for directory in cu_directories:
+            if self._stop_requested:
+                break
+            total_errors += self.process_directory(directory, delete_after_processing)[1]
+        self.export_metrics(time.perf_counter() - started, total_errors == 0)
 
     def close_connections(self):
         """
@@ -994,6 +3649,11 @@ class LogService:
         """
         logger.info("🔌 Fermeture des connexions...")
         
+        # Arrêter le processus d'analyse du pipeline
+        if self._parse_executor is not None:
+            self._parse_executor.shutdown()
+            self._parse_executor = None
+        
         # Fermer le curseur de base de données
         if self.cur:
             try:
@@ -1010,6 +3670,243 @@ class LogService:
             except:
                 logger.warning("⚠️ Erreur lors de la fermeture de la base de données")
 
+    def analyze_events(self, events, log_file_name, cu_type, directory, state=None):
+        """
+        Analyse un flux d'événements parsés selon LOG_EVENT_STORE: en passe
+        unique, ou en colonnes NumPy (hors reprise d'une analyse précédente).
+        
+        Args:
+            events: Itérable d'événements parsés
+            log_file_name: Nom du fichier LOG
+            cu_type: Type de centre d'usinage
+            directory: Nom du dossier (machine) contenant le fichier
+            state: État d'une analyse précédente à reprendre (ingestion incrémentale)
+            
+        Returns:
+            list: Résultats de l'analyse par journée de production, ou None si aucun événement
+        """
+        if self.event_store_mode == 'columnar' and state is None:
+            store = ColumnarEventStore.from_events(events)
+            return self.analyze_event_store(store, log_file_name, cu_type, directory)
+        return self.analyze_machine_performance(events, log_file_name, cu_type, directory, state)
+
+    def get_dry_run_files(self, paths):
+        """
+        Liste les fichiers LOG à mesurer en mode dry-run.
+        
+        Args:
+            paths: Fichiers ou dossiers (parcourus récursivement)
+            
+        Returns:
+            list: Chemins des fichiers LOG, dans l'ordre des arguments puis trié
+        """
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                for root, directories, filenames in os.walk(path):
+                    directories.sort()
+                    files.extend(os.path.join(root, filename) for filename in sorted(filenames)
+                                 if is_log_file(filename))
+            else:
+                files.append(path)
+        return files
+
+    def dry_run_file(self, path):
+        """
+        Lit et analyse un fichier LOG comme l'ingestion, sans base de données,
+        en mesurant les temps de lecture et d'analyse.
+        
+        La machine est le premier dossier du chemin (en partant du fichier)
+        qui correspond à un centre d'usinage connu, sinon le dossier parent.
+        
+        Args:
+            path: Chemin du fichier LOG
+            
+        Returns:
+            dict: Rapport du fichier (volumes, événements par type, rejets,
+                  durées, débit et pic de mémoire du processus)
+        """
+        directory = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        for parent in reversed(os.path.abspath(path).split(os.sep)[:-1]):
+            if parent in self.cu_directories:
+                directory = parent
+                break
+        cu_type = self.cu_directories.get(directory, directory)
+        
+        stats = {}
+        counts = Counter()
+        report = {"path": path, "machine": directory}
+        started = time.perf_counter()
+        
+        try:
+            events = count_event_types(self.iter_log_events(path, stats), counts)
+            results = self.analyze_events(events, os.path.basename(path), cu_type, directory) or []
+        except Exception as e:
+            logger.error(f"❌ Erreur lors de l'analyse de {path}: {e}")
+            report["error"] = str(e)
+            results = []
+        
+        seconds = time.perf_counter() - started
+        parse_seconds = stats.get('parse_seconds', 0.0)
+        rejected_details = Counter()
+        for day_results in results:
+            rejected_details.update(day_results["Rejets"])
+        
+        report.update({
+            "bytes": stats.get('bytes', 0),
+            "lines": stats.get('lines', 0),
+            "events": stats.get('events', 0),
+            "rejected_lines": stats.get('rejected', 0),
+            "rejected_details": {event_type: count for event_type, count in rejected_details.items() if count},
+            "events_by_type": dict(counts.most_common()),
+            "sessions": len(results),
+            "detail_rows": count_detail_rows(results),
+            "parse_seconds": round(parse_seconds, 4),
+            "analysis_seconds": round(max(seconds - parse_seconds, 0.0), 4),
+            "seconds": round(seconds, 4),
+            "lines_per_second": round(stats.get('lines', 0) / seconds) if seconds else None,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+        return report
+
+    def dry_run(self, paths, workers=1):
+        """
+        Mode dry-run: lecture et analyse des fichiers LOG sans PostgreSQL, pour
+        mesurer le débit de l'ingestion sur des fichiers réels (dimensionnement).
+        
+        Les étapes sont celles de l'ingestion (lecture mmap ou décompression en
+        streaming, analyse selon LOG_EVENT_STORE et PRODUCTION_DAY_START_HOUR).
+        
+        Args:
+            paths: Fichiers ou dossiers à mesurer
+            workers: Nombre de processus d'analyse en parallèle (1 = séquentiel)
+            
+        Returns:
+            dict: Rapport (configuration, rapport de chaque fichier et totaux)
+        """
+        files = self.get_dry_run_files(paths)
+        workers = max(1, min(workers, len(files) or 1))
+        logger.info(f"🧪 Dry-run: {len(files)} fichiers, {workers} processus, analyse {self.event_store_mode}")
+        
+        started = time.perf_counter()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reports = list(executor.map(dry_run_worker, files))
+        else:
+            reports = [self.dry_run_file(path) for path in files]
+        seconds = time.perf_counter() - started
+        
+        totals = {"files": len(reports), "errors": sum(1 for report in reports if "error" in report)}
+        for key in ("bytes", "lines", "events", "rejected_lines", "sessions", "detail_rows"):
+            totals[key] = sum(report[key] for report in reports)
+        events_by_type = Counter()
+        rejected_details = Counter()
+        for report in reports:
+            events_by_type.update(report["events_by_type"])
+            rejected_details.update(report["rejected_details"])
+        
+        # Pic mémoire: processus principal, ou le plus gros des processus d'analyse
+        peaks = [peak_rss_mb()]
+        if workers > 1 and resource is not None:
+            peaks.append(peak_rss_mb(resource.RUSAGE_CHILDREN))
+        
+        totals.update({
+            "events_by_type": dict(events_by_type.most_common()),
+            "rejected_details": dict(rejected_details),
+            "parse_seconds": round(sum(report["parse_seconds"] for report in reports), 4),
+            "analysis_seconds": round(sum(report["analysis_seconds"] for report in reports), 4),
+            "wall_seconds": round(seconds, 4),
+            "lines_per_second": round(totals["lines"] / seconds) if seconds else None,
+            "megabytes_per_second": round(totals["bytes"] / seconds / 1e6, 2) if seconds else None,
+            "peak_rss_mb": None if peaks[0] is None else max(peaks),
+        })
+        
+        return {
+            "event_store": self.event_store_mode,
+            "production_day_start_hour": self.production_day_start_hour,
+            "workers": workers,
+            "cpu_count": os.cpu_count(),
+            "files": reports,
+            "total": totals,
+        }
+
+
+# Service propre au processus d'analyse du pipeline (créé à la première tâche)
+_pipeline_service = None
+
+
+def analyze_file_worker(logs_directory, directory, filename, cu_type, checkpoint):
+    """
+    Point d'entrée du processus d'analyse du pipeline: lit le fichier en
+    streaming à partir de son point de reprise et l'analyse.
+    
+    Args:
+        logs_directory: Dossier racine des logs du service appelant
+        directory: Nom du dossier contenant le fichier
+        filename: Nom du fichier LOG
+        cu_type: Type de centre d'usinage
+        checkpoint: Point de reprise (ou None)
+        
+    Returns:
+        tuple: (résultats de l'analyse ou None, compteurs de lecture,
+                nouvel offset du point de reprise ou None)
+    """
+    global _pipeline_service
+    if _pipeline_service is None:
+        _pipeline_service = LogService()
+    _pipeline_service.logs_directory = logs_directory
+    
+    stats = {}
+    results = _pipeline_service.analyze_log_file(directory, filename, cu_type, stats, checkpoint)
+    return results, stats, checkpoint["offset"] if checkpoint is not None else None
+
+
+# Service propre à chaque processus du mode dry-run (créé à la première tâche)
+_dry_run_service = None
+
+
+def dry_run_worker(path):
+    """
+    Point d'entrée d'un processus du mode dry-run: mesure un fichier LOG.
+    
+    Args:
+        path: Chemin du fichier LOG
+        
+    Returns:
+        dict: Rapport du fichier (LogService.dry_run_file)
+    """
+    global _dry_run_service
+    if _dry_run_service is None:
+        _dry_run_service = LogService()
+    return _dry_run_service.dry_run_file(path)
+
+
+def process_directory_worker(directory, delete_after_processing, force=False, archives=None):
+    """
+    Point d'entrée d'un processus de traitement parallèle.
+    
+    Chaque processus crée son propre service et sa propre connexion à la base
+    de données, traite un dossier de centre d'usinage puis se déconnecte.
+    
+    Args:
+        directory: Nom du dossier (machine) à traiter
+        delete_after_processing: Si True, supprime les fichiers après traitement
+        force: Si True, retraite tous les fichiers, même inchangés
+        archives: Mois des archives à retraiter (voir LogService.process_directory)
+        
+    Returns:
+        tuple: (nombre de fichiers traités, nombre d'erreurs, instantané des métriques)
+    """
+    service = LogService()
+    try:
+        if not service.connect_db():
+            logger.error(f"❌ Processus {directory}: impossible de se connecter à la base de données")
+            return 0, 1, service.metrics.snapshot()
+        processed_count, error_count = service.process_directory(directory, delete_after_processing, force, archives)
+        return processed_count, error_count, service.metrics.snapshot()
+    finally:
+        service.close_connections()
+
 
 def main():
     """
@@ -1019,6 +3916,13 @@ def main():
     Arguments en ligne de commande:
     - init : Initialise seulement la structure de dossiers
     - process : Traite les logs (par défaut)
+    - daemon : Surveille les dossiers et ingère les logs en continu
+    - reprocess-archives [YYYY-MM] : Retraite les fichiers archivés (tous ou d'un mois)
+    - recompute [AAAA-MM-JJ [AAAA-MM-JJ]] [--machines DEM12,SU12] : Recalcule les
+      indicateurs des sessions à partir des lignes de détail stockées
+    - dry-run <fichiers ou dossiers> [--workers N] : Lit et analyse les fichiers sans
+      base de données et affiche un rapport JSON (débit, événements, rejets, mémoire)
+    - --force : Retraite tous les fichiers, même déjà traités et inchangés
     """
     import sys
     
@@ -1037,12 +3941,81 @@ def main():
             logger.error("💥 Initialisation terminée avec des erreurs!")
         return
     
-    # Mode traitement normal (par défaut)
     # Lire la configuration depuis les variables d'environnement
     delete_after_sync = os.getenv('DELETE_AFTER_SYNC', 'false').lower() == 'true'
     
+    if len(sys.argv) > 1 and sys.argv[1] == 'daemon':
+        # Mode démon: ingestion continue jusqu'à SIGTERM
+        if not service.run_daemon(delete_after_processing=delete_after_sync):
+            sys.exit(1)
+        return
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'reprocess-archives':
+        # Retraitement de l'historique archivé (fichiers compressés lus en streaming)
+        month = sys.argv[2] if len(sys.argv) > 2 else '*'
+        logger.info(f"Retraitement des archives ({month})")
+        if not service.process_all_logs(delete_after_processing=False, archives=month):
+            logger.error("💥 Retraitement des archives terminé avec des erreurs!")
+            sys.exit(1)
+        logger.info("🎉 Retraitement des archives terminé avec succès!")
+        return
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'recompute':
+        # Recalcul des indicateurs des sessions en SQL, à partir des lignes de détail
+        args = sys.argv[2:]
+        machines = None
+        if '--machines' in args:
+            index = args.index('--machines')
+            machines = [name for name in ','.join(args[index + 1:index + 2]).split(',') if name]
+            del args[index:index + 2]
+        try:
+            dates = [date.fromisoformat(value) for value in args[:2]]
+        except ValueError:
+            logger.error("💥 Dates attendues au format AAAA-MM-JJ: recompute [début [fin]] [--machines DEM12,SU12]")
+            sys.exit(1)
+        date_from = dates[0] if dates else None
+        date_to = dates[1] if len(dates) > 1 else None
+        
+        updated = None
+        if service.connect_db() and service.create_tables():
+            updated = service.recompute_session_kpis(date_from, date_to, machines)
+        service.close_connections()
+        if updated is None:
+            logger.error("💥 Recalcul des indicateurs terminé avec des erreurs!")
+            sys.exit(1)
+        logger.info("🎉 Recalcul des indicateurs terminé avec succès!")
+        return
+    
+    if len(sys.argv) > 1 and sys.argv[1] == 'dry-run':
+        # Mesure de la lecture et de l'analyse seules (rapport JSON sur la sortie standard)
+        args = sys.argv[2:]
+        workers = 1
+        if '--workers' in args:
+            index = args.index('--workers')
+            try:
+                workers = int(args[index + 1])
+            except (IndexError, ValueError):
+                logger.error("💥 Nombre de processus attendu: dry-run <fichiers ou dossiers> [--workers N]")
+                sys.exit(1)
+            del args[index:index + 2]
+        if not args:
+            logger.error("💥 Aucun fichier: dry-run <fichiers ou dossiers> [--workers N]")
+            sys.exit(1)
+        
+        report = service.dry_run(args, workers)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        if report["total"]["errors"]:
+            sys.exit(1)
+        return
+    
+    # Mode traitement normal (par défaut)
+    
+    force = '--force' in sys.argv
+    if force:
+        logger.info("Mode forcé: tous les fichiers seront retraités")
+    
     # Traiter tous les logs selon la configuration
-    success = service.process_all_logs(delete_after_processing=delete_after_sync)
+    success = service.process_all_logs(delete_after_processing=delete_after_sync, force=force)
     
     if success:
         logger.info("🎉 Traitement terminé avec succès!")
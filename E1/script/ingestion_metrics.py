@@ -0,0 +1,245 @@
+"""
+Métriques de l'ingestion des logs machines, au format texte Prometheus.
+
+Le service enregistre pour chaque fichier traité les durées de chaque étape
+(lecture, parsing, analyse, sauvegarde, suppression, archivage), les octets et
+lignes lus, les lignes rejetées et les lignes de détail écrites. Les métriques
+sont exposées:
+- dans un fichier texte (collecteur textfile de node-exporter, METRICS_TEXTFILE)
+- sur un point d'accès HTTP /metrics en mode démon (METRICS_PORT)
+
+Les compteurs sont cumulés depuis le démarrage du processus; les processus de
+traitement parallèle renvoient un instantané fusionné par le processus principal.
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bornes (secondes) de l'histogramme des durées de traitement d'un fichier
+FILE_DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Description des métriques: nom -> (type, aide)
+METRICS = {
+    "log_ingestion_files_total": (
+        "counter", "Fichiers LOG traités, par dossier et statut (success, error, unchanged)"),
+    "log_ingestion_stage_seconds_total": (
+        "counter", "Temps passé par étape: read, parse, analyse, save, delete, archive "
+                   "(en lecture mmap, la lecture est comptée dans parse)"),
+    "log_ingestion_bytes_total": ("counter", "Octets de logs lus (décompressés)"),
+    "log_ingestion_lines_total": ("counter", "Lignes de logs lues"),
+    "log_ingestion_rejected_lines_total": ("counter", "Lignes de logs rejetées (format invalide)"),
+    "log_ingestion_rows_total": ("counter", "Lignes de détail sauvegardées (jobs, périodes, pièces)"),
+    "log_ingestion_file_duration_seconds": (
+        "histogram", "Durée de traitement d'un fichier, de la préparation à la sauvegarde"),
+    "log_ingestion_last_success_timestamp_seconds": (
+        "gauge", "Date du dernier fichier traité avec succès, par dossier"),
+    "log_ingestion_last_run_timestamp_seconds": (
+        "gauge", "Date du dernier passage complet (ou du dernier cycle du démon)"),
+    "log_ingestion_run_duration_seconds": ("gauge", "Durée du dernier passage complet"),
+    "log_ingestion_last_run_success": ("gauge", "1 si le dernier passage complet s'est terminé sans erreur"),
+    "log_ingestion_pending_files": ("gauge", "Fichiers modifiés en attente d'ingestion (démon)"),
+    "log_ingestion_daemon_restarts_total": (
+        "counter", "Redémarrages du démon après un échec (connexion impossible, erreur fatale)"),
+}
+
+
+def _escape(value):
+    """Échappe une valeur de label (antislash, guillemet, retour à la ligne)."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    """Labels (tuple de couples triés) au format {a="x",b="y"}."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    """Valeur numérique au format Prometheus."""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class IngestionMetrics:
+    """
+    Registre des métriques de l'ingestion (compteurs, jauges, histogrammes),
+    partagé entre threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}       # (nom, labels) -> valeur (compteurs et jauges)
+        self.histograms = {}   # (nom, labels) -> [compteurs par borne..., somme, nombre]
+
+    def inc(self, name, value=1, **labels):
+        """Incrémente un compteur."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Fixe la valeur d'une jauge."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = value
+
+    def observe(self, name, value, **labels):
+        """Ajoute une observation à un histogramme (FILE_DURATION_BUCKETS)."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.setdefault(key, [0] * (len(FILE_DURATION_BUCKETS) + 2))
+            for index, bound in enumerate(FILE_DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def record_file(self, directory, status, stats=None, stage_seconds=None, rows=0, duration=None,
+                    timestamp=None):
+        """
+        Enregistre le traitement d'un fichier LOG.
+
+        Args:
+            directory: Dossier (machine) du fichier
+            status: 'success', 'error' ou 'unchanged'
+            stats: Compteurs de lecture (bytes, lines, rejected, parse_seconds, seconds)
+            stage_seconds: Durées des étapes mesurées hors analyse {étape: secondes}
+            rows: Lignes de détail sauvegardées
+            duration: Durée totale de traitement du fichier (secondes)
+            timestamp: Date de fin de traitement (epoch), pour un succès
+        """
+        self.inc("log_ingestion_files_total", directory=directory, status=status)
+
+        if stats:
+            self.inc("log_ingestion_bytes_total", stats.get("bytes", 0), directory=directory)
+            self.inc("log_ingestion_lines_total", stats.get("lines", 0), directory=directory)
+            self.inc("log_ingestion_rejected_lines_total", stats.get("rejected", 0), directory=directory)
+            parse_seconds = stats.get("parse_seconds", 0.0)
+            self.inc("log_ingestion_stage_seconds_total", parse_seconds, directory=directory, stage="parse")
+            self.inc("log_ingestion_stage_seconds_total", max(stats.get("seconds", 0.0) - parse_seconds, 0.0),
+                     directory=directory, stage="analyse")
+
+        for stage, seconds in (stage_seconds or {}).items():
+            self.inc("log_ingestion_stage_seconds_total", seconds, directory=directory, stage=stage)
+
+        if rows:
+            self.inc("log_ingestion_rows_total", rows, directory=directory)
+        if duration is not None:
+            self.observe("log_ingestion_file_duration_seconds", duration, directory=directory)
+        if timestamp is not None:
+            self.set("log_ingestion_last_success_timestamp_seconds", timestamp, directory=directory)
+
+    def snapshot(self):
+        """
+        Copie des valeurs (transmissible entre processus).
+
+        Returns:
+            dict: {"values": {...}, "histograms": {...}}
+        """
+        with self.lock:
+            return {
+                "values": dict(self.values),
+                "histograms": {key: list(value) for key, value in self.histograms.items()},
+            }
+
+    def merge(self, snapshot):
+        """
+        Ajoute l'instantané d'un autre processus: les compteurs et histogrammes
+        sont additionnés, les jauges remplacées.
+
+        Args:
+            snapshot: Résultat de snapshot()
+        """
+        with self.lock:
+            for key, value in snapshot["values"].items():
+                if METRICS[key[0]][0] == "counter":
+                    self.values[key] = self.values.get(key, 0) + value
+                else:
+                    self.values[key] = value
+            for key, value in snapshot["histograms"].items():
+                histogram = self.histograms.setdefault(key, [0] * len(value))
+                for index, count in enumerate(value):
+                    histogram[index] += count
+
+    def render(self):
+        """
+        Métriques au format texte d'exposition Prometheus (version 0.0.4).
+
+        Returns:
+            str: Texte à servir sur /metrics ou à écrire dans un fichier .prom
+        """
+        with self.lock:
+            values = sorted(self.values.items())
+            histograms = sorted(self.histograms.items())
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            samples = [(labels, value) for (metric, labels), value in values if metric == name]
+            series = [(labels, value) for (metric, labels), value in histograms if metric == name]
+            if not samples and not series:
+                continue
+
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            for labels, histogram in series:
+                for bound, count in zip(FILE_DURATION_BUCKETS, histogram):
+                    bucket_labels = labels + (("le", _format_value(float(bound))),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {count}")
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {histogram[-1]}')
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-2])}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """
+        Écrit les métriques dans un fichier pour le collecteur textfile de
+        node-exporter (écriture dans un fichier temporaire puis renommage, pour
+        que le collecteur ne lise jamais un fichier partiel).
+
+        Args:
+            path: Chemin du fichier .prom
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temp_path, path)
+
+    def start_http_server(self, port, address=""):
+        """
+        Sert les métriques sur http://<address>:<port>/metrics dans un thread.
+
+        Args:
+            port: Port d'écoute
+            address: Adresse d'écoute (toutes les interfaces par défaut)
+
+        Returns:
+            ThreadingHTTPServer: Serveur démarré (shutdown() pour l'arrêter)
+        """
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Pas de ligne de log par requête de Prometheus
+                pass
+
+        server = ThreadingHTTPServer((address, port), MetricsHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
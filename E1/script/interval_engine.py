@@ -0,0 +1,186 @@
+"""
+Calculs sur des ensembles d'intervalles de temps (NumPy).
+
+Les attentes (MachineWait) et les arrêts (MachineStop -> MachineStart) d'une
+machine peuvent se chevaucher: additionner leurs durées compte deux fois le
+temps commun. Un IntervalSet range des intervalles [début, fin) dans deux
+tableaux float64 (secondes depuis l'epoch), triés et disjoints:
+- fusion (merge_intervals) et union: tri puis maximum cumulé, O(n log n)
+- intersection: recherche dichotomique des intervalles qui se recouvrent
+- découpage sur une fenêtre de temps (clip) et durée couverte
+
+Le module ne dépend que de NumPy et des dates naïves des logs: il peut servir
+à tout calcul de temps d'indisponibilité sur une plage quelconque (session de
+production, journée, requête de l'API).
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from log_event_store import EPOCH
+
+
+def to_seconds(value):
+    """Convertit un datetime naïf (ou un nombre de secondes) en secondes depuis l'epoch."""
+    if isinstance(value, datetime):
+        return (value - EPOCH).total_seconds()
+    return float(value)
+
+
+def merge_intervals(starts, ends):
+    """
+    Fusionne des intervalles quelconques en intervalles triés et disjoints.
+
+    Les intervalles vides ou inversés (fin <= début) sont ignorés; deux
+    intervalles qui se touchent sont réunis.
+
+    Args:
+        starts: Débuts des intervalles (secondes)
+        ends: Fins des intervalles (secondes)
+
+    Returns:
+        tuple: (débuts, fins) des intervalles fusionnés (tableaux float64)
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+    if not len(starts):
+        return starts, ends
+
+    order = np.argsort(starts, kind='stable')
+    starts, ends = starts[order], ends[order]
+
+    # Un intervalle ouvre un nouveau groupe s'il commence après la fin de tous les précédents
+    running_end = np.maximum.accumulate(ends)
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] > running_end[:-1]
+
+    group_first = np.flatnonzero(new_group)
+    group_last = np.append(group_first[1:] - 1, len(starts) - 1)
+    return starts[group_first], running_end[group_last]
+
+
+class IntervalSet:
+    """
+    Ensemble d'intervalles [début, fin) triés et disjoints, en secondes depuis l'epoch.
+    """
+
+    def __init__(self, starts=(), ends=()):
+        """
+        Args:
+            starts: Débuts des intervalles (dans n'importe quel ordre)
+            ends: Fins des intervalles
+        """
+        self.starts, self.ends = merge_intervals(starts, ends)
+
+    @classmethod
+    def _from_merged(cls, starts, ends):
+        """Construit un ensemble à partir de tableaux déjà triés et disjoints."""
+        intervals = cls.__new__(cls)
+        intervals.starts = starts
+        intervals.ends = ends
+        return intervals
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Construit un ensemble à partir de couples [début, fin].
+
+        Args:
+            pairs: Couples de secondes (par exemple l'état JSON d'une analyse)
+
+        Returns:
+            IntervalSet: Intervalles fusionnés
+        """
+        pairs = np.asarray(pairs, dtype=np.float64).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    @classmethod
+    def from_periods(cls, periods, start_key="Start", end_key="End"):
+        """
+        Construit un ensemble à partir de périodes {début, fin} en datetime
+        (WaitPeriods/StopPeriods des résultats d'analyse, lignes lues en base).
+
+        Args:
+            periods: Itérable de dictionnaires
+            start_key: Clé du début de la période
+            end_key: Clé de la fin de la période
+
+        Returns:
+            IntervalSet: Intervalles fusionnés
+        """
+        periods = list(periods)
+        return cls([to_seconds(period[start_key]) for period in periods],
+                   [to_seconds(period[end_key]) for period in periods])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __repr__(self):
+        return f"IntervalSet({len(self)} intervalles, {self.duration():.0f} s)"
+
+    def duration(self):
+        """Durée totale couverte (secondes)."""
+        return float((self.ends - self.starts).sum())
+
+    def union(self, *others):
+        """
+        Réunion avec d'autres ensembles.
+
+        Returns:
+            IntervalSet: Intervalles couverts par au moins un des ensembles
+        """
+        return IntervalSet(np.concatenate([self.starts] + [other.starts for other in others]),
+                           np.concatenate([self.ends] + [other.ends for other in others]))
+
+    def intersection(self, other):
+        """
+        Intersection avec un autre ensemble.
+
+        Pour chaque intervalle, les intervalles de other qui le recouvrent sont
+        trouvés par recherche dichotomique (les deux ensembles sont triés).
+
+        Returns:
+            IntervalSet: Intervalles couverts par les deux ensembles
+        """
+        first = np.searchsorted(other.ends, self.starts, side='right')
+        last = np.searchsorted(other.starts, self.ends, side='left')
+        counts = np.maximum(last - first, 0)
+        total = int(counts.sum())
+        if not total:
+            return IntervalSet()
+
+        # Couples (intervalle de self, intervalle de other) qui se recouvrent
+        own = np.repeat(np.arange(len(self)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        theirs = np.repeat(first, counts) + offsets
+
+        starts = np.maximum(self.starts[own], other.starts[theirs])
+        ends = np.minimum(self.ends[own], other.ends[theirs])
+        keep = ends > starts
+        return IntervalSet._from_merged(starts[keep], ends[keep])
+
+    def clip(self, start=None, end=None):
+        """
+        Restreint l'ensemble à une fenêtre de temps.
+
+        Args:
+            start: Début de la fenêtre (datetime ou secondes, None = sans limite)
+            end: Fin de la fenêtre (datetime ou secondes, None = sans limite)
+
+        Returns:
+            IntervalSet: Parties des intervalles comprises dans la fenêtre
+        """
+        lower = -np.inf if start is None else to_seconds(start)
+        upper = np.inf if end is None else to_seconds(end)
+        starts = np.maximum(self.starts, lower)
+        ends = np.minimum(self.ends, upper)
+        keep = ends > starts
+        return IntervalSet._from_merged(starts[keep], ends[keep])
+
+    def to_pairs(self):
+        """Couples [début, fin] sérialisables en JSON."""
+        return np.column_stack((self.starts, self.ends)).tolist()
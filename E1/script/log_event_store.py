@@ -0,0 +1,199 @@
+"""
+Stockage en colonnes (NumPy) des événements parsés d'un fichier LOG.
+
+Au lieu d'une liste de dictionnaires {"Timestamp", "Event", "Details"}
+(plus de 300 octets par événement), les événements sont rangés dans:
+- timestamps: secondes depuis l'epoch (int64)
+- codes: type d'événement codé sur un octet (uint8)
+- detail_offsets + details_buffer: détails concaténés en latin-1 et indexés
+  par leurs positions de début/fin
+
+Les calculs d'indicateurs (comptages, durées, première/dernière pièce)
+deviennent des opérations vectorisées sur ces tableaux.
+"""
+
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Codes des types d'événements utilisés par l'analyse
+EVENT_OTHER = 0
+EVENT_PIECE = 1
+EVENT_WAIT = 2
+EVENT_START = 3
+EVENT_STOP = 4
+EVENT_JOB = 5
+
+EVENT_CODES = {
+    "StukUitgevoerd": EVENT_PIECE,
+    "MachineWait": EVENT_WAIT,
+    "MachineStart": EVENT_START,
+    "MachineStop": EVENT_STOP,
+    "JobProfiel": EVENT_JOB,
+}
+
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+# Référence des timestamps: les dates des logs sont naïves (heure locale machine)
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+def to_epoch_seconds(timestamp):
+    """Convertit un datetime naïf en secondes depuis l'epoch."""
+    return ((timestamp.toordinal() - EPOCH_ORDINAL) * 86400
+            + timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second)
+
+
+def from_epoch_seconds(seconds):
+    """Convertit des secondes depuis l'epoch en datetime naïf."""
+    return EPOCH + timedelta(seconds=int(seconds))
+
+
+class ColumnarEventStore:
+    """
+    Représentation en colonnes des événements d'un fichier LOG.
+    """
+
+    def __init__(self, timestamps, codes, detail_offsets, details_buffer):
+        """
+        Args:
+            timestamps: Tableau int64 des timestamps (secondes depuis l'epoch)
+            codes: Tableau uint8 des types d'événements
+            detail_offsets: Tableau int64 de taille n+1 des positions des détails
+            details_buffer: Détails concaténés (bytes latin-1)
+        """
+        self.timestamps = timestamps
+        self.codes = codes
+        self.detail_offsets = detail_offsets
+        self.details_buffer = details_buffer
+
+    @classmethod
+    def from_events(cls, events):
+        """
+        Construit le stockage à partir d'un itérable d'événements parsés
+        (typiquement le générateur LogService.iter_log_events).
+
+        Args:
+            events: Itérable de dictionnaires {"Timestamp", "Event", "Details"}
+
+        Returns:
+            ColumnarEventStore: Événements rangés en colonnes
+        """
+        timestamps = array('q')
+        codes = array('B')
+        offsets = array('q', [0])
+        details = bytearray()
+        get_code = EVENT_CODES.get
+
+        for event in events:
+            timestamps.append(to_epoch_seconds(event["Timestamp"]))
+            codes.append(get_code(event["Event"], EVENT_OTHER))
+            details += event["Details"].encode('latin-1', 'replace')
+            offsets.append(len(details))
+
+        return cls(
+            np.frombuffer(timestamps, dtype=np.int64) if timestamps else np.empty(0, dtype=np.int64),
+            np.frombuffer(codes, dtype=np.uint8) if codes else np.empty(0, dtype=np.uint8),
+            np.frombuffer(offsets, dtype=np.int64),
+            bytes(details)
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        """Mémoire occupée par les colonnes (en octets)."""
+        return (self.timestamps.nbytes + self.codes.nbytes
+                + self.detail_offsets.nbytes + len(self.details_buffer))
+
+    def timestamp(self, index):
+        """Timestamp de l'événement index sous forme de datetime."""
+        return from_epoch_seconds(self.timestamps[index])
+
+    def datetimes(self, indices):
+        """Timestamps des événements indices, convertis en datetime en une opération."""
+        return self.timestamps[indices].astype('datetime64[s]').tolist()
+
+    def details(self, index):
+        """Détails de l'événement index (texte décodé)."""
+        start = self.detail_offsets[index]
+        end = self.detail_offsets[index + 1]
+        return self.details_buffer[start:end].decode('latin-1')
+
+    def indices(self, code):
+        """Positions des événements d'un type donné."""
+        return np.flatnonzero(self.codes == code)
+
+    def events(self, code):
+        """
+        Reconstruit les événements d'un type donné (pour les traitements qui
+        ont besoin du texte des détails, comme les expressions régulières).
+
+        Yields:
+            dict: Événement {"Timestamp", "Event", "Details"}
+        """
+        name = EVENT_NAMES[code]
+        indices = self.indices(code)
+        starts = self.detail_offsets[indices].tolist()
+        ends = self.detail_offsets[indices + 1].tolist()
+        buffer = self.details_buffer
+
+        for timestamp, start, end in zip(self.datetimes(indices), starts, ends):
+            yield {
+                "Timestamp": timestamp,
+                "Event": name,
+                "Details": buffer[start:end].decode('latin-1')
+            }
+
+    def split_days(self, day_start_hour=0):
+        """
+        Découpe les événements par journée de production. Comme l'analyse en
+        streaming, une nouvelle journée ne commence qu'avec un événement
+        postérieur à la fin de la journée en cours.
+
+        Args:
+            day_start_hour: Heure de début des journées de production
+
+        Returns:
+            list: Couples (journée, ColumnarEventStore de ses événements)
+        """
+        if not len(self):
+            return []
+
+        days = np.maximum.accumulate((self.timestamps - day_start_hour * 3600) // 86400)
+        bounds = np.flatnonzero(np.diff(days)) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(self)]
+
+        return [
+            ((EPOCH + timedelta(days=int(days[start]))).date(),
+             ColumnarEventStore(self.timestamps[start:end], self.codes[start:end],
+                                self.detail_offsets[start:end + 1], self.details_buffer))
+            for start, end in zip(starts, ends)
+        ]
+
+    def stop_periods(self, open_stop_at=None):
+        """
+        Périodes d'arrêt: un MachineStop immédiatement suivi (parmi les
+        événements MachineStop/MachineStart) d'un MachineStart.
+
+        Args:
+            open_stop_at: Début (secondes) d'un arrêt en cours avant le premier
+                          événement (arrêt qui se poursuit depuis la veille)
+
+        Returns:
+            tuple: (débuts, fins) en secondes depuis l'epoch (tableaux int64)
+        """
+        positions = np.flatnonzero((self.codes == EVENT_STOP) | (self.codes == EVENT_START))
+        codes = self.codes[positions]
+        pairs = (codes[:-1] == EVENT_STOP) & (codes[1:] == EVENT_START)
+        starts = self.timestamps[positions[:-1][pairs]]
+        ends = self.timestamps[positions[1:][pairs]]
+
+        if open_stop_at is not None and len(codes) and codes[0] == EVENT_START:
+            starts = np.concatenate(([open_stop_at], starts)).astype(np.int64)
+            ends = np.concatenate((self.timestamps[positions[:1]], ends))
+        return starts, ends
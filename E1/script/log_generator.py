@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Générateur de fichiers LOG synthétiques au format des machines
+(YYYYMMDD HH:MM:SS|@EventType: Details), pour mesurer le débit de
+l'ingestion sur des volumes réalistes.
+
+Chaque machine (DEM12, DEMALU, SU12) a son profil: proportions des types
+d'événements, références et longueurs des profils. Un fichier est produit
+par machine et par jour de production (<dossier>/<machine>/<machine>_YYYYMMDD.LOG),
+avec des fins de ligne CRLF et une part configurable de lignes mal formées.
+
+Utilisation:
+- python log_generator.py /tmp/logs                              # 1 jour pour chaque machine
+- python log_generator.py /tmp/logs --machines DEM12 --days 30 --rate 2
+- python log_generator.py /tmp/logs --mix piece=0.6,wait=0.2,job=0.1,stop=0.05,start=0.05
+- python log_generator.py /tmp/logs --malformed 0.01            # 1 % de lignes invalides
+"""
+
+import argparse
+import os
+import random
+from datetime import date, datetime, timedelta
+
+# Types d'événements générés: clé du mélange -> nom dans les logs
+EVENT_TYPES = {
+    "piece": "StukUitgevoerd",
+    "wait": "MachineWait",
+    "job": "JobProfiel",
+    "start": "MachineStart",
+    "stop": "MachineStop",
+    "other": "Info",
+}
+
+# Profils des machines: proportions des événements (stop/start: part cumulée
+# des arrêts, chaque MachineStop étant suivi d'un MachineStart à la fin de
+# l'arrêt), part du temps de production en attente et à l'arrêt, nombre de
+# références, longueurs des profils (mm) et nombre de couleurs
+MACHINE_PROFILES = {
+    "DEM12": {
+        "mix": {"piece": 0.45, "wait": 0.20, "job": 0.20, "stop": 0.05, "start": 0.05, "other": 0.05},
+        "wait_share": 0.15,
+        "stop_share": 0.10,
+        "references": 500,
+        "lengths": (300, 6500),
+        "colors": 30,
+    },
+    "DEMALU": {
+        "mix": {"piece": 0.40, "wait": 0.25, "job": 0.15, "stop": 0.07, "start": 0.07, "other": 0.06},
+        "wait_share": 0.20,
+        "stop_share": 0.15,
+        "references": 200,
+        "lengths": (500, 7000),
+        "colors": 12,
+    },
+    "SU12": {
+        "mix": {"piece": 0.55, "wait": 0.15, "job": 0.20, "stop": 0.03, "start": 0.03, "other": 0.04},
+        "wait_share": 0.10,
+        "stop_share": 0.05,
+        "references": 800,
+        "lengths": (200, 4500),
+        "colors": 40,
+    },
+}
+
+# Messages machine sans incidence sur l'analyse (latin-1, comme sur les machines)
+OTHER_MESSAGES = (
+    "Opérateur connecté",
+    "Changement d'outil",
+    "Lubrification effectuée",
+    "Porte de sécurité ouverte",
+)
+
+
+def parse_mix(text):
+    """
+    Convertit un mélange 'piece=0.5,wait=0.2,...' en dictionnaire.
+
+    Args:
+        text: Proportions séparées par des virgules (les clés absentes valent 0)
+
+    Returns:
+        dict: Proportions par clé de EVENT_TYPES
+
+    Raises:
+        ValueError: Si une clé est inconnue ou si la somme est nulle
+    """
+    mix = {}
+    for item in text.split(','):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key not in EVENT_TYPES:
+            raise ValueError(f"Type d'événement inconnu: {key} (attendus: {', '.join(EVENT_TYPES)})")
+        mix[key] = float(value)
+    if sum(mix.values()) <= 0:
+        raise ValueError("La somme des proportions doit être positive")
+    return mix
+
+
+def malformed_line(rng, timestamp):
+    """Ligne invalide, telle qu'on en trouve dans les logs réels."""
+    kind = rng.randrange(5)
+    if kind == 0:
+        # Séparateur absent
+        return f"{timestamp:%Y%m%d %H:%M:%S} StukUitgevoerd sans séparateur"
+    if kind == 1:
+        # Date invalide
+        return f"{timestamp:%Y}XX{timestamp:%d %H:%M:%S}|@MachineWait: Attente 5 sec"
+    if kind == 2:
+        # Ligne tronquée (coupure pendant l'écriture)
+        return f"{timestamp:%Y%m%d %H:}"
+    if kind == 3:
+        # Caractères nuls (bloc non écrit du fichier) puis ligne valide
+        return f"\x00\x00\x00{timestamp:%Y%m%d %H:%M:%S}|@Info: reprise après coupure"
+    # Profil dont la longueur n'est pas lisible (rejeté par l'extraction)
+    return f"{timestamp:%Y%m%d %H:%M:%S}|@JobProfiel: R:REF0 L:inconnue"
+
+
+def generate_log(path, machine="DEM12", day=date(2024, 6, 3), rate=1.0, mix=None,
+                 malformed=0.0, seed=42, start_hour=6, end_hour=22):
+    """
+    Génère le fichier LOG d'une journée de production d'une machine.
+
+    Les événements arrivent selon un processus de Poisson de débit rate
+    (événements par seconde) entre start_hour et end_hour. Les durées des
+    attentes et des arrêts sont tirées pour que leur part du temps de
+    production corresponde au profil de la machine.
+
+    Args:
+        path: Chemin du fichier à créer
+        machine: Machine simulée (clé de MACHINE_PROFILES)
+        day: Jour de production
+        rate: Débit moyen d'événements (par seconde)
+        mix: Proportions des types d'événements (profil de la machine par défaut)
+        malformed: Part des lignes mal formées (0 à 1)
+        seed: Graine du générateur aléatoire (fichiers reproductibles)
+        start_hour: Heure de début de production
+        end_hour: Heure de fin de production
+
+    Returns:
+        dict: Nombre de lignes générées par type d'événement (et 'malformed')
+    """
+    profile = MACHINE_PROFILES[machine]
+    mix = mix or profile["mix"]
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    min_length, max_length = profile["lengths"]
+
+    # Durées moyennes (secondes) d'une attente et d'un arrêt
+    total_weight = sum(weights)
+    wait_weight = mix.get("wait", 0) / total_weight
+    stop_weight = (mix.get("stop", 0) + mix.get("start", 0)) / total_weight
+    mean_wait = profile["wait_share"] / (rate * wait_weight) if wait_weight else 0
+    mean_stop = profile["stop_share"] / (rate * stop_weight) if stop_weight else 0
+
+    rng = random.Random(f"{seed}-{machine}-{day.isoformat()}")
+    shift_start = datetime(day.year, day.month, day.day, start_hour)
+    end = datetime(day.year, day.month, day.day, end_hour)
+    elapsed = 0.0
+    second = -1
+    stamp = None
+
+    counts = dict.fromkeys(kinds, 0)
+    counts["malformed"] = 0
+    restart_at = None
+    piece_number = 0
+    reference = f"REF{rng.randint(1, profile['references'])}"
+    length = rng.uniform(min_length, max_length)
+
+    lines = []
+    with open(path, 'wb') as file:
+        while True:
+            if restart_at is not None:
+                # Machine à l'arrêt: prochain événement = redémarrage
+                elapsed = restart_at
+            else:
+                elapsed += rng.expovariate(rate)
+
+            if int(elapsed) != second:
+                # Plusieurs événements par seconde: formater le timestamp une seule fois
+                second = int(elapsed)
+                timestamp = shift_start + timedelta(seconds=second)
+                if timestamp >= end:
+                    break
+                stamp = f"{timestamp:%Y%m%d %H:%M:%S}"
+
+            if restart_at is not None:
+                lines.append(f"{stamp}|@{EVENT_TYPES['start']}")
+                counts["start"] = counts.get("start", 0) + 1
+                restart_at = None
+            elif malformed and rng.random() < malformed:
+                lines.append(malformed_line(rng, timestamp))
+                counts["malformed"] += 1
+            else:
+                kind = rng.choices(kinds, weights)[0]
+                if kind in ("start", "stop"):
+                    # Arrêt: le redémarrage est programmé à la fin de l'arrêt
+                    kind = "stop"
+                    restart_at = elapsed + rng.expovariate(1 / mean_stop)
+                    details = None
+                elif kind == "piece":
+                    piece_number += 1
+                    details = f"{machine} {reference} L{length:.0f} N{piece_number}"
+                elif kind == "wait":
+                    duration = rng.expovariate(1 / mean_wait)
+                    if rng.random() < 0.5:
+                        details = f"Attente {max(1, round(duration))} sec"
+                    else:
+                        details = f"{duration:.2f}"
+                elif kind == "job":
+                    # Nouveau profil: les pièces suivantes en reprennent la référence
+                    reference = f"REF{rng.randint(1, profile['references'])}"
+                    length = rng.uniform(min_length, max_length)
+                    details = f"R:{reference} L:{length:.2f}"
+                    if rng.random() < 0.9:
+                        details += f" C:C{rng.randint(1, profile['colors'])}"
+                else:
+                    details = rng.choice(OTHER_MESSAGES)
+
+                counts[kind] = counts.get(kind, 0) + 1
+                event = EVENT_TYPES[kind]
+                lines.append(f"{stamp}|@{event}: {details}" if details else f"{stamp}|@{event}")
+
+            # Écriture par blocs pour les gros volumes
+            if len(lines) >= 10000:
+                file.write(('\r\n'.join(lines) + '\r\n').encode('latin-1'))
+                lines = []
+
+        if lines:
+            file.write(('\r\n'.join(lines) + '\r\n').encode('latin-1'))
+
+    return counts
+
+
+def generate_logs(directory, machines=tuple(MACHINE_PROFILES), days=1, first_day=date(2024, 6, 3),
+                  rate=1.0, mix=None, malformed=0.0, seed=42):
+    """
+    Génère les fichiers LOG de plusieurs machines sur plusieurs jours, dans
+    l'arborescence attendue par le service (<dossier>/<machine>/).
+
+    Args:
+        directory: Dossier racine des logs
+        machines: Machines simulées
+        days: Nombre de jours de production
+        first_day: Premier jour de production
+        rate: Débit moyen d'événements (par seconde)
+        mix: Proportions des types d'événements (profil de chaque machine par défaut)
+        malformed: Part des lignes mal formées (0 à 1)
+        seed: Graine du générateur aléatoire
+
+    Returns:
+        list: Couples (chemin du fichier, nombre de lignes par type)
+    """
+    generated = []
+    for machine in machines:
+        os.makedirs(os.path.join(directory, machine), exist_ok=True)
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            path = os.path.join(directory, machine, f"{machine}_{day:%Y%m%d}.LOG")
+            counts = generate_log(path, machine, day, rate, mix, malformed, seed)
+            generated.append((path, counts))
+    return generated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération de logs machines synthétiques")
+    parser.add_argument('directory', help="Dossier racine des logs (créé si besoin)")
+    parser.add_argument('--machines', nargs='+', default=list(MACHINE_PROFILES),
+                        choices=list(MACHINE_PROFILES), help="Machines simulées")
+    parser.add_argument('--days', type=int, default=1, help="Nombre de jours de production")
+    parser.add_argument('--first-day', type=date.fromisoformat, default=date(2024, 6, 3),
+                        help="Premier jour de production (YYYY-MM-DD)")
+    parser.add_argument('--rate', type=float, default=1.0, help="Événements par seconde")
+    parser.add_argument('--mix', type=parse_mix,
+                        help="Proportions des événements (piece=0.5,wait=0.2,job=0.2,stop=0.05,start=0.05)")
+    parser.add_argument('--malformed', type=float, default=0.0, help="Part des lignes mal formées (0 à 1)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire")
+    args = parser.parse_args()
+
+    generated = generate_logs(args.directory, args.machines, args.days, args.first_day,
+                              args.rate, args.mix, args.malformed, args.seed)
+    for path, counts in generated:
+        total = sum(counts.values())
+        detail = ", ".join(f"{kind}={count:,}" for kind, count in counts.items())
+        print(f"{path}: {total:,} lignes ({detail})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
+import io
 import os
+import sys
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import mysql.connector
 import psycopg2
-import pandas as pd
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 
 # Configuration du logging
+os.makedirs('/app/sync_logs', exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -17,6 +20,114 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Verrou consultatif PostgreSQL: une seule synchronisation (complète ou
+# incrémentale) écrit dans commandes_volets_roulants à la fois
+SYNC_LOCK_KEY = 0x4D595343  # 'MYSC'
+
+# Colonnes chargées dans commandes_volets_roulants (table de staging comprise);
+# (numero_commande, extension) identifie une commande
+COMMANDE_COLUMNS = ('numero_commande', 'extension', 'status', 'date_modification',
+                    'coffre', 'gestion_en_stock', 'date_synchronisation')
+
+# Caractères à échapper dans le format texte de COPY
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# Extraction des commandes de volets roulants (critères de la requête utilisée
+# dans l'entreprise). Les tables liées ne sont plus jointes directement à A_Kopf,
+# ce qui produisait un produit cartésien journal × accessoires × articles ×
+# événements par commande, regroupé puis dédoublonné dans pandas:
+# - journal et accessoires sont pré-agrégés par commande (date de la dernière
+#   planification, premier coffre par ordre alphabétique)
+# - la gestion en stock est un EXISTS sur les événements
+# - parmi les commandes de même numéro et extension, ROW_NUMBER retient celle
+#   gérée en stock en priorité, puis la plus récemment planifiée
+# A_KopfFreie et P_Artikel, dont aucune colonne n'était lue, ne sont plus interrogées.
+# Les emplacements {filtre_*} limitent l'extraction à une liste de commandes
+# (voir build_commandes_query); id_a_kopf et derniere_planification permettent
+# de refaire ce classement entre plusieurs lots (voir keep_first_ranked)
+COMMANDES_VOLETS_QUERY = """
+SELECT numero_commande, extension, status, date_modification, coffre, gestion_en_stock,
+    id_a_kopf, derniere_planification
+FROM (
+    SELECT
+        Cde.ID AS id_a_kopf,
+        Planification.derniere_planification,
+        Cde.AuNummer AS numero_commande,
+        Cde.AuAlpha AS extension,
+        Cde.AufStatus AS status,
+        DATE(Planification.derniere_planification) AS date_modification,
+        Coffre.coffre,
+        Cde.gestion_en_stock,
+        ROW_NUMBER() OVER (
+            PARTITION BY Cde.AuNummer, Cde.AuAlpha
+            ORDER BY Cde.gestion_en_stock DESC, Planification.derniere_planification DESC, Cde.ID
+        ) AS rang
+    FROM (
+        SELECT
+            Kopf.ID, Kopf.AuNummer, Kopf.AuAlpha, Kopf.AufStatus,
+            EXISTS (
+                SELECT 1 FROM A_Vorgang AS Vorgang
+                WHERE Vorgang.ID_A_Kopf = Kopf.ID AND Vorgang.Nummer LIKE '%VR%'
+            ) AS gestion_en_stock
+        FROM A_Kopf AS Kopf
+        WHERE (Kopf.AufStatus LIKE '%Planifiee%' OR Kopf.AufStatus LIKE '%lancer en prod%' OR Kopf.AufStatus LIKE '%vitrage%')
+            {filtre_kopf}
+    ) AS Cde
+    JOIN (
+        SELECT Logb.ID_A_Kopf, MAX(Logb.Datum) AS derniere_planification
+        FROM A_Logbuch AS Logb
+        WHERE Logb.Notiz LIKE '%cde Planifiee%'
+            {filtre_logbuch}
+        GROUP BY Logb.ID_A_Kopf
+    ) AS Planification ON Planification.ID_A_Kopf = Cde.ID
+    JOIN (
+        SELECT a.ID_A_Kopf, MIN(a.ZCode) AS coffre
+        FROM P_Zubeh AS a
+        WHERE (a.ZCode LIKE 'SOP%' OR a.ZCode LIKE 'S P %' OR a.ZCode LIKE 'S D %' OR a.ZCode LIKE 'S Q %' OR a.ZCode LIKE 'S T %' OR a.ZCode LIKE 'S TAB %' OR a.ZCode LIKE 'S TN %')
+            {filtre_zubeh}
+        GROUP BY a.ID_A_Kopf
+    ) AS Coffre ON Coffre.ID_A_Kopf = Cde.ID
+) AS commandes
+WHERE rang = 1
+ORDER BY numero_commande, extension
+"""
+
+
+def build_commandes_query(order_count=0):
+    """
+    Requête d'extraction des commandes de volets roulants. Avec order_count, elle
+    est limitée à order_count commandes (ID de A_Kopf) passées en paramètres trois
+    fois de suite: le filtre est répété dans chaque sous-requête pour que le
+    journal et les accessoires soient lus par index et non parcourus entièrement
+    """
+    if not order_count:
+        return COMMANDES_VOLETS_QUERY.format(filtre_kopf="", filtre_logbuch="", filtre_zubeh="")
+    
+    # mysql-connector ne remplace que les %s: les % des LIKE restent tels quels
+    placeholders = ", ".join(["%s"] * order_count)
+    return COMMANDES_VOLETS_QUERY.format(
+        filtre_kopf=f"AND Kopf.ID IN ({placeholders})",
+        filtre_logbuch=f"AND Logb.ID_A_Kopf IN ({placeholders})",
+        filtre_zubeh=f"AND a.ID_A_Kopf IN ({placeholders})"
+    )
+
+def keep_first_ranked(commandes):
+    """
+    Retient une ligne par commande (numéro, extension) avec le classement de
+    COMMANDES_VOLETS_QUERY, pour des lignes extraites en plusieurs lots (des
+    commandes de même numéro et extension peuvent tomber dans des lots différents)
+    """
+    # Tris stables successifs: ID croissant, puis planification décroissante
+    # (dates manquantes en dernier, comme NULL en MySQL), puis gestion en stock d'abord
+    ordered = sorted(commandes, key=lambda commande: commande['id_a_kopf'])
+    ordered.sort(key=lambda commande: commande['derniere_planification'] or datetime.min, reverse=True)
+    ordered.sort(key=lambda commande: commande['gestion_en_stock'], reverse=True)
+    
+    best = {}
+    for commande in ordered:
+        best.setdefault((commande['numero_commande'], commande['extension']), commande)
+    return list(best.values())
+
 class MySQLSyncService:
     def __init__(self):
         # Chargement des variables d'environnement
@@ -41,6 +152,12 @@ class MySQLSyncService:
             'host': os.getenv('POSTGRES_HOST')
         }
         
+        # Synchronisation incrémentale: marge de relecture des filigranes (minutes),
+        # pour les lignes validées après la lecture des maxima, et taille des lots
+        # de commandes réextraites
+        self.overlap_minutes = int(os.getenv('MYSQL_SYNC_OVERLAP_MINUTES') or 10)
+        self.batch_size = int(os.getenv('MYSQL_SYNC_BATCH_SIZE') or 500)
+        
         # Création de la table PostgreSQL si elle n'existe pas
         self.create_postgres_table()
 
@@ -58,6 +175,22 @@ class MySQLSyncService:
             date_synchronisation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             UNIQUE(numero_commande, extension)
         );
+        
+        -- Filigranes de la synchronisation incrémentale (dernier ID et dernière date lus par table MySQL)
+        CREATE TABLE IF NOT EXISTS mysql_sync_watermark (
+            source VARCHAR(50) PRIMARY KEY,
+            dernier_id BIGINT,
+            derniere_date TIMESTAMP,
+            date_maj TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        
+        -- Marqueurs de changement des commandes A_Kopf (empreinte du numéro et du statut)
+        CREATE TABLE IF NOT EXISTS mysql_sync_commande (
+            id_a_kopf VARCHAR(32) PRIMARY KEY,
+            numero_commande VARCHAR(20),
+            extension VARCHAR(5),
+            empreinte BIGINT
+        );
         """
         
         try:
@@ -185,76 +318,55 @@ class MySQLSyncService:
             if 'mysql_conn' in locals():
                 mysql_conn.close()
 
-    def get_commandes_volets_roulants(self):
-        """
-        Récupère les commandes de volets roulants depuis MySQL en utilisant la vraie requête
-        Cette requête correspond exactement à celle utilisée dans l'entreprise
+    def get_commandes_volets_roulants(self, order_ids=None):
         """
-        # Debug du contenu de la base de données
-        self.debug_database_content()
+        Récupère les commandes de volets roulants depuis MySQL, une ligne par
+        commande (numéro, extension), avec la requête COMMANDES_VOLETS_QUERY
         
-        # Requête avec gestion d'encodage multiple
-        query = """
-        SELECT 
-            Cde.AuNummer as numero_commande,
-            Cde.AuAlpha as extension, 
-            Cde.AufStatus as status,
-            DATE(Logb.Datum) as date_modification,
-            a.ZCode as coffre,
-            CASE WHEN Vorgang.Nummer LIKE '%VR%' THEN 1 ELSE 0 END AS gestion_en_stock
-        FROM A_Kopf AS Cde
-        LEFT JOIN A_KopfFreie AS cf ON Cde.ID = cf.ID_A_Kopf
-        LEFT JOIN A_Logbuch AS Logb ON Cde.ID = Logb.ID_A_Kopf
-        LEFT JOIN P_Zubeh AS a ON Cde.ID = a.ID_A_Kopf
-        LEFT JOIN P_Artikel AS Paramgen ON Cde.ID = Paramgen.ID_A_Kopf
-        LEFT JOIN A_Vorgang AS Vorgang ON Cde.ID = Vorgang.ID_A_Kopf
-        WHERE 
-            Logb.Notiz LIKE '%cde Planifiee%'
-            AND (Cde.AufStatus LIKE '%Planifiee%' OR Cde.AufStatus LIKE '%lancer en prod%' OR Cde.AufStatus LIKE '%vitrage%')
-            AND (a.ZCode LIKE 'SOP%' OR a.ZCode LIKE 'S P %' OR a.ZCode LIKE 'S D %' OR a.ZCode LIKE 'S Q %' OR a.ZCode LIKE 'S T %' OR a.ZCode LIKE 'S TAB %' OR a.ZCode LIKE 'S TN %')
-        GROUP BY Cde.AuNummer, Cde.AuAlpha, Cde.AufStatus, Logb.Datum, a.ZCode, Vorgang.Nummer
-        ORDER BY Cde.AuNummer, Cde.AuAlpha
+        order_ids limite l'extraction à ces commandes (ID de A_Kopf, synchronisation
+        incrémentale), interrogées par lots de MYSQL_SYNC_BATCH_SIZE
         """
+        if order_ids is None:
+            # Debug du contenu de la base de données
+            self.debug_database_content()
         
         try:
             mysql_conn = self.connect_mysql()
             cursor = mysql_conn.cursor(dictionary=True)
             
             logger.info("Exécution de la requête pour récupérer les commandes de volets roulants...")
-            logger.info(f"Requête: {query}")
-            
-            cursor.execute(query)
-            commandes = cursor.fetchall()
             
-            logger.info(f"Nombre total de lignes trouvées: {len(commandes)}")
-            
-            # Convertir en DataFrame pour traitement comme dans le code original
-            if commandes:
-                df = pd.DataFrame(commandes)
-                
-                # Convertir le numéro de commande en string
-                df['numero_commande'] = df['numero_commande'].astype(str)
-                
-                # Supprimer les doublons exacts
-                df.drop_duplicates(subset=['numero_commande','extension', 'gestion_en_stock'], inplace=True)
-                
-                # Trier d'abord pour mettre les lignes avec gestion_en_stock = 1 en premier
-                df_sorted = df.sort_values(by='gestion_en_stock', ascending=False)
-                
-                # Puis supprimer les doublons en gardant la première occurrence (celle avec gestion_en_stock = 1 si elle existe)
-                df_unique = df_sorted.drop_duplicates(subset=['numero_commande', 'extension'], keep='first').reset_index(drop=True)
-                
-                logger.info(f"Nombre de commandes uniques après traitement: {len(df_unique)}")
-                
-                # Log des résultats pour debug
-                for _, row in df_unique.iterrows():
-                    logger.info(f"Commande: {row['numero_commande']}-{row['extension']} | Status: {row['status']} | Coffre: {row['coffre']} | Gestion Stock: {row['gestion_en_stock']}")
-                
-                # Convertir le DataFrame en liste de dictionnaires
-                return df_unique.to_dict('records')
+            if order_ids is None:
+                query = build_commandes_query()
+                logger.info(f"Requête: {query}")
+                cursor.execute(query)
+                commandes = cursor.fetchall()
             else:
+                order_ids = list(order_ids)
+                logger.info(f"Extraction limitée à {len(order_ids)} commandes modifiées")
+                commandes = []
+                for start in range(0, len(order_ids), self.batch_size):
+                    batch = order_ids[start:start + self.batch_size]
+                    # Le filtre est répété dans les trois sous-requêtes
+                    cursor.execute(build_commandes_query(len(batch)), batch * 3)
+                    commandes.extend(cursor.fetchall())
+            
+            if not commandes:
                 logger.warning("Aucune commande trouvée")
                 return []
+            
+            # Une ligne par commande (numéro, extension) dans chaque lot
+            for commande in commandes:
+                commande['numero_commande'] = str(commande['numero_commande'])
+                commande['gestion_en_stock'] = int(commande['gestion_en_stock'])
+            if order_ids is not None and len(order_ids) > self.batch_size:
+                commandes = keep_first_ranked(commandes)
+            
+            for commande in commandes:
+                logger.info(f"Commande: {commande['numero_commande']}-{commande['extension']} | Status: {commande['status']} | Coffre: {commande['coffre']} | Gestion Stock: {commande['gestion_en_stock']}")
+            
+            logger.info(f"Nombre de commandes uniques: {len(commandes)}")
+            return commandes
                 
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des commandes: {e}")
@@ -265,53 +377,32 @@ class MySQLSyncService:
             if 'mysql_conn' in locals():
                 mysql_conn.close()
 
-    def insert_into_postgres(self, commandes):
-        """Insère les commandes dans PostgreSQL"""
-        if not commandes:
-            logger.info("Aucune commande à synchroniser")
-            return
-            
-        # Nettoyage de la table avant insertion
-        truncate_query = "TRUNCATE TABLE commandes_volets_roulants RESTART IDENTITY;"
-        
-        insert_query = """
-        INSERT INTO commandes_volets_roulants (
-            numero_commande,
-            extension,
-            status,
-            date_modification,
-            coffre,
-            gestion_en_stock,
-            date_synchronisation
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s
-        );
+    def insert_into_postgres(self, commandes, watermarks=None, markers=None):
         """
+        Charge les commandes dans PostgreSQL: COPY dans une table de staging puis
+        fusion dans commandes_volets_roulants, en une seule transaction courte.
+        
+        Contrairement à un TRUNCATE suivi d'insertions, les lecteurs de l'API voient
+        la table complète (ancienne version) jusqu'au commit; les commandes
+        inchangées gardent leur ligne et leur id. Une liste vide vide aussi la
+        table: il n'y a plus de commande de volets roulants dans MySQL.
         
+        Avec watermarks et markers, l'état de la synchronisation incrémentale est
+        enregistré dans la même transaction
+        """
         try:
             pg_conn = self.connect_postgres()
             cursor = pg_conn.cursor()
             
-            # Exécution du nettoyage
-            logger.info("Nettoyage de la table commandes_volets_roulants...")
-            cursor.execute(truncate_query)
-            
-            # Insertion des nouvelles données
-            logger.info(f"Insertion de {len(commandes)} nouvelles commandes...")
-            for commande in commandes:
-                values = (
-                    commande['numero_commande'],
-                    commande['extension'],
-                    commande['status'],
-                    commande['date_modification'],
-                    commande['coffre'],
-                    commande['gestion_en_stock'],
-                    datetime.now()
-                )
-                cursor.execute(insert_query, values)
+            logger.info(f"Chargement de {len(commandes)} commandes dans la table de staging...")
+            self.stage_commandes(cursor, commandes)
             
+            deleted, updated, inserted = self.merge_commandes(cursor)
+            if watermarks is not None:
+                self.save_sync_state(cursor, watermarks, markers)
             pg_conn.commit()
-            logger.info(f"Synchronisation de {len(commandes)} commandes de volets roulants terminée")
+            logger.info(f"Synchronisation de {len(commandes)} commandes de volets roulants terminée "
+                        f"({inserted} ajoutées, {updated} modifiées, {deleted} supprimées)")
             
         except Exception as e:
             logger.error(f"Erreur lors de l'insertion dans PostgreSQL: {e}")
@@ -324,30 +415,358 @@ class MySQLSyncService:
             if 'pg_conn' in locals():
                 pg_conn.close()
 
+    def stage_commandes(self, cursor, commandes):
+        """
+        Crée la table de staging temporaire (supprimée au commit) et y charge les
+        commandes par COPY FROM STDIN, en un seul aller-retour
+        """
+        cursor.execute("""
+            CREATE TEMP TABLE commandes_volets_roulants_staging (
+                numero_commande VARCHAR(20) NOT NULL,
+                extension VARCHAR(5),
+                status VARCHAR(50),
+                date_modification DATE,
+                coffre VARCHAR(50),
+                gestion_en_stock INTEGER,
+                date_synchronisation TIMESTAMP
+            ) ON COMMIT DROP
+        """)
+        
+        synchronised_at = datetime.now()
+        buffer = io.StringIO()
+        for commande in commandes:
+            values = [commande[column] for column in COMMANDE_COLUMNS[:-1]] + [synchronised_at]
+            buffer.write("\t".join(
+                "\\N" if value is None else str(value).translate(COPY_ESCAPES) for value in values
+            ))
+            buffer.write("\n")
+        buffer.seek(0)
+        
+        cursor.copy_expert(
+            f"COPY commandes_volets_roulants_staging ({', '.join(COMMANDE_COLUMNS)}) FROM STDIN",
+            buffer
+        )
+        # Les tables temporaires ne sont pas analysées automatiquement
+        cursor.execute("ANALYZE commandes_volets_roulants_staging")
+
+    def merge_commandes(self, cursor, keys=None):
+        """
+        Fusionne la table de staging dans commandes_volets_roulants (dans la
+        transaction du curseur): suppression des commandes absentes du staging,
+        mise à jour des commandes modifiées, ajout des nouvelles. L'extension
+        pouvant être NULL, les commandes sont rapprochées avec IS NOT DISTINCT FROM
+        plutôt qu'avec ON CONFLICT.
+        
+        keys limite les suppressions à ces couples (numéro, extension)
+        (synchronisation incrémentale); sinon toute commande absente du staging
+        est supprimée. Retourne (supprimées, modifiées, ajoutées)
+        """
+        same_commande = """s.numero_commande = c.numero_commande
+                      AND s.extension IS NOT DISTINCT FROM c.extension"""
+        
+        if keys is None:
+            cursor.execute(f"""
+                DELETE FROM commandes_volets_roulants c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM commandes_volets_roulants_staging s
+                    WHERE {same_commande}
+                )
+            """)
+        else:
+            keys = list(keys)
+            cursor.execute(f"""
+                DELETE FROM commandes_volets_roulants c
+                USING unnest(%s::text[], %s::text[]) AS t(numero_commande, extension)
+                WHERE c.numero_commande = t.numero_commande
+                  AND c.extension IS NOT DISTINCT FROM t.extension
+                  AND NOT EXISTS (
+                      SELECT 1 FROM commandes_volets_roulants_staging s
+                      WHERE {same_commande}
+                  )
+            """, ([numero for numero, _ in keys], [extension for _, extension in keys]))
+        deleted = cursor.rowcount
+        
+        cursor.execute(f"""
+            UPDATE commandes_volets_roulants c SET
+                status = s.status,
+                date_modification = s.date_modification,
+                coffre = s.coffre,
+                gestion_en_stock = s.gestion_en_stock,
+                date_synchronisation = s.date_synchronisation
+            FROM commandes_volets_roulants_staging s
+            WHERE {same_commande}
+              AND (c.status, c.date_modification, c.coffre, c.gestion_en_stock)
+                  IS DISTINCT FROM (s.status, s.date_modification, s.coffre, s.gestion_en_stock)
+        """)
+        updated = cursor.rowcount
+        
+        cursor.execute(f"""
+            INSERT INTO commandes_volets_roulants ({', '.join(COMMANDE_COLUMNS)})
+            SELECT {', '.join(COMMANDE_COLUMNS)}
+            FROM commandes_volets_roulants_staging s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM commandes_volets_roulants c
+                WHERE {same_commande}
+            )
+        """)
+        inserted = cursor.rowcount
+        
+        return deleted, updated, inserted
+
+    def acquire_sync_lock(self, wait=False):
+        """
+        Prend le verrou consultatif de la synchronisation sur une connexion dédiée.
+        Retourne la connexion (à fermer pour libérer le verrou), ou None si une
+        autre synchronisation est en cours. Avec wait, attend la fin de l'autre
+        synchronisation au lieu d'abandonner
+        """
+        lock_conn = self.connect_postgres()
+        lock_conn.autocommit = True
+        with lock_conn.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (SYNC_LOCK_KEY,))
+            if cursor.fetchone()[0]:
+                return lock_conn
+            if wait:
+                logger.info("Synchronisation déjà en cours, attente de sa fin...")
+                cursor.execute("SELECT pg_advisory_lock(%s)", (SYNC_LOCK_KEY,))
+                return lock_conn
+        lock_conn.close()
+        return None
+
+    def read_mysql_watermarks(self, cursor):
+        """
+        Lit les filigranes courants des tables MySQL suivies:
+        dernier ID et dernière date de A_Logbuch, dernière date de A_Vorgang
+        """
+        cursor.execute("SELECT MAX(ID) AS dernier_id, MAX(Datum) AS derniere_date FROM A_Logbuch")
+        logbuch = cursor.fetchone()
+        cursor.execute("SELECT MAX(Datum) AS derniere_date FROM A_Vorgang")
+        vorgang = cursor.fetchone()
+        return {
+            'A_Logbuch': (logbuch['dernier_id'], logbuch['derniere_date']),
+            'A_Vorgang': (None, vorgang['derniere_date']),
+        }
+
+    def read_mysql_markers(self, cursor):
+        """
+        Lit les marqueurs de changement des commandes: A_Kopf n'ayant pas de date
+        de modification, chaque commande est résumée par une empreinte CRC32 de son
+        numéro, de son extension et de son statut (parcours des seules colonnes utiles)
+        """
+        cursor.execute("""
+            SELECT ID, AuNummer, AuAlpha,
+                   CRC32(CONCAT_WS('|', AuNummer, IFNULL(AuAlpha, ''), IFNULL(AufStatus, ''))) AS empreinte
+            FROM A_Kopf
+        """)
+        return {
+            row['ID']: (str(row['AuNummer']), row['AuAlpha'], row['empreinte'])
+            for row in cursor.fetchall()
+        }
+
+    def read_mysql_touched_orders(self, cursor, watermarks):
+        """
+        Commandes dont le journal (A_Logbuch) ou les événements (A_Vorgang) ont
+        changé depuis les filigranes précédents. Les dates sont relues avec une
+        marge de MYSQL_SYNC_OVERLAP_MINUTES: une ligne validée après la lecture
+        des maxima est ainsi rattrapée au passage suivant
+        """
+        overlap = timedelta(minutes=self.overlap_minutes)
+        touched = set()
+        
+        last_id, last_date = watermarks.get('A_Logbuch', (None, None))
+        cursor.execute("""
+            SELECT DISTINCT ID_A_Kopf FROM A_Logbuch
+            WHERE ID > %s OR Datum >= %s
+        """, (last_id or 0, (last_date - overlap) if last_date else datetime.min))
+        touched.update(row['ID_A_Kopf'] for row in cursor.fetchall())
+        
+        _, last_date = watermarks.get('A_Vorgang', (None, None))
+        cursor.execute("""
+            SELECT DISTINCT ID_A_Kopf FROM A_Vorgang
+            WHERE Datum >= %s
+        """, ((last_date - overlap) if last_date else datetime.min,))
+        touched.update(row['ID_A_Kopf'] for row in cursor.fetchall())
+        
+        touched.discard(None)
+        return touched
+
+    def load_sync_state(self, cursor):
+        """Charge les filigranes et les marqueurs des commandes enregistrés dans PostgreSQL"""
+        cursor.execute("SELECT source, dernier_id, derniere_date FROM mysql_sync_watermark")
+        watermarks = {source: (last_id, last_date) for source, last_id, last_date in cursor.fetchall()}
+        cursor.execute("SELECT id_a_kopf, numero_commande, extension, empreinte FROM mysql_sync_commande")
+        markers = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+        return watermarks, markers
+
+    def save_sync_state(self, cursor, watermarks, markers, order_ids=None):
+        """
+        Enregistre les filigranes et les marqueurs des commandes (dans la transaction
+        du curseur). Avec order_ids, seuls les marqueurs de ces commandes sont mis à
+        jour (une commande absente de markers a été supprimée de MySQL); sinon tous
+        les marqueurs sont remplacés
+        """
+        execute_values(cursor, """
+            INSERT INTO mysql_sync_watermark (source, dernier_id, derniere_date)
+            VALUES %s
+            ON CONFLICT (source) DO UPDATE SET
+                dernier_id = EXCLUDED.dernier_id,
+                derniere_date = EXCLUDED.derniere_date,
+                date_maj = CURRENT_TIMESTAMP
+        """, [(source, last_id, last_date) for source, (last_id, last_date) in watermarks.items()])
+        
+        if order_ids is None:
+            cursor.execute("TRUNCATE TABLE mysql_sync_commande")
+            order_ids = markers.keys()
+        elif order_ids:
+            cursor.execute("DELETE FROM mysql_sync_commande WHERE id_a_kopf = ANY(%s::text[])", (list(order_ids),))
+        
+        rows = [(order_id,) + tuple(markers[order_id]) for order_id in order_ids if order_id in markers]
+        if rows:
+            execute_values(cursor, """
+                INSERT INTO mysql_sync_commande (id_a_kopf, numero_commande, extension, empreinte)
+                VALUES %s
+            """, rows, page_size=1000)
+
     def sync(self):
-        """Processus principal de synchronisation"""
+        """
+        Processus principal de synchronisation. Elle attend la fin d'une
+        synchronisation en cours plutôt que de l'ignorer: la synchronisation
+        complète quotidienne est la seule à reprendre les changements sans
+        marqueur (voir sync_incremental), et démarre à la même minute qu'un
+        passage incrémental
+        """
+        lock_conn = self.acquire_sync_lock(wait=True)
+        
         try:
             logger.info("=== Démarrage de la synchronisation des commandes de volets roulants ===")
             
+            # Filigranes et marqueurs lus avant l'extraction: les changements
+            # suivants seront repris par la synchronisation incrémentale
+            mysql_conn = self.connect_mysql()
+            try:
+                mysql_cursor = mysql_conn.cursor(dictionary=True)
+                watermarks = self.read_mysql_watermarks(mysql_cursor)
+                markers = self.read_mysql_markers(mysql_cursor)
+                mysql_cursor.close()
+            finally:
+                mysql_conn.close()
+            
             # Récupération des commandes
             commandes = self.get_commandes_volets_roulants()
             
-            if commandes:
-                # Insertion en base PostgreSQL
-                self.insert_into_postgres(commandes)
-                
-                logger.info(f"=== Synchronisation terminée avec succès - {len(commandes)} commandes traitées ===")
-            else:
-                logger.info("=== Aucune commande à synchroniser ===")
+            # Fusion en base PostgreSQL, même sans commande (les anciennes lignes sont
+            # supprimées), avec le point de départ de la synchronisation incrémentale
+            self.insert_into_postgres(commandes, watermarks, markers)
+            
+            logger.info(f"=== Synchronisation terminée avec succès - {len(commandes)} commandes traitées ===")
                 
         except Exception as e:
             logger.error(f"Erreur lors de la synchronisation: {e}")
             raise
+        finally:
+            lock_conn.close()
+
+    def sync_incremental(self):
+        """
+        Synchronisation incrémentale: seules les commandes modifiées depuis le
+        passage précédent sont réextraites de MySQL et remplacées dans PostgreSQL.
+        
+        Une commande est considérée modifiée si une ligne de A_Logbuch (ID ou date)
+        ou de A_Vorgang (date) est postérieure aux filigranes, ou si son marqueur
+        A_Kopf (numéro, statut) a changé, est nouveau ou a disparu. Les accessoires
+        (P_Zubeh) n'ont pas de marqueur: leurs modifications sont reprises par la
+        synchronisation complète quotidienne. Sans filigranes (premier passage),
+        une synchronisation complète est lancée.
+        """
+        lock_conn = self.acquire_sync_lock()
+        if lock_conn is None:
+            logger.info("=== Synchronisation déjà en cours, passage ignoré ===")
+            return
+        
+        try:
+            logger.info("=== Démarrage de la synchronisation incrémentale des commandes de volets roulants ===")
+            synced = self.sync_changed_orders()
+        finally:
+            lock_conn.close()
+        
+        if not synced:
+            logger.info("Aucun filigrane enregistré: synchronisation complète")
+            self.sync()
+
+    def sync_changed_orders(self):
+        """
+        Réextrait les commandes modifiées depuis les filigranes enregistrés et les
+        remplace dans PostgreSQL, avec les filigranes et marqueurs, en une transaction.
+        Retourne False s'il n'y a pas encore de filigranes
+        """
+        try:
+            pg_conn = self.connect_postgres()
+            cursor = pg_conn.cursor()
+            previous_watermarks, previous_markers = self.load_sync_state(cursor)
+            if not previous_watermarks:
+                return False
+            
+            # Changements côté MySQL (maxima lus avant les commandes modifiées)
+            mysql_conn = self.connect_mysql()
+            try:
+                mysql_cursor = mysql_conn.cursor(dictionary=True)
+                watermarks = self.read_mysql_watermarks(mysql_cursor)
+                markers = self.read_mysql_markers(mysql_cursor)
+                touched = self.read_mysql_touched_orders(mysql_cursor, previous_watermarks)
+                mysql_cursor.close()
+            finally:
+                mysql_conn.close()
+            
+            # Commandes nouvelles, supprimées ou dont le statut a changé
+            touched.update(order_id for order_id, marker in markers.items()
+                           if previous_markers.get(order_id) != marker)
+            touched.update(order_id for order_id in previous_markers if order_id not in markers)
+            
+            # Les lignes PostgreSQL sont identifiées par (numéro, extension): les autres
+            # commandes MySQL de même numéro et extension sont réextraites avec elles
+            keys = {marker[:2] for order_id in touched
+                    for marker in (markers.get(order_id), previous_markers.get(order_id)) if marker}
+            touched.update(order_id for order_id, marker in markers.items() if marker[:2] in keys)
+            
+            counts = (0, 0, 0)
+            if touched:
+                logger.info(f"{len(touched)} commandes modifiées depuis le dernier passage")
+                commandes = self.get_commandes_volets_roulants([order_id for order_id in touched if order_id in markers])
+                
+                # Fusion des lignes des commandes modifiées (staging + COPY)
+                self.stage_commandes(cursor, commandes)
+                counts = self.merge_commandes(cursor, keys)
+            
+            self.save_sync_state(cursor, watermarks, markers, order_ids=touched)
+            pg_conn.commit()
+            
+            if touched:
+                logger.info("=== Synchronisation incrémentale terminée - {2} commandes ajoutées, "
+                            "{1} modifiées, {0} supprimées ===".format(*counts))
+            else:
+                logger.info("=== Aucune commande modifiée depuis le dernier passage ===")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de la synchronisation incrémentale: {e}")
+            if 'pg_conn' in locals():
+                pg_conn.rollback()
+            raise
+        finally:
+            if 'cursor' in locals():
+                cursor.close()
+            if 'pg_conn' in locals():
+                pg_conn.close()
 
 def main():
+    # Mode: argument de la ligne de commande ("full" ou "incremental"), sinon MYSQL_SYNC_MODE
+    mode = (sys.argv[1] if len(sys.argv) > 1 else os.getenv('MYSQL_SYNC_MODE') or 'full').lower()
     try:
         sync_service = MySQLSyncService()
-        sync_service.sync()
+        if mode == 'incremental':
+            sync_service.sync_incremental()
+        else:
+            sync_service.sync()
     except Exception as e:
         logger.error(f"Erreur dans le processus principal: {e}")
         raise
@@ -10,6 +10,20 @@ echo "POSTGRES_USER=${POSTGRES_USER}" >> /etc/cron.d/log_processing_cron
 echo "POSTGRES_PASSWORD=${POSTGRES_PASSWORD}" >> /etc/cron.d/log_processing_cron
 echo "LOGS_DIRECTORY=${LOGS_DIRECTORY}" >> /etc/cron.d/log_processing_cron
 echo "DELETE_AFTER_SYNC=${DELETE_AFTER_SYNC}" >> /etc/cron.d/log_processing_cron
+echo "ARCHIVE_AFTER_SYNC=${ARCHIVE_AFTER_SYNC}" >> /etc/cron.d/log_processing_cron
+echo "ARCHIVE_COMPRESSION=${ARCHIVE_COMPRESSION}" >> /etc/cron.d/log_processing_cron
+echo "LOG_WORKERS=${LOG_WORKERS}" >> /etc/cron.d/log_processing_cron
+echo "PRODUCTION_DAY_START_HOUR=${PRODUCTION_DAY_START_HOUR}" >> /etc/cron.d/log_processing_cron
+echo "INCREMENTAL_INGESTION=${INCREMENTAL_INGESTION}" >> /etc/cron.d/log_processing_cron
+echo "LOG_SETTLE_SECONDS=${LOG_SETTLE_SECONDS}" >> /etc/cron.d/log_processing_cron
+echo "DETAIL_WRITE_MODE=${DETAIL_WRITE_MODE}" >> /etc/cron.d/log_processing_cron
+echo "DETAIL_SYNC_MODE=${DETAIL_SYNC_MODE}" >> /etc/cron.d/log_processing_cron
+echo "LOG_PIPELINE=${LOG_PIPELINE}" >> /etc/cron.d/log_processing_cron
+echo "LOG_PIPELINE_DEPTH=${LOG_PIPELINE_DEPTH}" >> /etc/cron.d/log_processing_cron
+echo "METRICS_TEXTFILE=${METRICS_TEXTFILE}" >> /etc/cron.d/log_processing_cron
+
+# Mode du service de logs : "daemon" (ingestion continue, par défaut) ou "cron" (passage planifié)
+LOG_SERVICE_MODE=${LOG_SERVICE_MODE:-daemon}
 
 # Créer le fichier crontab avec les variables d'environnement pour MySQL
 echo "POSTGRES_HOST=${POSTGRES_HOST}" > /etc/cron.d/mysql_sync_cron
@@ -21,13 +35,28 @@ echo "MYSQL_DB=${MYSQL_DB}" >> /etc/cron.d/mysql_sync_cron
 echo "MYSQL_USER=${MYSQL_USER}" >> /etc/cron.d/mysql_sync_cron
 echo "MYSQL_PASSWORD=${MYSQL_PASSWORD}" >> /etc/cron.d/mysql_sync_cron
 echo "MYSQL_PORT=${MYSQL_PORT:-3306}" >> /etc/cron.d/mysql_sync_cron
+echo "MYSQL_SYNC_OVERLAP_MINUTES=${MYSQL_SYNC_OVERLAP_MINUTES}" >> /etc/cron.d/mysql_sync_cron
+echo "MYSQL_SYNC_BATCH_SIZE=${MYSQL_SYNC_BATCH_SIZE}" >> /etc/cron.d/mysql_sync_cron
+
+# Mode de synchronisation MySQL : "incremental" (commandes modifiées toutes les
+# MYSQL_SYNC_INTERVAL_MINUTES minutes + synchronisation complète quotidienne) ou "full"
+MYSQL_SYNC_MODE=${MYSQL_SYNC_MODE:-incremental}
+MYSQL_SYNC_INTERVAL_MINUTES=${MYSQL_SYNC_INTERVAL_MINUTES:-5}
 
 # Ajouter les tâches cron
-# Service de traitement des logs : tous les jours à 11h
-echo "* 11 * * * root cd /app && /usr/local/bin/python /app/ftp_log_service.py >> /var/log/cron.log 2>&1" >> /etc/cron.d/log_processing_cron
+# Service de traitement des logs (mode cron uniquement) : tous les jours à 11h
+if [ "$LOG_SERVICE_MODE" = "cron" ]; then
+    echo "* 11 * * * root cd /app && /usr/local/bin/python /app/ftp_log_service.py >> /var/log/cron.log 2>&1" >> /etc/cron.d/log_processing_cron
+fi
 
-# Service MySQL : tous les jours à 9h et 14h
-echo "0 9,14 * * * root cd /app && /usr/local/bin/python /app/mysql_sync_service.py >> /var/log/cron.log 2>&1" >> /etc/cron.d/mysql_sync_cron
+# Service MySQL : incrémental toutes les quelques minutes et complet tous les jours à 9h
+# (mode full : complet tous les jours à 9h et 14h)
+if [ "$MYSQL_SYNC_MODE" = "incremental" ]; then
+    echo "*/${MYSQL_SYNC_INTERVAL_MINUTES} * * * * root cd /app && /usr/local/bin/python /app/mysql_sync_service.py incremental >> /var/log/cron.log 2>&1" >> /etc/cron.d/mysql_sync_cron
+    echo "0 9 * * * root cd /app && /usr/local/bin/python /app/mysql_sync_service.py full >> /var/log/cron.log 2>&1" >> /etc/cron.d/mysql_sync_cron
+else
+    echo "0 9,14 * * * root cd /app && /usr/local/bin/python /app/mysql_sync_service.py full >> /var/log/cron.log 2>&1" >> /etc/cron.d/mysql_sync_cron
+fi
 
 # Donner les bonnes permissions
 chmod 0644 /etc/cron.d/log_processing_cron
@@ -40,9 +69,19 @@ cron
 mkdir -p /app/sync_logs
 
 # Exécuter les deux services immédiatement au démarrage, avec un délai entre eux
-(cd /app && /usr/local/bin/python /app/ftp_log_service.py) &
+# (en mode démon, le service de logs reste actif et ingère les fichiers dès leur dépôt)
+if [ "$LOG_SERVICE_MODE" = "cron" ]; then
+    (cd /app && /usr/local/bin/python /app/ftp_log_service.py) &
+else
+    # Le démon redémarre lui-même après une erreur ; cette boucle le relance si le
+    # processus est tué (mémoire, plantage) et ne s'arrête que sur un arrêt propre
+    (cd /app && until /usr/local/bin/python /app/ftp_log_service.py daemon; do
+        echo "Démon d'ingestion arrêté (code $?), redémarrage dans 30 s"
+        sleep 30
+    done) &
+fi
 sleep 10
-(cd /app && /usr/local/bin/python /app/mysql_sync_service.py) &
+(cd /app && /usr/local/bin/python /app/mysql_sync_service.py "$MYSQL_SYNC_MODE") &
 
 # Afficher les logs en temps réel (logs cron + logs des services)
 tail -f /var/log/cron.log /app/sync_logs/*.log 2>/dev/null || tail -f /var/log/cron.log 
\ No newline at end of file
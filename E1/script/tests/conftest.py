@@ -0,0 +1,30 @@
+from pathlib import Path
+import logging
+import sys
+
+import pytest
+
+# Les scripts du service sont importés directement (pas de package)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from ftp_log_service import LogService
+from log_generator import generate_logs
+
+# Les tests ne doivent pas être noyés sous les logs du service
+logging.getLogger('ftp_log_service').setLevel(logging.WARNING)
+
+
+@pytest.fixture(scope="session")
+def generated_logs(tmp_path_factory):
+    """Une journée de logs DEM12, DEMALU et SU12 (CRLF, 2 % de lignes mal formées)."""
+    directory = tmp_path_factory.mktemp("logs")
+    return generate_logs(str(directory), rate=0.5, malformed=0.02, seed=7)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """LogService sans base de données, journées de production à minuit."""
+    monkeypatch.delenv("PRODUCTION_DAY_START_HOUR", raising=False)
+    monkeypatch.delenv("LOG_EVENT_STORE", raising=False)
+    return LogService()
@@ -0,0 +1,153 @@
+"""
+Équivalence des analyseurs de ftp_log_service.py avec l'analyse historique
+(legacy_analyze_machine_performance) sur des logs générés par log_generator.py:
+passe unique, stockage en colonnes et reprise d'une analyse sauvegardée.
+
+Le temps de production effectif et le taux d'occupation ne comptent plus
+qu'une fois les chevauchements des attentes et des arrêts: ils sont vérifiés
+contre une réunion d'intervalles naïve (expected_redefined_indicators),
+indépendante du service.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmark_log_service import (
+    REDEFINED_KEYS,
+    compare_analyses,
+    expected_redefined_indicators,
+    interval_union_hours,
+    legacy_analyze_machine_performance,
+)
+from log_event_store import ColumnarEventStore
+
+# Listes de détails: après une reprise, seuls les nouveaux événements y figurent
+DETAIL_KEYS = ("JobDetails", "WaitPeriods", "StopPeriods", "PieceEvents")
+
+
+def machine_of(path):
+    return os.path.basename(os.path.dirname(path))
+
+
+def read_events(service, path):
+    return list(service.iter_log_events(path))
+
+
+def legacy_results(service, path):
+    """Résultats historiques, sans les indicateurs redéfinis."""
+    expected = legacy_analyze_machine_performance(read_events(service, path), machine_of(path))
+    return {key: value for key, value in expected.items() if key not in REDEFINED_KEYS}
+
+
+def common_keys(actual, expected):
+    """Restreint un résultat aux clés de l'analyse historique (sans Rejets, Etat...)."""
+    return {key: actual[key] for key in expected}
+
+
+def expected_redefined(service, path):
+    legacy = legacy_analyze_machine_performance(read_events(service, path), machine_of(path))
+    return expected_redefined_indicators(legacy)
+
+
+def assert_redefined(actual, expected):
+    for key in REDEFINED_KEYS:
+        assert actual[key] == pytest.approx(expected[key], rel=1e-9), key
+
+
+def log_paths(generated_logs):
+    return [path for path, counts in generated_logs]
+
+
+def test_generated_logs_are_realistic(generated_logs):
+    assert sorted(machine_of(path) for path in log_paths(generated_logs)) == ["DEM12", "DEMALU", "SU12"]
+    for path, counts in generated_logs:
+        assert counts["malformed"] > 0
+        with open(path, 'rb') as file:
+            content = file.read()
+        assert content.endswith(b"\r\n")
+        assert content.count(b"\r\n") == content.count(b"\n")
+
+
+def test_stream_analyzer_matches_legacy(service, generated_logs):
+    for path in log_paths(generated_logs):
+        expected = legacy_results(service, path)
+        results = service.analyze_machine_performance(
+            service.iter_log_events(path), os.path.basename(path), machine_of(path), machine_of(path))
+
+        assert len(results) == 1
+        assert common_keys(results[0], expected) == expected
+        assert_redefined(results[0], expected_redefined(service, path))
+
+
+def test_columnar_analyzer_matches_legacy(service, generated_logs):
+    for path in log_paths(generated_logs):
+        expected = legacy_results(service, path)
+        store = ColumnarEventStore.from_events(service.iter_log_events(path))
+        results = service.analyze_event_store(store, os.path.basename(path), machine_of(path), machine_of(path))
+
+        assert len(results) == 1
+        assert common_keys(results[0], expected) == expected
+        assert_redefined(results[0], expected_redefined(service, path))
+
+
+def test_resumed_analyzer_matches_legacy(service, generated_logs, tmp_path):
+    for path in log_paths(generated_logs):
+        machine = machine_of(path)
+        filename = os.path.basename(path)
+        expected = legacy_results(service, path)
+
+        # Première ingestion: le fichier n'est écrit que jusqu'au milieu d'une ligne
+        with open(path, 'rb') as file:
+            content = file.read()
+        cut = content.index(b"\r\n", len(content) // 2) + 2
+        partial_path = tmp_path / f"partiel_{filename}"
+        partial_path.write_bytes(content[:cut + 10])
+
+        stats = {}
+        first = service.analyze_machine_performance(
+            service.iter_log_events(str(partial_path), stats, complete_lines_only=True),
+            filename, machine, machine)
+        assert stats["offset"] == cut
+
+        # L'état passe par la colonne JSON du point de reprise
+        state = json.loads(json.dumps(first[-1]["Etat"]))
+        second = service.analyze_machine_performance(
+            service.iter_log_events(path, start_offset=stats["offset"]),
+            filename, machine, machine, state)
+
+        assert len(first) == len(second) == 1
+        resumed = dict(second[0])
+        assert resumed["Incremental"]
+        for key in DETAIL_KEYS:
+            resumed[key] = first[0][key] + second[0][key]
+        assert common_keys(resumed, expected) == expected
+        assert_redefined(second[0], expected_redefined(service, path))
+
+
+def test_redefined_keys_count_overlaps_once(service, generated_logs):
+    # Les logs générés contiennent des attentes qui chevauchent d'autres
+    # attentes ou des arrêts: la somme historique des durées est alors plus forte
+    for path in log_paths(generated_logs):
+        legacy = legacy_analyze_machine_performance(read_events(service, path), machine_of(path))
+        expected = expected_redefined(service, path)
+        assert expected["TempsProductionEffectif"] > legacy["TempsProductionEffectif"]
+
+
+def test_interval_union_hours():
+    start = datetime(2024, 6, 3, 6)
+    periods = [
+        {"Start": start, "End": start + timedelta(minutes=30)},
+        {"Start": start + timedelta(minutes=10), "End": start + timedelta(minutes=40)},
+        {"Start": start + timedelta(hours=1), "End": start + timedelta(hours=2)},
+        {"Start": start - timedelta(hours=1), "End": start - timedelta(minutes=5)},
+    ]
+    assert interval_union_hours(periods, start, start + timedelta(minutes=90)) == pytest.approx(40 / 60 + 0.5)
+
+
+def test_compare_analyses_cli(service, generated_logs, capsys):
+    for path in log_paths(generated_logs):
+        assert compare_analyses([path], machine_of(path))
+    assert "DIFF" not in capsys.readouterr().out